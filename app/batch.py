@@ -0,0 +1,202 @@
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import opr
+import predict
+import predict_graph
+import std as stdfun
+import tba
+
+
+def predict_event(event_key, scores_path=None, rating=None, fill_unscouted=False):
+    """
+    Backtest one event: predict every qualification match with the data before it
+    and compute the accuracy curves of predict_graph. An event without scores in
+    the score store raises ValueError instead of being predicted from zeros.
+    Args:
+        event_key (str): The event key for the FRC event.
+        scores_path (str): Score store to read; see std.scores_path for the default.
+        rating (dict): Keyword arguments of ScoreStore.engine, e.g. {"half_life": 6}.
+        fill_unscouted (bool): Use OPR for teams without scouting data.
+    Returns:
+        dict: "event_key", "accuracy", per-match "matches", and the
+        "accuracy_by_progress" and "accuracy_by_practice" curves.
+    """
+    rating = rating or {}
+    event = tba.get_event_data(event_key)
+    store = stdfun.load_score_store(scores_path, event=event_key)
+    if not store.matches:
+        raise ValueError(f"no scouting data for {event_key}")
+    if fill_unscouted:
+        engine = opr.filled_engine(store, event, rating)
+    else:
+        engine = store.engine(**rating)
+
+    _, means, std_devs = engine.arrays(event.match_numbers, True)
+    blue_teams, red_teams = event.alliance_indices(engine.team_index)
+    predictions = predict.batch_win_prediction(blue_teams, red_teams, means, std_devs)
+    predicted_blue = predictions["blue_win_prob"] > predictions["red_win_prob"]
+
+    blue_keys = event.team_keys("blue")
+    red_keys = event.team_keys("red")
+    matches = []
+    for i, match_number in enumerate(event.match_numbers.tolist()):
+        matches.append(
+            {
+                "match_number": match_number,
+                "blue_teams": blue_keys[i],
+                "red_teams": red_keys[i],
+                "blue_avg": predictions["blue_avg"][i].item(),
+                "red_avg": predictions["red_avg"][i].item(),
+                "blue_win_prob": predictions["blue_win_prob"][i].item(),
+                "blue_score": event.blue_scores[i].item(),
+                "red_score": event.red_scores[i].item(),
+                "winner": event.winners[i],
+                "correct": event.winners[i] == ("blue" if predicted_blue[i] else "red"),
+            }
+        )
+    options = {"store": store, "rating": rating, "fill_unscouted": fill_unscouted}
+    return {
+        "event_key": event_key,
+        "accuracy": (
+            sum(match["correct"] for match in matches) / len(matches)
+            if matches
+            else None
+        ),
+        "matches": matches,
+        "accuracy_by_progress": predict_graph.accuracyByProgress(
+            event, use_practice_before=math.inf, **options
+        ),
+        "accuracy_by_practice": predict_graph.accuracyByPracticeBefore(
+            event, progress=len(event), **options
+        ),
+    }
+
+
+def run_event(event_key, output_dir, **kwargs):
+    """
+    Backtest one event and write the result to output_dir/<event_key>.json.
+    Args:
+        event_key (str): The event key for the FRC event.
+        output_dir (str): Directory for the result files.
+        **kwargs: Passed on to predict_event.
+    Returns:
+        dict: Summary with "event_key", "matches", "accuracy" and "seconds", or
+        "error" if the event failed, e.g. it has no scouting data.
+    """
+    start = time.perf_counter()
+    try:
+        result = predict_event(event_key, **kwargs)
+    except Exception as e:
+        return {"event_key": event_key, "error": str(e)}
+    with open(os.path.join(output_dir, f"{event_key}.json"), "w") as f:
+        json.dump(result, f, indent=2)
+    return {
+        "event_key": event_key,
+        "matches": len(result["matches"]),
+        "accuracy": result["accuracy"],
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def run_batch(event_keys, output_dir, workers=None, **kwargs):
+    """
+    Backtest many events on a process pool.
+    The TBA responses are fetched first with tba.fetch_events, so the workers read
+    them from the shared on-disk cache.
+    Args:
+        event_keys (list of str): Events to backtest.
+        output_dir (str): Directory for the result files and summary.json.
+        workers (int): Number of processes; defaults to the number of CPUs.
+        **kwargs: Passed on to predict_event.
+    Returns:
+        list: The run_event summaries in event_keys order.
+    """
+    scores_path = stdfun.scores_path(kwargs.get("scores_path"))
+    if len(set(event_keys)) > 1 and not os.path.isdir(scores_path):
+        # Every event would be predicted from the same scores
+        raise ValueError(
+            f"{scores_path} holds the scores of a single event; backtest several "
+            "events from a columnar store (see columnar.py)"
+        )
+    os.makedirs(output_dir, exist_ok=True)
+    tba.fetch_events(event_keys, endpoints=("matches",))
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_event, event_key, output_dir, **kwargs)
+            for event_key in event_keys
+        ]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries[summary["event_key"]] = summary
+            if "error" in summary:
+                print(f"{summary['event_key']}: failed: {summary['error']}")
+            else:
+                print(
+                    f"{summary['event_key']}: {summary['matches']} matches, "
+                    f"accuracy {summary['accuracy'] or 0:.1%} ({summary['seconds']}s)"
+                )
+    ordered = [summaries[event_key] for event_key in event_keys]
+    with open(os.path.join(output_dir, "summary.json"), "w") as f:
+        json.dump(ordered, f, indent=2)
+    return ordered
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backtest match predictions for many events without Streamlit."
+    )
+    parser.add_argument("events", nargs="*", help="event keys such as 2025casd")
+    parser.add_argument("--year", type=int, help="backtest every event of a season")
+    parser.add_argument("--district", help="with --year, only this district, e.g. fim")
+    parser.add_argument("--scores", default=None, help="score store to read")
+    parser.add_argument("--output", default="backtest", help="output directory")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--half-life", type=float, help="exponentially weighted ratings"
+    )
+    parser.add_argument("--window", type=int, help="only each team's last N matches")
+    parser.add_argument(
+        "--fill-unscouted",
+        action="store_true",
+        help="use OPR from TBA scores for teams without scouting data",
+    )
+    args = parser.parse_args()
+
+    event_keys = list(args.events)
+    if args.year:
+        event_keys += tba.get_event_keys(args.year, args.district)
+    if not event_keys:
+        parser.error("give event keys or --year")
+    rating = {}
+    if args.half_life:
+        rating["half_life"] = args.half_life
+    if args.window:
+        rating["window"] = args.window
+
+    start = time.perf_counter()
+    try:
+        summaries = run_batch(
+            event_keys,
+            args.output,
+            workers=args.workers,
+            scores_path=args.scores,
+            rating=rating,
+            fill_unscouted=args.fill_unscouted,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    # Failed events, such as those without scouting data, have no accuracy
+    accuracies = [s["accuracy"] for s in summaries if s.get("accuracy") is not None]
+    print(
+        f"{len(summaries)} events in {time.perf_counter() - start:.1f}s, "
+        f"mean accuracy {np.mean(accuracies) if accuracies else 0:.1%} "
+        f"over {len(accuracies)} events"
+    )
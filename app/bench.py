@@ -0,0 +1,374 @@
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import opr
+import predict
+import predict_graph
+import scoring
+import std as stdfun
+import synthetic
+import tba
+
+# Qualification match counts of a small district event, a regional and a
+# championship division
+SIZES = (40, 80, 150)
+REPEAT = 5
+# A stage is reported as a regression when it is this much slower than the baseline
+REGRESSION_TOLERANCE = 0.25
+# Modules CLI tools and worker processes import, and the time each may take to import
+# in a fresh interpreter. numpy alone is about 100 ms; scipy, pandas, Plotly,
+# Streamlit and firebase_admin are only loaded when first used.
+IMPORT_MODULES = (
+    "std",
+    "predict",
+    "tba",
+    "predict_graph",
+    "opr",
+    "rankings",
+    "picklist",
+    "bracket",
+    "simulate",
+    "score_db",
+    "raw_data",
+    "ingest",
+    "batch",
+    "service",
+)
+IMPORT_BUDGET_MS = 300
+# Scouting documents of a season-wide re-score
+SCORING_DOCUMENTS = 50000
+
+
+def _time(function, setup=None, repeat=REPEAT):
+    """
+    Time a function.
+    Args:
+        function (callable): Called without arguments.
+        setup (callable): Called before every run, outside the timing.
+        repeat (int): Number of runs.
+    Returns:
+        float: Median wall time in milliseconds.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def _clear_caches():
+    # Every stage is timed cold: the score file is read again and the grid recomputed
+    stdfun.clear_cache()
+    opr.clear_cache()
+    predict_graph.clear_cache()
+
+
+def json_team_stats(cutoff_q_number, json_path, use_practice_before=math.inf):
+    """
+    The original calculate_team_stats: read the JSON score file and group the scores
+    by team on every call. Timed next to the score store to show what it saves.
+    Returns:
+        dict: The calculate_team_stats result.
+    """
+    with open(json_path, "r") as f:
+        match_scores = json.load(f)
+    team_scores = {}
+    for match_id, teams in match_scores.items():
+        match_type, _, match_number = match_id.partition("_")
+        include_match = (
+            match_type == "Practice" and cutoff_q_number <= use_practice_before
+        ) or (match_type == "Qualifications" and int(match_number) < cutoff_q_number)
+        if not include_match:
+            continue
+        for team_number, score in teams.items():
+            team_scores.setdefault(team_number, []).append(score)
+    result = {}
+    for team_number, scores in team_scores.items():
+        mean, std_dev = stdfun.calculate_stats(scores)
+        result[team_number] = {"average": mean, "std_dev": std_dev}
+    return result
+
+
+def document_team_score(data):
+    """
+    The original calculate_team_score: walk one document's fields with the 2025
+    points hard-coded. Timed next to the batch scorer to show what it saves.
+    Returns:
+        int: The document's score.
+    """
+    score = 0
+    if data["auto"].get("leave", False):
+        score += 3
+    for count, points in zip(data["auto"].get("coral", [0, 0, 0, 0]), [3, 4, 6, 7]):
+        score += count * points
+    score += data["auto"].get("net", 0) * 4
+    score += data["auto"].get("processor", 0) * 6
+    for count, points in zip(data["teleop"].get("coral", [0, 0, 0, 0]), [2, 3, 4, 5]):
+        score += count * points
+    score += data["teleop"].get("net", 0) * 4
+    score += data["teleop"].get("processor", 0) * 6
+    barge_status = data["endgame"].get("bargeStatus", "Did Not Attempt")
+    if barge_status == "Success Deep Cage":
+        score += 12
+    elif barge_status == "Success Shallow Cage":
+        score += 6
+    elif barge_status == "Park":
+        score += 2
+    return score
+
+
+def bench_scoring(documents=SCORING_DOCUMENTS, repeat=REPEAT, seed=0):
+    """
+    Time scoring a season's worth of scouting documents.
+    Args:
+        documents (int): Number of synthetic documents.
+        repeat (int): Runs per stage.
+        seed (int): Seed of the synthetic documents.
+    Returns:
+        dict: Median milliseconds of the original per-document scorer, the batch
+        scorer, and re-scoring stored counts as the columnar store does.
+    """
+    docs = synthetic.generate_documents(documents, seed)
+    rules = scoring.get_rules()
+    counts = rules.document_counts(docs)
+    return {
+        "document_team_score": _time(
+            lambda: [document_team_score(data) for data in docs], repeat=repeat
+        ),
+        "score_documents": _time(lambda: rules.score_documents(docs), repeat=repeat),
+        "score_counts": _time(lambda: rules.score_counts(counts), repeat=repeat),
+    }
+
+
+def bench_event(matches, scores_path, repeat=REPEAT):
+    """
+    Time the std / predict / predict_graph stages on one event.
+    Args:
+        matches (list): TBA matches of the event.
+        scores_path (str): match_team_scores.json of the event.
+        repeat (int): Runs per stage.
+    Returns:
+        dict: Median milliseconds per stage.
+    """
+    event = tba.build_event_data("2025synth", matches)
+    match_count = len(event)
+    blue_keys = [
+        [team.replace("frc", "") for team in keys] for keys in event.team_keys("blue")
+    ]
+    red_keys = [
+        [team.replace("frc", "") for team in keys] for keys in event.team_keys("red")
+    ]
+    results = {}
+
+    results["json_team_stats"] = _time(
+        lambda: json_team_stats(match_count // 2, scores_path), repeat=repeat
+    )
+    results["calculate_team_stats"] = _time(
+        lambda: stdfun.calculate_team_stats(match_count // 2, scores_path),
+        setup=_clear_caches,
+        repeat=repeat,
+    )
+
+    def json_all_cutoffs():
+        for cutoff in range(1, match_count + 1):
+            json_team_stats(cutoff, scores_path)
+
+    def all_cutoffs():
+        for cutoff in range(1, match_count + 1):
+            stdfun.calculate_team_stats(cutoff, scores_path)
+
+    results["json_team_stats_all_cutoffs"] = _time(json_all_cutoffs, repeat=repeat)
+    results["calculate_team_stats_all_cutoffs"] = _time(
+        all_cutoffs, setup=_clear_caches, repeat=repeat
+    )
+
+    stats = stdfun.calculate_team_stats(math.inf, scores_path)
+
+    def predict_all():
+        for blue, red in zip(blue_keys, red_keys):
+            predict.alliance_win_prediction(blue, red, stats)
+
+    results["alliance_win_prediction_all_matches"] = _time(predict_all, repeat=repeat)
+
+    store = stdfun.load_score_store(scores_path, event=event.event_key)
+    results["accuracyByProgress"] = _time(
+        lambda: predict_graph.accuracyByProgress(event, store=store),
+        setup=_clear_caches,
+        repeat=repeat,
+    )
+    results["accuracyByPracticeBefore"] = _time(
+        lambda: predict_graph.accuracyByPracticeBefore(
+            event, progress=match_count, store=store
+        ),
+        setup=_clear_caches,
+        repeat=repeat,
+    )
+    return results
+
+
+def run_benchmarks(sizes=SIZES, repeat=REPEAT, seed=0):
+    """
+    Benchmark every stage on synthetic events of several sizes.
+    Args:
+        sizes (tuple of int): Qualification match counts.
+        repeat (int): Runs per stage.
+        seed (int): Seed of the synthetic events.
+    Returns:
+        dict: {"sizes": sizes, "stages": {stage: [milliseconds per size]},
+        "scaling": {stage: exponent k of time ~ matches ** k}}.
+    """
+    stages = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            output_dir = os.path.join(directory, str(size))
+            matches_path, scores_path = synthetic.write_event(
+                output_dir, matches=size, seed=seed
+            )
+            with open(matches_path) as f:
+                matches = json.load(f)
+            for stage, milliseconds in bench_event(
+                matches, scores_path, repeat
+            ).items():
+                stages.setdefault(stage, []).append(milliseconds)
+            _clear_caches()
+
+    scaling = {}
+    if len(sizes) > 1:
+        for stage, times in stages.items():
+            slope = np.polyfit(np.log(sizes), np.log(np.maximum(times, 1e-6)), 1)[0]
+            scaling[stage] = round(slope.item(), 2)
+    return {"sizes": list(sizes), "stages": stages, "scaling": scaling}
+
+
+def import_times(modules=IMPORT_MODULES, repeat=3):
+    """
+    Time importing each module in a fresh interpreter.
+    Args:
+        modules (tuple of str): Module names in the app directory.
+        repeat (int): Interpreters started per module.
+    Returns:
+        dict: {module: fastest import time in milliseconds}.
+    """
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    code = (
+        "import time; start = time.perf_counter(); import {}; "
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    times = {}
+    for module in modules:
+        runs = [
+            subprocess.run(
+                [sys.executable, "-c", code.format(module)],
+                cwd=app_dir,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            for _ in range(repeat)
+        ]
+        times[module] = min(float(run.stdout.split()[-1]) for run in runs)
+    return times
+
+
+def regressions(result, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Compare a benchmark result with a baseline result.
+    Args:
+        result (dict): Output of run_benchmarks.
+        baseline (dict): An earlier output of run_benchmarks.
+        tolerance (float): Allowed relative slowdown.
+    Returns:
+        list of str: One message per stage and size that got slower than allowed.
+    """
+    messages = []
+    for stage, times in result["stages"].items():
+        base_times = dict(zip(baseline["sizes"], baseline["stages"].get(stage, [])))
+        for size, milliseconds in zip(result["sizes"], times):
+            base = base_times.get(size)
+            if base is not None and milliseconds > base * (1 + tolerance):
+                messages.append(
+                    f"{stage} at {size} matches: {milliseconds:.2f} ms "
+                    f"(baseline {base:.2f} ms)"
+                )
+    return messages
+
+
+def print_report(result):
+    header = f"{'stage':<38}" + "".join(
+        f"{str(size) + ' matches':>14}" for size in result["sizes"]
+    )
+    print(header + f"{'scaling':>10}")
+    for stage, times in result["stages"].items():
+        row = f"{stage:<38}" + "".join(f"{t:>11.2f} ms" for t in times)
+        scaling = result["scaling"].get(stage)
+        print(row + (f"{'n^' + str(scaling):>10}" if scaling is not None else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the stats, prediction and accuracy stages on synthetic events."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="fail if slower than this earlier --output")
+    parser.add_argument(
+        "--tolerance", type=float, default=REGRESSION_TOLERANCE, help="e.g. 0.25"
+    )
+    parser.add_argument(
+        "--imports",
+        action="store_true",
+        help=f"check that every module imports within {IMPORT_BUDGET_MS} ms instead",
+    )
+    parser.add_argument(
+        "--scoring",
+        action="store_true",
+        help=f"time scoring {SCORING_DOCUMENTS} scouting documents instead",
+    )
+    args = parser.parse_args()
+
+    if args.imports:
+        over = []
+        for module, milliseconds in import_times().items():
+            print(f"{module:<16}{milliseconds:>8.1f} ms")
+            if milliseconds > IMPORT_BUDGET_MS:
+                over.append(module)
+        if over:
+            print(f"Over the {IMPORT_BUDGET_MS} ms import budget: {', '.join(over)}")
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.scoring:
+        times = bench_scoring(repeat=args.repeat, seed=args.seed)
+        for stage, milliseconds in times.items():
+            print(f"{stage:<24}{milliseconds:>10.2f} ms")
+        if times["score_documents"] >= times["document_team_score"]:
+            print("The batch scorer is not faster than the per-document scorer")
+            sys.exit(1)
+        sys.exit(0)
+
+    result = run_benchmarks(tuple(args.sizes), args.repeat, args.seed)
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower = regressions(result, json.load(f), args.tolerance)
+        for message in slower:
+            print(f"Regression: {message}")
+        if slower:
+            sys.exit(1)
@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import predict
+import profiling
+
+# 2023+ double-elimination bracket for 8 alliances. Each match is
+# (number, round, red, blue), where a slot is ("seed", n) for alliance n or
+# ("W", m) / ("L", m) for the winner / loser of match m.
+BRACKET = [
+    (1, 1, ("seed", 1), ("seed", 8)),
+    (2, 1, ("seed", 4), ("seed", 5)),
+    (3, 1, ("seed", 2), ("seed", 7)),
+    (4, 1, ("seed", 3), ("seed", 6)),
+    (5, 2, ("L", 1), ("L", 2)),
+    (6, 2, ("L", 3), ("L", 4)),
+    (7, 2, ("W", 1), ("W", 2)),
+    (8, 2, ("W", 3), ("W", 4)),
+    (9, 3, ("L", 7), ("W", 6)),
+    (10, 3, ("L", 8), ("W", 5)),
+    (11, 4, ("W", 7), ("W", 8)),
+    (12, 4, ("W", 10), ("W", 9)),
+    (13, 5, ("L", 11), ("W", 12)),
+]
+# Finals: winner of the upper bracket (match 11) against the winner of match 13
+FINALS = (("W", 11), ("W", 13))
+FINALS_WINS = 2
+ALLIANCES = 8
+# Stages an alliance can reach, with the round each starts in. Every alliance plays
+# in rounds 1 and 2, so those are not tracked.
+STAGES = ["Round 3", "Round 4", "Round 5", "Finals", "Winner"]
+STAGE_ROUNDS = [3, 4, 5, 6, 7]
+FINALS_ROUND = 6
+# A loss in a match whose loser has no later slot eliminates the alliance
+ELIMINATING = [
+    number
+    for number, _, _, _ in BRACKET
+    if not any(("L", number) in (red, blue) for _, _, red, blue in BRACKET)
+]
+# Seeded simulations by (win matrix, simulations, seed), least recently used first
+BRACKET_CACHE_SIZE = 8
+_brackets = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def alliance_win_matrix(means, variances):
+    """
+    Win probabilities of every alliance against every other with the normal model
+    of predict.alliance_win_prediction.
+    Args:
+        means (list of float): Average score of each alliance.
+        variances (list of float): Score variance of each alliance.
+    Returns:
+        numpy.ndarray: (alliances, alliances) array; [i, j] is the probability that
+        alliance i beats alliance j in one match.
+    """
+    means = np.asarray(means, dtype=float)
+    variances = np.asarray(variances, dtype=float)
+    return predict.win_probability(
+        means[:, None] - means[None, :],
+        np.sqrt(variances[:, None] + variances[None, :]),
+    )
+
+
+def simulate_bracket(win_matrix, simulations=100000, seed=None):
+    """
+    Simulate the double-elimination playoffs.
+    Seeded simulations are cached by the win matrix, so reruns with the same
+    alliances and statistics reuse the result.
+    Args:
+        win_matrix (numpy.ndarray): (8, 8) single-match win probabilities, such as
+            alliance_win_matrix; any model giving this matrix can be used.
+        simulations (int): Number of simulated playoffs.
+        seed (int): Seed for reproducible results; None always simulates.
+    Returns:
+        dict: "reach_probs" of shape (8, len(STAGES)) with each alliance's probability
+        of still being in the playoffs at each stage (the last column is winning the
+        event), "win_probs" of shape (8,), and "champions" with the winning alliance
+        index (0 for alliance 1) of every simulation. Cached results have read-only
+        arrays.
+    """
+    win_matrix = np.asarray(win_matrix, dtype=float)
+    if seed is None:
+        return _simulate_bracket(win_matrix, simulations, seed)
+    key = (win_matrix.shape, win_matrix.tobytes(), simulations, seed)
+    with _cache_lock:
+        result = _brackets.get(key)
+        if result is not None:
+            _brackets.move_to_end(key)
+    profiling.cache("bracket.simulate_bracket", result is not None)
+    if result is not None:
+        return result
+
+    result = _simulate_bracket(win_matrix, simulations, seed)
+    for value in result.values():
+        value.setflags(write=False)
+    with _cache_lock:
+        _brackets[key] = result
+        while len(_brackets) > BRACKET_CACHE_SIZE:
+            _brackets.popitem(last=False)
+    return result
+
+
+def clear_cache():
+    """Forget every cached simulation."""
+    with _cache_lock:
+        _brackets.clear()
+
+
+def _simulate_bracket(win_matrix, simulations, seed):
+    rng = np.random.default_rng(seed)
+    alliances = len(win_matrix)
+    rows = np.arange(simulations)
+    # Round each alliance is eliminated in; the champion is never eliminated
+    eliminated = np.full((simulations, alliances), STAGE_ROUNDS[-1])
+    winners = {}
+    losers = {}
+
+    def slot(source):
+        kind, value = source
+        if kind == "seed":
+            return np.full(simulations, value - 1)
+        return winners[value] if kind == "W" else losers[value]
+
+    for number, round_number, red_source, blue_source in BRACKET:
+        red, blue = slot(red_source), slot(blue_source)
+        red_wins = rng.random(simulations) < win_matrix[red, blue]
+        winners[number] = np.where(red_wins, red, blue)
+        losers[number] = np.where(red_wins, blue, red)
+        if number in ELIMINATING:
+            eliminated[rows, losers[number]] = round_number
+
+    red, blue = slot(FINALS[0]), slot(FINALS[1])
+    # First to FINALS_WINS wins the series; matches are independent
+    games = rng.random((2 * FINALS_WINS - 1, simulations)) < win_matrix[red, blue]
+    red_wins = games.sum(axis=0) >= FINALS_WINS
+    champions = np.where(red_wins, red, blue)
+    eliminated[rows, np.where(red_wins, blue, red)] = FINALS_ROUND
+
+    # An alliance is in a stage unless it was eliminated in an earlier round
+    reach_probs = np.stack(
+        [(eliminated >= stage_round).mean(axis=0) for stage_round in STAGE_ROUNDS],
+        axis=1,
+    )
+    return {
+        "reach_probs": reach_probs,
+        "win_probs": reach_probs[:, -1],
+        "champions": champions,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import picklist
+    import raw_data
+    import std as stdfun
+
+    parser = argparse.ArgumentParser(
+        description="Simulate the playoffs of eight alliances."
+    )
+    parser.add_argument(
+        "alliances",
+        nargs=8,
+        help="comma-separated team numbers of each alliance, first seed first",
+    )
+    parser.add_argument("--simulations", type=int, default=100000)
+    parser.add_argument("--event", default=raw_data.EVENT_KEY)
+    args = parser.parse_args()
+
+    store = stdfun.load_score_store(event=args.event)
+    strength = picklist.StrengthTable.from_engine(store.engine())
+    alliances = [alliance.split(",") for alliance in args.alliances]
+    means, variances = zip(*(strength.alliance(alliance) for alliance in alliances))
+    start = time.perf_counter()
+    result = simulate_bracket(alliance_win_matrix(means, variances), args.simulations)
+    print(
+        f"Simulated {args.simulations} playoffs in {time.perf_counter() - start:.2f}s"
+    )
+    for i, alliance in enumerate(alliances):
+        print(
+            f"A{i + 1} ({', '.join(alliance)}): finals {result['reach_probs'][i, -2]:.1%}, "
+            f"winner {result['win_probs'][i]:.1%}"
+        )
@@ -0,0 +1,268 @@
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+
+# Score rows of the columnar store, one .npy file per column:
+#   event, match_type, team: int codes into the lists in meta.json
+#   match_number, total: ints
+#   counts, points: (rows, components) per-component counts and points
+# Rows are sorted by event, match type, match number and team, so one event or one
+# match is a contiguous row range.
+# Each write goes to a new v-<version> directory inside the store, and the "current"
+# file names the directory readers use. Replacing that one file swaps the store.
+META_FILE = "meta.json"
+CURRENT_FILE = "current"
+VERSION_PREFIX = "v-"
+STRING_COLUMNS = ["event", "match_type", "team"]
+COLUMNS = STRING_COLUMNS + ["match_number", "total", "counts", "points"]
+
+
+def write_columnar(path, table, components=()):
+    """
+    Write score rows as a columnar store directory, replacing any previous store.
+    Args:
+        path (str): Directory of the store.
+        table (dict): Equal-length columns "event", "match_type", "team" (str),
+            "match_number" and "total" (int), and optionally "counts" and "points"
+            arrays of shape (rows, len(components)).
+        components (list of str): Names of the per-component columns, such as
+            scoring.CompiledRules.columns.
+    Returns:
+        str: The new store's version, a random id kept in meta.json.
+    """
+    rows = len(table["total"])
+    arrays = {}
+    version = uuid.uuid4().hex
+    meta = {"components": list(components), "rows": rows, "version": version}
+    for name in STRING_COLUMNS:
+        values, codes = np.unique(np.asarray(table[name], dtype=str), return_inverse=True)
+        meta[name] = values.tolist()
+        arrays[name] = codes.astype(np.int32).reshape(rows)
+    arrays["match_number"] = np.asarray(table["match_number"], dtype=np.int32).reshape(rows)
+    arrays["total"] = np.asarray(table["total"], dtype=np.int64).reshape(rows)
+    for name in ("counts", "points"):
+        values = table.get(name)
+        if values is None:
+            values = np.zeros((rows, len(components)), dtype=np.int64)
+        arrays[name] = np.asarray(values, dtype=np.int64).reshape(rows, len(components))
+
+    order = np.lexsort(
+        (arrays["team"], arrays["match_number"], arrays["match_type"], arrays["event"])
+    )
+    # Build the new version beside the current one and point the store at it, so
+    # readers see either the old or the new columns and the store never disappears
+    os.makedirs(path, exist_ok=True)
+    name = VERSION_PREFIX + version
+    tmp_path = tempfile.mkdtemp(dir=path, prefix=".columnar-")
+    for column, values in arrays.items():
+        np.save(os.path.join(tmp_path, f"{column}.npy"), values[order])
+    with open(os.path.join(tmp_path, META_FILE), "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(path, name))
+    previous = current_dir(path)
+    fd, tmp_pointer = tempfile.mkstemp(dir=path, prefix=".current-")
+    with os.fdopen(fd, "w") as f:
+        f.write(name)
+    os.replace(tmp_pointer, os.path.join(path, CURRENT_FILE))
+    _remove_old_versions(path, keep=(name, previous and os.path.basename(previous)))
+    return version
+
+
+def _remove_old_versions(path, keep):
+    # The previous version is kept for readers that resolved the pointer just before
+    # the swap; anything older is no longer reachable
+    for entry in os.listdir(path):
+        entry_path = os.path.join(path, entry)
+        if entry.startswith(VERSION_PREFIX) and entry not in keep:
+            shutil.rmtree(entry_path, ignore_errors=True)
+        elif entry.endswith(".npy") or entry == META_FILE:
+            # Columns of a store written before versions were kept in directories
+            os.remove(entry_path)
+
+
+def current_dir(path):
+    """
+    Get the directory holding a store's current columns.
+    Args:
+        path (str): Directory of the store.
+    Returns:
+        str: The current version's directory, or None if there is no store.
+    """
+    try:
+        with open(os.path.join(path, CURRENT_FILE), "r") as f:
+            return os.path.join(path, f.read())
+    except FileNotFoundError:
+        # Stores written before versions were kept in directories hold their columns
+        # at the top level
+        if os.path.exists(os.path.join(path, META_FILE)):
+            return path
+        return None
+
+
+def modified_ns(path):
+    """
+    Get the time a store was last written.
+    Args:
+        path (str): Directory of the store.
+    Returns:
+        int: Modification time of its current pointer in nanoseconds.
+    """
+    pointer = os.path.join(path, CURRENT_FILE)
+    if not os.path.exists(pointer):
+        pointer = os.path.join(path, META_FILE)
+    return os.stat(pointer).st_mtime_ns
+
+
+class ColumnarScores:
+    """
+    Read-only view of a columnar score store. Columns are memory-mapped on first
+    use, so only the columns and row ranges a reader touches are loaded.
+    """
+
+    def __init__(self, path):
+        self.path = current_dir(path)
+        if self.path is None:
+            raise FileNotFoundError(f"No columnar score store at {path}")
+        with open(os.path.join(self.path, META_FILE), "r") as f:
+            meta = json.load(f)
+        self.components = meta["components"]
+        self.events = meta["event"]
+        self.match_types = meta["match_type"]
+        self.teams = meta["team"]
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.column("total"))
+
+    def column(self, name):
+        """
+        Get one column as a memory-mapped array.
+        Args:
+            name (str): One of COLUMNS.
+        Returns:
+            numpy.ndarray: Read-only array over the column's file.
+        """
+        if name not in self._columns:
+            self._columns[name] = np.load(
+                os.path.join(self.path, f"{name}.npy"), mmap_mode="r"
+            )
+        return self._columns[name]
+
+    def event_rows(self, event=None):
+        """
+        Get the row range of one event.
+        Args:
+            event (str): Event key, or None for every row.
+        Returns:
+            slice: The event's rows; empty if the event is not in the store.
+        """
+        if event is None:
+            return slice(0, len(self))
+        if event not in self.events:
+            return slice(0, 0)
+        code = self.events.index(event)
+        events = self.column("event")
+        return slice(
+            int(np.searchsorted(events, code, side="left")),
+            int(np.searchsorted(events, code, side="right")),
+        )
+
+    def rows(self, event=None, columns=("match_type", "match_number", "team", "total")):
+        """
+        Read some columns of one event's rows, with string columns decoded.
+        Args:
+            event (str): Event key, or None for every row.
+            columns (tuple of str): Columns to read.
+        Returns:
+            dict: {column: list or array} for the selected rows.
+        """
+        rows = self.event_rows(event)
+        lookups = {
+            "event": self.events,
+            "match_type": self.match_types,
+            "team": self.teams,
+        }
+        result = {}
+        for name in columns:
+            values = self.column(name)[rows]
+            if name in lookups:
+                names = lookups[name]
+                values = [names[code] for code in values.tolist()]
+            result[name] = values
+        return result
+
+
+def store_version(path):
+    """
+    Get the version of a store, which changes every time the store is written.
+    Args:
+        path (str): Directory of the store.
+    Returns:
+        str: The version from meta.json, or None if there is no store.
+    """
+    directory = current_dir(path)
+    if directory is None:
+        return None
+    with open(os.path.join(directory, META_FILE), "r") as f:
+        return json.load(f).get("version")
+
+
+def read_table(path):
+    """
+    Read every row of a store back into the table layout used by write_columnar.
+    Args:
+        path (str): Directory of the store.
+    Returns:
+        tuple: (table, components), or (None, []) if there is no store yet.
+    """
+    if current_dir(path) is None:
+        return None, []
+    store = ColumnarScores(path)
+    table = store.rows(columns=COLUMNS)
+    table["counts"] = np.array(table["counts"])
+    table["points"] = np.array(table["points"])
+    return table, store.components
+
+
+def convert_json(json_path, path, event):
+    """
+    Convert a legacy {match_id: {team_number: score}} JSON file into a columnar store.
+    Per-component scores are not known for these rows.
+    Args:
+        json_path (str): Path of the JSON file, such as app/match_team_scores.json.
+        path (str): Directory of the columnar store to write.
+        event (str): Event key of the scores.
+    """
+    with open(json_path, "r") as f:
+        match_scores = json.load(f)
+    table = {name: [] for name in ["event", "match_type", "match_number", "team", "total"]}
+    for match_id, teams in match_scores.items():
+        parts = match_id.split("_")
+        if len(parts) != 2 or not parts[1].isdigit():
+            print(f"Invalid match_id：{match_id}")
+            continue
+        for team_number, score in teams.items():
+            table["event"].append(event)
+            table["match_type"].append(parts[0])
+            table["match_number"].append(int(parts[1]))
+            table["team"].append(team_number)
+            table["total"].append(score)
+    write_columnar(path, table)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Convert match_team_scores.json into a columnar score store."
+    )
+    parser.add_argument("json_path", nargs="?", default="app/match_team_scores.json")
+    parser.add_argument("path", nargs="?", default="app/match_team_scores")
+    parser.add_argument("--event", default="2025casd")
+    args = parser.parse_args()
+    convert_json(args.json_path, args.path, args.event)
+    print(f"Saved {args.path}")
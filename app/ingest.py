@@ -0,0 +1,107 @@
+import threading
+
+import raw_data
+import std as stdfun
+
+
+class ScoreIngestService:
+    """
+    Background ingest of scouting documents into an in-memory ScoreStore.
+    The change feed is anything with Firestore's on_snapshot(callback) interface,
+    normally the scouting collection itself. Each snapshot's changes are scored and
+    applied to the store as one update, which bumps the store's version.
+    """
+
+    def __init__(self, change_feed, score_document, store=None):
+        """
+        Args:
+            change_feed: Object with on_snapshot(callback), such as a Firestore
+                CollectionReference. The callback receives (docs, changes, read_time).
+            score_document (callable): Turns a scouting document dict into a score,
+                e.g. raw_data.calculate_team_score.
+            store (std.ScoreStore): Store to update; a new empty store by default.
+        """
+        self.change_feed = change_feed
+        self.score_document = score_document
+        self.store = store or stdfun.ScoreStore(source=f"live:{id(self)}")
+        self.errors = 0
+        self._watch = None
+        self._ready = threading.Event()
+
+    def start(self, timeout=None):
+        """
+        Start listening. The first snapshot holds every existing document.
+        Args:
+            timeout (float): Seconds to wait for the first snapshot; None waits forever.
+        Returns:
+            bool: True once the first snapshot has been applied.
+        """
+        if self._watch is None:
+            self._watch = self.change_feed.on_snapshot(self._on_snapshot)
+        return self._ready.wait(timeout)
+
+    def stop(self):
+        """Stop listening for changes."""
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _on_snapshot(self, docs, changes, read_time):
+        updates = []
+        try:
+            for change in changes:
+                doc_id = change.document.id
+                parsed = raw_data.parse_document_id(doc_id)
+                if parsed is None:
+                    continue
+                match_type, match_number, team_number = parsed
+                match_id = f"{match_type}_{match_number}"
+                if change.type.name == "REMOVED":
+                    updates.append((match_id, team_number, None))
+                    continue
+                try:
+                    score = self.score_document(change.document.to_dict())
+                except Exception as e:
+                    # One malformed scouting form must not stop the feed
+                    self.errors += 1
+                    print(f"Could not score {doc_id}: {e}")
+                    continue
+                updates.append((match_id, team_number, score))
+        finally:
+            # Whatever failed, the scores so far are applied and start() is released
+            try:
+                if updates:
+                    self.store.apply_scores(updates)
+            finally:
+                self._ready.set()
+
+
+def firestore_ingest_service(collection_path=None):
+    """
+    Create an ingest service listening to the Firestore scouting collection.
+    Args:
+        collection_path (str): Firestore collection path; defaults to raw_data.COLLECTION_PATH.
+    Returns:
+        ScoreIngestService: The service, not started yet.
+    """
+    collection = raw_data.get_db().collection(
+        collection_path or raw_data.COLLECTION_PATH
+    )
+    return ScoreIngestService(collection, raw_data.calculate_team_score)
+
+
+if __name__ == "__main__":
+    service = firestore_ingest_service()
+    service.start()
+    print(f"Loaded {len(service.store.matches)} matches, listening for changes.")
+    version = service.store.version
+    try:
+        while True:
+            if service.store.wait_for_update(version, timeout=1):
+                print(
+                    f"Version {service.store.version}: updated teams "
+                    f"{sorted(service.store.changed_teams(version))}"
+                )
+                version = service.store.version
+    except KeyboardInterrupt:
+        service.stop()
@@ -1,24 +1,125 @@
-import pandas as pd
+import bracket
+import functools
+import json
+import numpy as np
+import opr
 import predict_graph
+import profiling
+import raw_data
 import std as stdfun
 import streamlit as st
 import tba
-import predict
-import plotly.graph_objects as go
+import picklist
+import rankings
+
+
+@st.cache_resource
+def get_ingest_service(collection_path):
+    """Create the Firestore listener once per server process and collection."""
+    import ingest
+
+    return ingest.firestore_ingest_service(collection_path)
+
+
+# Each session keeps its own profiler, and its stage timings cover this rerun only
+if "profiler" not in st.session_state:
+    st.session_state.profiler = profiling.Profiler()
+if "fragment_profilers" not in st.session_state:
+    st.session_state.fragment_profilers = {}
+profiling.use(st.session_state.profiler)
+profiling.reset()
+
+
+def profiled_fragment(name):
+    """
+    Record every run of a fragment to its own profiler, reset at the start of the
+    run, since a fragment rerun does not run the top of the script.
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper():
+            profiler = st.session_state.fragment_profilers.setdefault(
+                name, profiling.Profiler()
+            )
+            profiler.reset()
+            with profiling.using(profiler):
+                return function()
+
+        return wrapper
+
+    return decorator
+
 
 # get data from tba.py and show with streamlit
 st.title("FRC Predict Viewer")
 
+live = st.sidebar.checkbox(
+    "Live scouting data",
+    value=False,
+    help="Follow Firestore directly instead of reading match_team_scores.json",
+)
+
+rating_mode = st.sidebar.selectbox(
+    "Team rating",
+    ["All matches", "Recent matches weighted more", "Last matches only"],
+    help="How a team's past scores are weighted for its average and spread",
+)
+rating = {}
+if rating_mode == "Recent matches weighted more":
+    rating["half_life"] = st.sidebar.number_input(
+        "Half-life (matches)", min_value=1.0, max_value=50.0, value=4.0
+    )
+elif rating_mode == "Last matches only":
+    rating["window"] = int(
+        st.sidebar.number_input("Matches per team", min_value=2, max_value=50, value=6)
+    )
+
 event_key = st.text_input("Enter Event Key", "2025casd")
 
 if not event_key:
     st.warning("Please enter a valid event key.")
     st.stop()
 
-data = tba.get_match_schedule(event_key=event_key)
+# The scouting collection holds a single event's documents
+if live and event_key != raw_data.EVENT_KEY:
+    st.warning(
+        f"Live scouting data only covers {raw_data.EVENT_KEY}; "
+        f"showing the score file for {event_key}."
+    )
+    live = False
+if live:
+    service = get_ingest_service(raw_data.COLLECTION_PATH)
+    # Returns at once after the first snapshot, so later reruns do not wait
+    if not service.start(timeout=30):
+        st.warning(
+            "Firestore has not sent the scouting data yet; predictions may be incomplete."
+        )
+    store = service.store
+else:
+    store = stdfun.load_score_store(event=event_key)
+# With live data, the accuracy graphs and the schedule refresh on their own this often
+# (seconds), and only predict the matches of teams with new scores again
+refresh = 1 if live else None
+
+with profiling.stage("main.tba_fetch"):
+    event = tba.get_event_data(event_key=event_key)
+fill_unscouted = st.sidebar.checkbox(
+    "Estimate unscouted teams from TBA scores",
+    value=False,
+    help="Teams without scouting data get their OPR from the event's results instead of 0",
+)
+
+# Team statistics for the schedule, rankings and pick list
+if fill_unscouted:
+    # Reused across reruns until the scores or the event change
+    engine = opr.filled_engine(store, event, rating)
+else:
+    engine = store.engine(**rating)
+
 # slider to choose match number (in simulation), only read firestore data before it to predict
 
-match_count = len(list(filter(lambda x: x["comp_level"] in ["qm"], data)))
+match_count = len(event)
 
 progress = st.slider(
     "Match Number",
@@ -41,137 +142,315 @@ use_practice_before = (
 )
 
 # show teamkeys with table
-if data:
+if event.total_matches:
     # tab to show plot
-    tabs = st.tabs(["Prediction Graphs", "Match Schedule"])
+    tabs = st.tabs(
+        [
+            "Prediction Graphs",
+            "Match Schedule",
+            "Rankings Projection",
+            "Pick List",
+            "Playoff Bracket",
+        ]
+    )
     with tabs[0]:
-        # Plot accuracy by progress
-        st.subheader("Prediction Accuracy by Match Progress")
-        # Generate accuracy data
-        accuracyData = predict_graph.accuracyByProgress(
-            data, use_practice_before=use_practice_before
-        )
+        # Loaded here so the title and sidebar render before these heavy imports
+        import pandas as pd
+        import plotly.graph_objects as go
 
-        # Prepare DataFrame
-        df = pd.DataFrame(list(accuracyData.items()), columns=["x", "y"])
-        df["y"] *= 100  # Convert to percentage
-        df.set_index("x", inplace=True)
+        @st.fragment(run_every=refresh)
+        @profiled_fragment("Accuracy")
+        def accuracy_graphs():
+            # Plot accuracy by progress
+            st.subheader("Prediction Accuracy by Match Progress")
+            # Generate accuracy data
+            with profiling.stage("main.accuracy"):
+                accuracyData = predict_graph.accuracyByProgress(
+                    event,
+                    use_practice_before=use_practice_before,
+                    store=store,
+                    rating=rating,
+                    fill_unscouted=fill_unscouted,
+                )
 
-        # Plotly version (optional)
-        fig_progress = go.Figure()
-        fig_progress.add_trace(
-            go.Scatter(x=df.index, y=df["y"], mode="lines+markers", name="Accuracy")
-        )
-        fig_progress.update_layout(
-            title=f"Accuracy by Match Progress \n(Using Practice Matches Before Qualification Matches {use_practice_before})",
-            xaxis_title="Match Number",
-            yaxis_title="Accuracy (%)",
-        )
-        st.plotly_chart(fig_progress, use_container_width=True)
+            # Prepare DataFrame
+            df = pd.DataFrame(list(accuracyData.items()), columns=["x", "y"])
+            df["y"] *= 100  # Convert to percentage
+            df.set_index("x", inplace=True)
 
-        st.subheader("Prediction Accuracy by Practice Matches")
+            # Plotly version (optional)
+            with profiling.stage("main.plotly"):
+                fig_progress = go.Figure()
+                fig_progress.add_trace(
+                    go.Scatter(
+                        x=df.index, y=df["y"], mode="lines+markers", name="Accuracy"
+                    )
+                )
+                fig_progress.update_layout(
+                    title=f"Accuracy by Match Progress \n(Using Practice Matches Before Qualification Matches {use_practice_before})",
+                    xaxis_title="Match Number",
+                    yaxis_title="Accuracy (%)",
+                )
+                st.plotly_chart(fig_progress, use_container_width=True)
 
-        # Generate practice accuracy data
-        accuracyPracticeData = predict_graph.accuracyByPracticeBefore(
-            data, progress=progress
-        )
+            st.subheader("Prediction Accuracy by Practice Matches")
 
-        # Prepare DataFrame
-        df_practice = pd.DataFrame(
-            list(accuracyPracticeData.items()), columns=["x", "y"]
-        )
-        df_practice["y"] *= 100  # Convert to percentage
-        df_practice.set_index("x", inplace=True)
-
-        # Plotly version (optional)
-        fig_practice = go.Figure()
-        fig_practice.add_trace(
-            go.Scatter(
-                x=df_practice.index,
-                y=df_practice["y"],
-                mode="lines+markers",
-                name="Accuracy",
+            # Generate practice accuracy data
+            with profiling.stage("main.accuracy"):
+                accuracyPracticeData = predict_graph.accuracyByPracticeBefore(
+                    event,
+                    progress=progress,
+                    store=store,
+                    rating=rating,
+                    fill_unscouted=fill_unscouted,
+                )
+
+            # Prepare DataFrame
+            df_practice = pd.DataFrame(
+                list(accuracyPracticeData.items()), columns=["x", "y"]
             )
-        )
-        fig_practice.update_layout(
-            title=f"Accuracy by Practice Matches used\n(Data before qualification matches {progress})",
-            xaxis_title="Practice Matches Used Before",
-            yaxis_title="Accuracy (%)",
-        )
-        st.plotly_chart(fig_practice, use_container_width=True)
-    with tabs[1]:
-        st.subheader(f"Match Schedule for {event_key}")
-        st.write(f"Total Matches: {len(data)}")
-        # Create a table to display match data
-        match_data = []
-        correct_predictions = 0
-        all_predictions = 0
-        data.sort(key=lambda x: (x["comp_level"], x["match_number"]))
-        data = list(filter(lambda x: x["comp_level"] in ["qm"], data))
-        for match in data:
-            # show 6 team keys by 2 alliances in table
-
-            # Ensure match has alliances and team keys
-            blue_alliance = match["alliances"]["blue"]["team_keys"]
-            red_alliance = match["alliances"]["red"]["team_keys"]
-
-            # remove 'frc' prefix
-
-            blue_alliance = [team.replace("frc", "") for team in blue_alliance]
-            red_alliance = [team.replace("frc", "") for team in red_alliance]
-            has_data = False
-            if int(match["match_number"]) <= progress:
-                predict_data = stdfun.calculate_team_stats(
-                    cutoff_q_number=int(match["match_number"]),
-                    use_practice_before=use_practice_before,
+            df_practice["y"] *= 100  # Convert to percentage
+            df_practice.set_index("x", inplace=True)
+
+            # Plotly version (optional)
+            with profiling.stage("main.plotly"):
+                fig_practice = go.Figure()
+                fig_practice.add_trace(
+                    go.Scatter(
+                        x=df_practice.index,
+                        y=df_practice["y"],
+                        mode="lines+markers",
+                        name="Accuracy",
+                    )
                 )
-                has_data = True
-            else:
-                predict_data = stdfun.calculate_team_stats(
-                    cutoff_q_number=progress, use_practice_before=use_practice_before
+                fig_practice.update_layout(
+                    title=f"Accuracy by Practice Matches used\n(Data before qualification matches {progress})",
+                    xaxis_title="Practice Matches Used Before",
+                    yaxis_title="Accuracy (%)",
                 )
-                has_data = False
-            predictWin = predict.alliance_win_prediction(
-                blue_alliance, red_alliance, predict_data
+                st.plotly_chart(fig_practice, use_container_width=True)
+
+        accuracy_graphs()
+    with tabs[1]:
+
+        @st.fragment(run_every=refresh)
+        @profiled_fragment("Schedule")
+        def schedule():
+            st.subheader(f"Match Schedule for {event_key}")
+            st.write(f"Total Matches: {event.total_matches}")
+            # Create a table to display match data
+            match_data = []
+            correct_predictions = 0
+            all_predictions = 0
+
+            # Version of the scores this run renders, and the teams updated since the
+            # session's last one
+            rendered_version = st.session_state.get("rendered_version")
+            scores_version = store.version
+            updated_teams = (
+                store.changed_teams(rendered_version) or set()
+                if live and rendered_version is not None
+                else set()
             )
-            match_info = {
-                "Match": f'{match["match_number"]}',
-                "Blue Alliance": ", ".join(match["alliances"]["blue"]["team_keys"]),
-                "Red Alliance": ", ".join(match["alliances"]["red"]["team_keys"]),
-                "Winning Alliance": (
-                    "🔵" if match.get("winning_alliance", "N/A") == "blue" else "🔴"
-                ),
-                "Predicted Winner": (
-                    "🔵"
-                    if predictWin["blue_win_prob"] > predictWin["red_win_prob"]
-                    else "🔴"
-                ),
-                "Pre Blue": f"{predictWin['blue_avg']:.1f}",
-                "Pre Red": f"{predictWin['red_avg']:.1f}",
-                # read data from tba
-                "Blue": match["alliances"]["blue"]["score"],
-                "Red": match["alliances"]["red"]["score"],
-                "Win Probability": f"{max(predictWin['blue_win_prob'],predictWin['red_win_prob']):.2%}",
-                "Correct Prediction": (
-                    "✅"
-                    if match.get("winning_alliance", "")
-                    == (
-                        "blue"
+            st.session_state["rendered_version"] = scores_version
+
+            # Predict the whole schedule at once: matches up to the slider use the data
+            # before them, later matches use the data before the slider.
+            with profiling.stage("main.schedule_prediction"):
+                predictions = predict_graph.schedule_prediction(
+                    event,
+                    progress,
+                    use_practice_before,
+                    store,
+                    rating=rating,
+                    fill_unscouted=fill_unscouted,
+                )
+            blue_keys = event.team_keys("blue")
+            red_keys = event.team_keys("red")
+            updated_matches = []
+            for i, match_number in enumerate(event.match_numbers.tolist()):
+                predictWin = {key: values[i] for key, values in predictions.items()}
+                winning_alliance = event.winners[i]
+                if updated_teams.intersection(
+                    team.replace("frc", "") for team in blue_keys[i] + red_keys[i]
+                ):
+                    updated_matches.append(f"{match_number}")
+                match_info = {
+                    "Match": f"{match_number}",
+                    "Blue Alliance": ", ".join(blue_keys[i]),
+                    "Red Alliance": ", ".join(red_keys[i]),
+                    "Winning Alliance": "🔵" if winning_alliance == "blue" else "🔴",
+                    "Predicted Winner": (
+                        "🔵"
                         if predictWin["blue_win_prob"] > predictWin["red_win_prob"]
-                        else "red"
-                    )
-                    else "❌"
+                        else "🔴"
+                    ),
+                    "Pre Blue": f"{predictWin['blue_avg']:.1f}",
+                    "Pre Red": f"{predictWin['red_avg']:.1f}",
+                    # read data from tba
+                    "Blue": event.blue_scores[i].item(),
+                    "Red": event.red_scores[i].item(),
+                    "Win Probability": f"{max(predictWin['blue_win_prob'],predictWin['red_win_prob']):.2%}",
+                    "Correct Prediction": (
+                        "✅"
+                        if winning_alliance
+                        == (
+                            "blue"
+                            if predictWin["blue_win_prob"] > predictWin["red_win_prob"]
+                            else "red"
+                        )
+                        else "❌"
+                    ),
+                }
+                if winning_alliance == (
+                    "blue"
+                    if predictWin["blue_win_prob"] > predictWin["red_win_prob"]
+                    else "red"
+                ):
+                    correct_predictions += 1
+                all_predictions += 1
+                match_data.append(match_info)
+            st.write(
+                f"Correct Predictions: {correct_predictions} / {all_predictions} ({(correct_predictions / all_predictions) * 100:.2f}%)"
+            )
+            if updated_teams:
+                st.caption(
+                    f"New scouting data for teams {', '.join(sorted(updated_teams))}, "
+                    f"playing in matches {', '.join(updated_matches)}"
+                )
+            with profiling.stage("main.schedule_table"):
+                st.table(match_data)
+
+        schedule()
+    with tabs[2]:
+        st.subheader("Projected Qualification Rankings")
+        st.write(
+            f"Matches from {progress} on are simulated with the data before match {progress}."
+        )
+        with profiling.stage("main.rankings"):
+            projection = rankings.project_rankings(
+                event,
+                engine,
+                cutoff_q_number=progress,
+                include_practice=progress <= use_practice_before,
+                simulations=10000,
+                seed=0,
+                cache_key=(
+                    event.cache_key(),
+                    store.cache_key(),
+                    tuple(sorted(rating.items())),
+                    fill_unscouted,
                 ),
+            )
+        ranking_data = [
+            {
+                "Team": f"frc{projection['teams'][i]}",
+                "Mean Seed": f"{projection['mean_seed'][i]:.1f}",
+                "Mean RP": f"{projection['mean_rp'][i]:.1f}",
+                "1st Seed": f"{projection['seed_probs'][i, 0]:.1%}",
+                f"Top {rankings.CAPTAINS}": f"{projection['captain_prob'][i]:.1%}",
             }
-            if match.get("winning_alliance", "") == (
-                "blue"
-                if predictWin["blue_win_prob"] > predictWin["red_win_prob"]
-                else "red"
-            ):
-                correct_predictions += 1
-            all_predictions += 1
-            match_data.append(match_info)
+            for i in np.argsort(projection["mean_seed"], kind="stable").tolist()
+        ]
+        st.table(ranking_data)
+    with tabs[3]:
+        st.subheader("Alliance Selection Pick List")
+        # Projected seeds order the captains of the projected draft
+        seed_order = [
+            projection["teams"][i]
+            for i in np.argsort(projection["mean_seed"], kind="stable").tolist()
+        ]
+        captain = st.selectbox("Captain", seed_order, key="picklist_captain")
+        with profiling.stage("main.picklist"):
+            strength = picklist.StrengthTable.from_engine(
+                engine, progress, progress <= use_practice_before
+            )
+            alliances = strength.project_alliances(seed_order, keep_captains=[captain])
+        opponents = [alliance for alliance in alliances if captain not in alliance]
         st.write(
-            f"Correct Predictions: {correct_predictions} / {all_predictions} ({(correct_predictions / all_predictions) * 100:.2f}%)"
+            "Projected opponents: "
+            + "; ".join(
+                f"A{i + 1} {', '.join(alliance)}"
+                for i, alliance in enumerate(alliances)
+                if captain not in alliance
+            )
         )
-        st.table(match_data)
+        pareto_only = st.checkbox("Only non-dominated pairs", value=False)
+        with profiling.stage("main.picklist"):
+            picks = strength.rank_partners(captain, opponents, prune=pareto_only)
+        pick_data = []
+        for row in picks[:30]:
+            pick_info = {
+                "Partners": " + ".join(f"frc{team}" for team in row["partners"]),
+                "Alliance Avg": f"{row['alliance_avg']:.1f} ± {row['alliance_std']:.1f}",
+                "Mean Win": f"{row['mean_win_prob']:.1%}",
+                "Worst Win": f"{row['worst_win_prob']:.1%}",
+            }
+            for alliance, win_prob in zip(opponents, row["win_probs"]):
+                pick_info[f"vs {alliance[0]}"] = f"{win_prob:.0%}"
+            pick_data.append(pick_info)
+        st.table(pick_data)
+    with tabs[4]:
+        st.subheader("Playoff Bracket Projection")
+        if len(alliances) < bracket.ALLIANCES:
+            st.info("Not enough teams with scouting data to project eight alliances.")
+        else:
+            st.write(
+                "Double-elimination playoffs of the projected alliances: the chance "
+                "each alliance is still in the playoffs at each stage."
+            )
+            with profiling.stage("main.bracket"):
+                alliance_stats = [strength.alliance(alliance) for alliance in alliances]
+                playoffs = bracket.simulate_bracket(
+                    bracket.alliance_win_matrix(
+                        [mean for mean, _ in alliance_stats],
+                        [variance for _, variance in alliance_stats],
+                    ),
+                    simulations=100000,
+                    seed=0,
+                )
+            bracket_data = []
+            for i, alliance in enumerate(alliances):
+                bracket_info = {
+                    "Alliance": f"A{i + 1}",
+                    "Teams": ", ".join(f"frc{team}" for team in alliance),
+                }
+                for stage, probability in zip(
+                    bracket.STAGES, playoffs["reach_probs"][i].tolist()
+                ):
+                    bracket_info[stage] = f"{probability:.1%}"
+                bracket_data.append(bracket_info)
+            st.table(bracket_data)
+
+if st.sidebar.checkbox(
+    "Show profiling",
+    value=False,
+    help="Time spent in each stage of this rerun, and cache hits and misses",
+):
+
+    def profile_table(profiler):
+        st.sidebar.table(
+            [
+                {
+                    "Stage": row["stage"],
+                    "Calls": row["calls"],
+                    "Time (ms)": f"{row['seconds'] * 1000:.1f}",
+                    "Cache hits": row["hits"],
+                    "Cache misses": row["misses"],
+                }
+                for row in profiler.stats()
+            ]
+        )
+
+    profile_table(profiling.current())
+    # Fragments record to their own profilers; each shows its run as of this rerun
+    for name, profiler in st.session_state.fragment_profilers.items():
+        st.sidebar.caption(f"{name} (last run)")
+        profile_table(profiler)
+    st.sidebar.download_button(
+        "Download trace",
+        json.dumps(profiling.trace()),
+        file_name="trace.json",
+        mime="application/json",
+        help="Open in chrome://tracing or ui.perfetto.dev",
+    )
@@ -0,0 +1,344 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import profiling
+
+# Weight, in alliances, of the prior variance against the residual variance. Until a
+# model has more alliances than teams the fit is exact and its residuals are about 0.
+PRIOR_ALLIANCES = 6
+# Filled engines by (event, score source, rating), least recently used first. Each
+# entry holds the score version it wraps, so a newer version replaces its entry.
+FILLED_CACHE_SIZE = 8
+_filled = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class OPRModel:
+    """
+    Offensive power ratings: each team's contribution to its alliances' scores,
+    solved by least squares over the sparse alliance x team incidence matrix.
+    Alliances are appended in O(1), and solve() warm-starts the iterative solver
+    from the previous solution, so refreshing after each new match takes a few
+    iterations instead of a new factorization. Teams from any number of events
+    share one model.
+    """
+
+    def __init__(self, components=("total",), damp=0.0):
+        """
+        Args:
+            components (tuple of str): Values to rate; "total" is the alliance score,
+                other names are read from the TBA score_breakdown, e.g. "autoPoints".
+            damp (float): Ridge damping of the least-squares solve.
+        """
+        self.components = tuple(components)
+        self.damp = damp
+        self.teams = []
+        self.team_index = {}
+        self._rows = []  # team index per incidence entry
+        self._columns = []
+        self._values = []  # one tuple of component values per alliance
+        self._solution = np.zeros((0, len(self.components)))
+        self._residuals = np.zeros((0, len(self.components)))
+        self._appearances = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._values)
+
+    def copy(self):
+        """
+        Returns:
+            OPRModel: An independent model with the same alliances.
+        """
+        model = OPRModel(self.components, self.damp)
+        model.teams = list(self.teams)
+        model.team_index = dict(self.team_index)
+        model._rows = list(self._rows)
+        model._columns = list(self._columns)
+        model._values = list(self._values)
+        model._solution = self._solution.copy()
+        model._residuals = self._residuals
+        model._appearances = self._appearances
+        return model
+
+    def add_alliance(self, teams, values):
+        """
+        Add one alliance result.
+        Args:
+            teams (list of str): Team numbers of the alliance.
+            values (tuple of float): One value per component.
+        """
+        row = len(self._values)
+        for team in teams:
+            if team not in self.team_index:
+                self.team_index[team] = len(self.teams)
+                self.teams.append(team)
+            self._rows.append(row)
+            self._columns.append(self.team_index[team])
+        self._values.append(tuple(values))
+
+    def add_tba_match(self, match):
+        """
+        Add both alliances of a played TBA match.
+        Args:
+            match (dict): A match from the TBA API.
+        Returns:
+            bool: False if the match is not played or lacks a component.
+        """
+        alliances = []
+        for alliance in ("blue", "red"):
+            data = match["alliances"][alliance]
+            if data["score"] is None or data["score"] < 0:
+                return False
+            breakdown = (match.get("score_breakdown") or {}).get(alliance, {})
+            values = []
+            for component in self.components:
+                value = (
+                    data["score"] if component == "total" else breakdown.get(component)
+                )
+                if not isinstance(value, (int, float)):
+                    return False
+                values.append(value)
+            teams = [team.replace("frc", "") for team in data["team_keys"]]
+            alliances.append((teams, values))
+        for teams, values in alliances:
+            self.add_alliance(teams, values)
+        return True
+
+    def solve(self):
+        """
+        Solve for every team's contribution to each component.
+        Returns:
+            numpy.ndarray: Array of shape (teams, components) aligned with self.teams.
+        """
+        if not self._values:
+            return np.zeros((0, len(self.components)))
+        # scipy.sparse takes about half a second to import; only solving needs it
+        from scipy import sparse
+        from scipy.sparse.linalg import lsqr
+
+        matrix = sparse.csr_matrix(
+            (np.ones(len(self._rows)), (self._rows, self._columns)),
+            shape=(len(self._values), len(self.teams)),
+        )
+        values = np.array(self._values, dtype=float)
+        # Teams added since the last solve start from 0
+        start = np.zeros((len(self.teams), len(self.components)))
+        start[: len(self._solution)] = self._solution
+        solution = np.column_stack(
+            [
+                lsqr(
+                    matrix,
+                    values[:, k],
+                    damp=self.damp,
+                    x0=start[:, k],
+                    atol=1e-10,
+                    btol=1e-10,
+                )[0]
+                for k in range(len(self.components))
+            ]
+        )
+        self._solution = solution
+        self._residuals = values - matrix @ solution
+        self._appearances = np.bincount(self._columns, minlength=len(self.teams))
+        return solution
+
+    def team_arrays(self, component=0):
+        """
+        Get the last solve() as per-team score estimates.
+        Args:
+            component (int): Index into self.components.
+        Returns:
+            tuple: (appearances, contribution, std_dev) arrays aligned with self.teams.
+            std_dev spreads the alliances' residual variance evenly over 3 teams. The
+            residual variance is taken over the degrees of freedom the fit leaves and
+            pooled with the variance of the alliance values themselves, so it does not
+            collapse to 0 while there are about as many alliances as teams.
+        """
+        if not len(self._solution):
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        residuals = self._residuals[:, component]
+        values = np.array(self._values[: len(residuals)], dtype=float)[:, component]
+        freedom = max(len(residuals) - np.count_nonzero(self._appearances), 0)
+        residual_variance = (
+            np.sum(residuals**2) + PRIOR_ALLIANCES * np.var(values)
+        ) / (freedom + PRIOR_ALLIANCES)
+        std_dev = math.sqrt(residual_variance / 3)
+        return (
+            self._appearances,
+            self._solution[:, component],
+            np.full(len(self.teams), std_dev),
+        )
+
+
+def history_model(event_keys, components=("total",), client=None):
+    """
+    Build an OPR model from every played match of several events.
+    Args:
+        event_keys (list of str): Events to include, e.g. tba.get_event_keys(2025).
+        components (tuple of str): See OPRModel.
+        client (tba.TBAClient): Client to fetch with; defaults to the shared client.
+    Returns:
+        OPRModel: The solved model.
+    """
+    import tba
+
+    model = OPRModel(components)
+    events = tba.fetch_events(event_keys, endpoints=("matches",), client=client)
+    for event_key in event_keys:
+        for match in events[event_key]["matches"] or []:
+            model.add_tba_match(match)
+    model.solve()
+    return model
+
+
+class OPRFilledEngine:
+    """
+    Wraps a statistics engine (std.TeamStatsEngine or ratings.RatingEngine) and
+    gives teams without scouting data their OPR from the event's qualification
+    results before the cutoff, plus any prior matches, instead of an average of 0.
+    """
+
+    def __init__(self, engine, event, prior=None):
+        """
+        Args:
+            engine: Engine with teams, team_index and arrays(cutoff, include_practice).
+            event (tba.EventData): The event whose results feed the OPR.
+            prior (OPRModel): Matches of earlier events to start from; not modified.
+        """
+        self.engine = engine
+        self.event = event
+        self.teams = list(engine.teams) + [
+            team for team in event.teams if team not in engine.team_index
+        ]
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self._prior = prior
+        self._oprs = {}  # cutoff -> (appearances, opr, std_dev) aligned with self.teams
+
+    def with_engine(self, engine):
+        """
+        Wrap another engine for the same event, e.g. after the scores changed.
+        Args:
+            engine: The new engine to wrap.
+        Returns:
+            OPRFilledEngine: The wrapper; it keeps the OPRs solved so far when the
+            team list is unchanged, since they only depend on the event's results.
+        """
+        filled = OPRFilledEngine(engine, self.event, self._prior)
+        if filled.teams == self.teams:
+            filled._oprs = dict(self._oprs)
+        return filled
+
+    def _opr_arrays(self, cutoffs):
+        missing = sorted({cutoff for cutoff in cutoffs if cutoff not in self._oprs})
+        if not missing:
+            return
+        model = self._prior.copy() if self._prior is not None else OPRModel()
+        played = np.flatnonzero(self.event.blue_scores >= 0)
+        order = played[np.argsort(self.event.match_numbers[played], kind="stable")]
+        added = 0
+        # Cutoffs are visited in order, so each one only adds the matches since the last
+        for cutoff in missing:
+            while (
+                added < len(order) and self.event.match_numbers[order[added]] < cutoff
+            ):
+                i = order[added]
+                for teams, scores in (
+                    (self.event.blue_teams, self.event.blue_scores),
+                    (self.event.red_teams, self.event.red_scores),
+                ):
+                    model.add_alliance(
+                        [self.event.teams[t] for t in teams[i].tolist()],
+                        (scores[i].item(),),
+                    )
+                added += 1
+            model.solve()
+            appearances, opr, std_dev = model.team_arrays()
+            result = np.zeros((3, len(self.teams)))
+            for i, team in enumerate(model.teams):
+                position = self.team_index.get(team)
+                if position is not None:
+                    result[:, position] = (appearances[i], opr[i], std_dev[i])
+            self._oprs[cutoff] = result
+
+    def arrays(self, cutoff_q_number, include_practice):
+        """
+        Get each team's count, mean and standard deviation, with the same arguments
+        and shapes as the wrapped engine. Teams without scouting data get their OPR,
+        and their count is the number of alliances the OPR is based on.
+        """
+        count, mean, std_dev = self.engine.arrays(cutoff_q_number, include_practice)
+        extra = len(self.teams) - count.shape[-1]
+        pad = [(0, 0)] * (count.ndim - 1) + [(0, extra)]
+        count, mean, std_dev = (
+            np.pad(values, pad) for values in (count, mean, std_dev)
+        )
+
+        cutoffs = np.asarray(cutoff_q_number, dtype=float)
+        self._opr_arrays(cutoffs.ravel().tolist())
+        filled = np.stack([self._oprs[cutoff] for cutoff in cutoffs.ravel().tolist()])
+        filled = filled.reshape(cutoffs.shape + (3, len(self.teams)))
+        filled = np.moveaxis(filled, -2, 0)
+        unscouted = count == 0
+        return (
+            np.where(unscouted, filled[0], count),
+            np.where(unscouted, filled[1], mean),
+            np.where(unscouted, filled[2], std_dev),
+        )
+
+    def team_stats(self, cutoff_q_number, include_practice):
+        """
+        Get team statistics for a cutoff in the calculate_team_stats format.
+        Returns:
+            dict: {team_number: {"average": float, "std_dev": float}} for teams with
+            scouting data or an OPR.
+        """
+        count, mean, std_dev = self.arrays(cutoff_q_number, include_practice)
+        return {
+            self.teams[i]: {"average": mean[i].item(), "std_dev": std_dev[i].item()}
+            for i in np.flatnonzero(count).tolist()
+        }
+
+
+def filled_engine(store, event, rating=None):
+    """
+    Get a store's engine wrapped in an OPRFilledEngine, reused while the scores and
+    the event are unchanged, so the OPRs are only solved once per cutoff.
+    Args:
+        store (std.ScoreStore): The scouting scores.
+        event (tba.EventData): The event whose results feed the OPR.
+        rating (dict): Keyword arguments of ScoreStore.engine, e.g. {"half_life": 6}.
+    Returns:
+        OPRFilledEngine: The wrapped engine.
+    """
+    rating = rating or {}
+    key = (event.cache_key(), store.source, tuple(sorted(rating.items())))
+    version = store.version
+    with _cache_lock:
+        entry = _filled.get(key)
+        if entry is not None:
+            _filled.move_to_end(key)
+    hit = entry is not None and entry[0] == version
+    profiling.cache("opr.filled_engine", hit)
+    if hit:
+        return entry[1]
+
+    engine = store.engine(**rating)
+    if entry is not None:
+        filled = entry[1].with_engine(engine)
+    else:
+        filled = OPRFilledEngine(engine, event)
+    with _cache_lock:
+        _filled[key] = (version, filled)
+        _filled.move_to_end(key)
+        while len(_filled) > FILLED_CACHE_SIZE:
+            _filled.popitem(last=False)
+    return filled
+
+
+def clear_cache():
+    """Forget every cached filled engine."""
+    with _cache_lock:
+        _filled.clear()
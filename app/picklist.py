@@ -0,0 +1,207 @@
+import math
+
+import numpy as np
+
+import predict
+
+# Alliance selection: 8 captains, round 1 picks in seed order, round 2 in reverse
+CAPTAINS = 8
+
+
+class StrengthTable:
+    """
+    Team score means and variances, with every pair's alliance mean and variance
+    precomputed, so all alliances of a captain are one row lookup. Uses the same
+    model as predict.alliance_win_prediction: alliance means and variances add up.
+    """
+
+    def __init__(self, teams, means, std_devs):
+        """
+        Args:
+            teams (list of str): Team numbers.
+            means (numpy.ndarray): Average score of each team.
+            std_devs (numpy.ndarray): Score standard deviation of each team.
+        """
+        self.teams = list(teams)
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.means = np.asarray(means, dtype=float)
+        self.variances = np.asarray(std_devs, dtype=float) ** 2
+        self.pair_means = self.means[:, None] + self.means[None, :]
+        self.pair_variances = self.variances[:, None] + self.variances[None, :]
+
+    @classmethod
+    def from_engine(cls, engine, cutoff_q_number=math.inf, include_practice=True):
+        """
+        Args:
+            engine (std.TeamStatsEngine): Team statistics, e.g. ScoreStore.engine().
+            cutoff_q_number (int): Only qualification matches before this number are used.
+            include_practice (bool): Whether practice matches are used.
+        Returns:
+            StrengthTable: The teams with data before the cutoff.
+        """
+        count, means, std_devs = engine.arrays(cutoff_q_number, include_practice)
+        has_data = count > 0
+        teams = [team for team, keep in zip(engine.teams, has_data.tolist()) if keep]
+        return cls(teams, means[has_data], std_devs[has_data])
+
+    def alliance(self, teams):
+        """
+        Args:
+            teams (list of str): Team numbers; teams without data count as 0.
+        Returns:
+            tuple: (mean, variance) of the alliance's score.
+        """
+        indices = [self.team_index[team] for team in teams if team in self.team_index]
+        return self.means[indices].sum(), self.variances[indices].sum()
+
+    def project_alliances(
+        self, seed_order, captains=CAPTAINS, exclude=(), keep_captains=()
+    ):
+        """
+        Project alliance selection as a greedy draft: each captain is the highest
+        seeded team not yet picked, and every pick is the available team with the
+        highest average score.
+        Args:
+            seed_order (list of str): Team numbers from first seed down.
+            captains (int): Number of alliances.
+            exclude (iterable of str): Teams that will not be picked, e.g. declined.
+            keep_captains (iterable of str): Teams that are never picked by another
+                captain, such as our own captain.
+        Returns:
+            list: One [captain, first pick, second pick] list per alliance, in seed order.
+        """
+        taken = set(exclude)
+        by_strength = [
+            self.teams[i]
+            for i in np.argsort(-self.means, kind="stable")
+            if self.teams[i] not in keep_captains
+        ]
+
+        def best_available():
+            for team in by_strength:
+                if team not in taken:
+                    taken.add(team)
+                    return team
+            return None
+
+        alliances = []
+        for _ in range(captains):
+            captain = next((team for team in seed_order if team not in taken), None)
+            if captain is None:
+                break
+            taken.add(captain)
+            alliances.append([captain, best_available()])
+        for alliance in reversed(alliances):
+            alliance.append(best_available())
+        return [
+            [team for team in alliance if team is not None] for alliance in alliances
+        ]
+
+    def rank_partners(self, captain, opponents, available=None, prune=True):
+        """
+        Score every pair of partners for a captain against each opposing alliance.
+        Args:
+            captain (str): Our captain's team number.
+            opponents (list of list of str): Opposing alliances, e.g. the other
+                alliances of project_alliances.
+            available (iterable of str): Teams that can be picked; defaults to every
+                team not in an opposing alliance.
+            prune (bool): Drop pairs whose win probabilities are beaten or matched
+                against every opponent by another pair.
+        Returns:
+            list: Dicts with "partners", "alliance_avg", "alliance_std", "win_probs"
+            (one per opponent), "mean_win_prob" and "worst_win_prob", best first.
+        """
+        if available is None:
+            unavailable = {team for alliance in opponents for team in alliance}
+            available = [team for team in self.teams if team not in unavailable]
+        candidates = np.array(
+            [
+                self.team_index[team]
+                for team in available
+                if team in self.team_index and team != captain
+            ],
+            dtype=np.intp,
+        )
+        first, second = np.triu_indices(len(candidates), k=1)
+        first, second = candidates[first], candidates[second]
+        captain_mean, captain_variance = self.alliance([captain])
+        means = captain_mean + self.pair_means[first, second]
+        variances = captain_variance + self.pair_variances[first, second]
+
+        opponent_stats = np.array([self.alliance(alliance) for alliance in opponents])
+        opponent_stats = opponent_stats.reshape(-1, 2)
+        win_probs = predict.win_probability(
+            means[:, None] - opponent_stats[None, :, 0],
+            np.sqrt(variances[:, None] + opponent_stats[None, :, 1]),
+        )
+
+        mean_win_prob = win_probs.mean(axis=1) if len(opponents) else means
+        order = np.argsort(-mean_win_prob, kind="stable")
+        if prune:
+            order = order[~_dominated(win_probs[order])]
+
+        ranked = []
+        for i in order.tolist():
+            ranked.append(
+                {
+                    "partners": (self.teams[first[i]], self.teams[second[i]]),
+                    "alliance_avg": means[i].item(),
+                    "alliance_std": math.sqrt(variances[i]),
+                    "win_probs": win_probs[i].tolist(),
+                    "mean_win_prob": (
+                        win_probs[i].mean().item() if len(opponents) else 1.0
+                    ),
+                    "worst_win_prob": (
+                        win_probs[i].min().item() if len(opponents) else 1.0
+                    ),
+                }
+            )
+        return ranked
+
+
+def _dominated(win_probs, block=256):
+    """
+    Find rows that another row matches or beats in every column and beats in at
+    least one. Rows must be sorted by mean descending: a dominating row has a strictly
+    higher mean, so only earlier rows can dominate a row.
+    Returns:
+        numpy.ndarray: Boolean array, True for dominated rows.
+    """
+    dominated = np.zeros(len(win_probs), dtype=bool)
+    for start in range(0, len(win_probs), block):
+        rows = win_probs[start : start + block]
+        others = win_probs[: start + len(rows)]
+        at_least = (others[None, :, :] >= rows[:, None, :]).all(axis=2)
+        better = (others[None, :, :] > rows[:, None, :]).any(axis=2)
+        dominated[start : start + len(rows)] = (at_least & better).any(axis=1)
+    return dominated
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import raw_data
+    import std as stdfun
+
+    parser = argparse.ArgumentParser(description="Rank partner pairs for a captain.")
+    parser.add_argument("captain")
+    parser.add_argument(
+        "seed_order", nargs="+", help="team numbers from first seed down"
+    )
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--event", default=raw_data.EVENT_KEY)
+    args = parser.parse_args()
+
+    store = stdfun.load_score_store(event=args.event)
+    table = StrengthTable.from_engine(store.engine())
+    alliances = table.project_alliances(args.seed_order)
+    opponents = [alliance for alliance in alliances if args.captain not in alliance]
+    for alliance in alliances:
+        print("Projected alliance:", ", ".join(alliance))
+    for row in table.rank_partners(args.captain, opponents)[: args.top]:
+        print(
+            f"{' + '.join(row['partners']):>12}: "
+            f"{row['alliance_avg']:.1f} ± {row['alliance_std']:.1f}, "
+            f"mean {row['mean_win_prob']:.1%}, worst {row['worst_win_prob']:.1%}"
+        )
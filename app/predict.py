@@ -1,5 +1,6 @@
-from scipy.stats import norm
+import numpy as np
 import math
+import profiling
 
 
 def predict_win_probability(blue_avg, blue_std, red_avg, red_std):
@@ -18,9 +19,34 @@ def predict_win_probability(blue_avg, blue_std, red_avg, red_std):
         return 1.0 if blue_avg > red_avg else 0.0 if blue_avg < red_avg else 0.5
     combined_std = math.sqrt(blue_std**2 + red_std**2)
     z_score = (blue_avg - red_avg) / combined_std
-    return norm.cdf(z_score)
+    # Normal CDF; math.erfc avoids loading scipy.stats for one value and stays
+    # accurate far in the lower tail
+    return 0.5 * math.erfc(-z_score / math.sqrt(2))
 
 
+def win_probability(difference, combined_std):
+    """
+    Vectorized predict_win_probability: the normal CDF of the score difference over
+    its standard deviation, broadcasting like any numpy operation.
+    Args:
+        difference (numpy.ndarray): Average score of one alliance minus the other's.
+        combined_std (numpy.ndarray): Standard deviation of the difference.
+    Returns:
+        numpy.ndarray: Probability that the first alliance wins. Where both alliances
+        are certain (combined_std is 0) it is 1, 0 or 0.5 for a tie, as in
+        predict_win_probability.
+    """
+    # scipy.special takes a few hundred ms to import, so it is loaded on first use
+    from scipy.special import ndtr
+
+    difference = np.asarray(difference, dtype=float)
+    combined_std = np.asarray(combined_std, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_prob = ndtr(difference / combined_std)
+    return np.where(combined_std == 0, np.sign(difference) * 0.5 + 0.5, win_prob)
+
+
+@profiling.timed("predict.alliance_win_prediction")
 def alliance_win_prediction(blue_teams, red_teams, stats):
     """#in english
     Calculate the win probability for an alliance based on team statistics.
@@ -57,6 +83,74 @@ def alliance_win_prediction(blue_teams, red_teams, stats):
     }
 
 
+def alliance_indices(alliances, team_index):
+    """
+    Convert alliances of team numbers into an index array for batch_win_prediction.
+    Args:
+        alliances (list of list of str): One list of team numbers per match.
+        team_index (dict): Maps team number to its position in the stats arrays.
+    Returns:
+        numpy.ndarray: Integer array of shape (matches, teams per alliance). Teams
+        without statistics are -1.
+    """
+    indices = [[team_index.get(team, -1) for team in teams] for teams in alliances]
+    if not indices:
+        return np.empty((0, 3), dtype=np.intp)
+    return np.array(indices, dtype=np.intp)
+
+
+@profiling.timed("predict.batch_win_prediction")
+def batch_win_prediction(blue_teams, red_teams, means, std_devs, rows=None):
+    """
+    Calculate win probabilities for many matches at once.
+    Same model as alliance_win_prediction: alliance averages add up, variances add up,
+    and the blue win probability is the normal CDF of the score difference.
+    Args:
+        blue_teams (numpy.ndarray): Team indices of shape (matches, 3); -1 means no statistics.
+        red_teams (numpy.ndarray): Team indices of shape (matches, 3); -1 means no statistics.
+        means (numpy.ndarray): Team averages of shape (teams,), or (matches, teams) to use
+            different statistics for each match.
+        std_devs (numpy.ndarray): Team standard deviations with the same shape as means.
+        rows (numpy.ndarray): Row of means and std_devs to use for each match when they
+            are 2-D; None uses row i for match i.
+    Returns:
+        dict: The alliance_win_prediction keys, each holding an array of shape (matches,).
+    """
+    # Teams without statistics index the appended zero column, like stats.get(team, {}).
+    means = np.asarray(means, dtype=float)
+    std_devs = np.asarray(std_devs, dtype=float)
+    pad = [(0, 0)] * (means.ndim - 1) + [(0, 1)]
+    means = np.pad(means, pad)
+    std_devs = np.pad(std_devs, pad)
+
+    if rows is None:
+        rows = np.arange(len(blue_teams))
+    rows = np.asarray(rows)[:, None]
+
+    def gather(values, teams):
+        if values.ndim == 1:
+            return values[teams]
+        return values[rows, teams]
+
+    blue_avg = gather(means, blue_teams).sum(axis=1)
+    blue_std = np.sqrt((gather(std_devs, blue_teams) ** 2).sum(axis=1))
+    red_avg = gather(means, red_teams).sum(axis=1)
+    red_std = np.sqrt((gather(std_devs, red_teams) ** 2).sum(axis=1))
+
+    blue_win_prob = win_probability(
+        blue_avg - red_avg, np.sqrt(blue_std**2 + red_std**2)
+    )
+
+    return {
+        "blue_avg": blue_avg,
+        "blue_std": blue_std,
+        "red_avg": red_avg,
+        "red_std": red_std,
+        "blue_win_prob": blue_win_prob,
+        "red_win_prob": 1 - blue_win_prob,
+    }
+
+
 if __name__ == "__main__":
     from std import calculate_team_stats
 
@@ -1,119 +1,323 @@
 import math
-import streamlit as st
+import threading
+from collections import OrderedDict
+import numpy as np
+import opr
+import profiling
 import predict
 import std as stdfun
 import tba
 
+# Accuracy grids and schedule predictions by (event, score source, engine options),
+# least recently used first. Each entry holds the score version it was computed for,
+# so a newer version of a live store replaces its entry instead of adding one.
+# A plain dict rather than st.cache_data keeps Streamlit out of CLI tools and workers.
+GRID_CACHE_SIZE = 32
+_grids = OrderedDict()
+_schedules = OrderedDict()
+_cache_lock = threading.Lock()
 
-@st.cache_data()
-def accuracyByProgress(tba_data,use_practice_before=math.inf):
+
+def _cache_get(cache, key):
+    with _cache_lock:
+        entry = cache.get(key)
+        if entry is not None:
+            cache.move_to_end(key)
+        return entry
+
+
+def _cache_put(cache, key, entry):
+    with _cache_lock:
+        cache[key] = entry
+        cache.move_to_end(key)
+        while len(cache) > GRID_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _engine(event, store, rating, fill_unscouted):
+    if fill_unscouted:
+        return opr.filled_engine(store, event, rating)
+    return store.engine(**rating)
+
+
+def affected_matches(event, store, since_version):
+    """
+    Find the matches whose predictions may have changed since a score version.
+    Args:
+        event (tba.EventData): The event's qualification matches.
+        store (std.ScoreStore): The scores.
+        since_version: A version previously read from the store.
+    Returns:
+        numpy.ndarray: Boolean array of shape (matches,), True for matches with a
+        team whose scores changed; None if the store cannot tell, e.g. after a reload.
+    """
+    changed = store.changed_teams(since_version)
+    if changed is None:
+        return None
+    changed_teams = np.array([team in changed for team in event.teams], dtype=bool)
+    if not len(changed_teams):
+        return np.zeros(len(event), dtype=bool)
+    return changed_teams[event.blue_teams].any(axis=1) | changed_teams[
+        event.red_teams
+    ].any(axis=1)
+
+
+@profiling.timed("predict_graph.correctness_by_cutoff")
+def correctness_by_cutoff(event, engine, cutoffs, include_practice, matches=None):
+    """
+    Check every match's prediction against its result for each cutoff.
+    Args:
+        event (tba.EventData): The event's qualification matches.
+        engine (std.TeamStatsEngine): Statistics engine for the score data.
+        cutoffs (numpy.ndarray): Qualification cutoffs to predict with.
+        include_practice (bool or numpy.ndarray): Whether practice matches are used, per cutoff.
+        matches (numpy.ndarray): Positions of the matches to check; None checks all.
+    Returns:
+        numpy.ndarray: Boolean array of shape (cutoffs, matches), True where the
+        prediction made with that cutoff's statistics picked the winning alliance.
+    """
+    cutoffs = np.asarray(cutoffs)
+    include_practice = np.broadcast_to(include_practice, cutoffs.shape)
+    blue_teams, red_teams = event.alliance_indices(engine.team_index)
+    winners = np.array(event.winners, dtype=str)
+    if matches is not None:
+        blue_teams, red_teams = blue_teams[matches], red_teams[matches]
+        winners = winners[matches]
+
+    # One statistics row per cutoff; each (cutoff, match) pair only picks its row
+    match_count = len(blue_teams)
+    _, means, std_devs = engine.arrays(cutoffs, include_practice)
+    predictWin = predict.batch_win_prediction(
+        np.tile(blue_teams, (len(cutoffs), 1)),
+        np.tile(red_teams, (len(cutoffs), 1)),
+        means,
+        std_devs,
+        rows=np.repeat(np.arange(len(cutoffs)), match_count),
+    )
+    predicted_blue = (predictWin["blue_win_prob"] > predictWin["red_win_prob"]).reshape(
+        len(cutoffs), match_count
+    )
+    return np.where(predicted_blue, winners == "blue", winners == "red")
+
+
+def accuracyGrid(event, store=None, rating=None, fill_unscouted=False):
+    """
+    Calculate the prediction accuracy for every progress and practice cutoff.
+    The practice cutoff only decides whether practice matches are included for a
+    given qualification cutoff, so each match is predicted once per cutoff with and
+    once without practice data, and the whole grid is assembled from those two
+    correctness matrices. The matrices are cached per event and score source; when
+    the store's scores change, only the matches of the changed teams are predicted
+    again.
+    Args:
+        event (tba.EventData): The event's qualification matches.
+        store (std.ScoreStore): Scores to predict with; defaults to the score file.
+        rating (dict): Keyword arguments of store.engine, e.g. {"half_life": 6};
+            None weights every match equally.
+        fill_unscouted (bool): Give teams without scouting data their OPR from the
+            event's results before each cutoff (see opr.OPRFilledEngine).
+    Returns:
+        numpy.ndarray: Accuracy of shape (match_count + 1, match_count + 1), indexed as
+        grid[use_practice_before, progress]. Row 0 uses no practice matches and
+        column 0 is NaN.
+    """
+    store = store or stdfun.load_score_store(event=event.event_key)
+    rating = rating or {}
+    # The engine itself is not hashed; the score source and options identify it
+    key = (
+        event.cache_key(),
+        store.source,
+        tuple(sorted(rating.items())),
+        fill_unscouted,
+    )
+    with profiling.stage("predict_graph.accuracyGrid"):
+        version = store.version
+        entry = _cache_get(_grids, key)
+        hit = entry is not None and entry[0] == version
+        profiling.cache("predict_graph.accuracyGrid", hit)
+        if hit:
+            return entry[1]
+
+        engine = _engine(event, store, rating, fill_unscouted)
+        cutoffs = np.arange(1, len(event) + 1)
+        affected = None if entry is None else affected_matches(event, store, entry[0])
+        if affected is None:
+            with_practice = correctness_by_cutoff(event, engine, cutoffs, True)
+            without_practice = correctness_by_cutoff(event, engine, cutoffs, False)
+        else:
+            with_practice, without_practice = entry[2].copy(), entry[3].copy()
+            matches = np.flatnonzero(affected)
+            if len(matches):
+                with_practice[:, matches] = correctness_by_cutoff(
+                    event, engine, cutoffs, True, matches
+                )
+                without_practice[:, matches] = correctness_by_cutoff(
+                    event, engine, cutoffs, False, matches
+                )
+        grid = _accuracy_grid(event, with_practice, without_practice)
+        # Shared between callers, so nobody may modify it
+        grid.setflags(write=False)
+        _cache_put(_grids, key, (version, grid, with_practice, without_practice))
+    return grid
+
+
+def clear_cache():
+    """Forget every cached accuracy grid and schedule prediction."""
+    with _cache_lock:
+        _grids.clear()
+        _schedules.clear()
+
+
+def _accuracy_grid(event, with_practice, without_practice):
+    match_count = len(event)
+    grid = np.full((match_count + 1, match_count + 1), np.nan)
+    if match_count == 0:
+        return grid
+
+    cutoffs = np.arange(1, match_count + 1)
+    # Cutoff used for each (progress, match) pair
+    used_cutoffs = np.minimum(event.match_numbers[None, :], cutoffs[:, None])
+    columns = np.arange(match_count)
+    correct_with = with_practice[used_cutoffs - 1, columns]
+    correct_without = without_practice[used_cutoffs - 1, columns]
+
+    # Practice data is used when the cutoff is <= use_practice_before, so the gain from
+    # practice data accumulates over cutoffs: gain[progress, u] sums the cutoffs <= u.
+    gain = np.zeros((match_count, match_count + 1))
+    np.add.at(
+        gain,
+        (np.repeat(cutoffs - 1, match_count), used_cutoffs.ravel()),
+        (correct_with.astype(int) - correct_without.astype(int)).ravel(),
+    )
+    correct_predictions = correct_without.sum(axis=1)[:, None] + np.cumsum(gain, axis=1)
+    grid[:, 1:] = (correct_predictions / match_count).T
+    return grid
+
+
+@profiling.timed("predict_graph.schedule_prediction")
+def schedule_prediction(
+    event, progress, use_practice_before, store, rating=None, fill_unscouted=False
+):
+    """
+    Predict every match of the schedule: matches up to the progress match use the data
+    before them, later matches use the data before the progress match. Predictions
+    are cached per event, score source and settings; when the store's scores change,
+    only the matches of the changed teams are predicted again.
+    Args:
+        event (tba.EventData): The event's qualification matches.
+        progress (int): The match number up to which predictions are made.
+        use_practice_before (int): The cutoff match number to include practice matches.
+        store (std.ScoreStore): Scores to predict with.
+        rating (dict): Keyword arguments of store.engine; see accuracyGrid.
+        fill_unscouted (bool): Use OPR for teams without scouting data; see accuracyGrid.
+    Returns:
+        dict: The batch_win_prediction keys, each a read-only array of shape (matches,).
+    """
+    rating = rating or {}
+    key = (
+        event.cache_key(),
+        store.source,
+        tuple(sorted(rating.items())),
+        fill_unscouted,
+        progress,
+        use_practice_before,
+    )
+    version = store.version
+    entry = _cache_get(_schedules, key)
+    profiling.cache(
+        "predict_graph.schedule_prediction", entry is not None and entry[0] == version
+    )
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    engine = _engine(event, store, rating, fill_unscouted)
+    cutoffs = np.minimum(event.match_numbers, progress)
+    include_practice = cutoffs <= use_practice_before
+    blue_teams, red_teams = event.alliance_indices(engine.team_index)
+    updated = None if entry is None else affected_matches(event, store, entry[0])
+    if updated is None:
+        _, means, std_devs = engine.arrays(cutoffs, include_practice)
+        predictions = predict.batch_win_prediction(
+            blue_teams, red_teams, means, std_devs
+        )
+    else:
+        predictions = {name: values.copy() for name, values in entry[1].items()}
+        if updated.any():
+            _, means, std_devs = engine.arrays(
+                cutoffs[updated], include_practice[updated]
+            )
+            changed = predict.batch_win_prediction(
+                blue_teams[updated], red_teams[updated], means, std_devs
+            )
+            for name, values in changed.items():
+                predictions[name][updated] = values
+    for values in predictions.values():
+        values.setflags(write=False)
+    _cache_put(_schedules, key, (version, predictions))
+    return predictions
+
+
+def _grid_index(value, match_count):
+    return int(min(value, match_count))
+
+
+def accuracyByProgress(
+    event, use_practice_before=math.inf, store=None, rating=None, fill_unscouted=False
+):
     """
     Calculate the accuracy of predictions by progress in matches.
-    This function iterates through the matches, calculates the win predictions
-    for each alliance, and compares them to the actual winning alliance.
+    Each match is predicted with the data before it, or before the progress match
+    if it comes later, and compared to the actual winning alliance. This is a row
+    of accuracyGrid.
     It returns a dictionary where the keys are the match progress numbers
     and the values are the accuracy of predictions up to that point.
     Args:
-        tba_data (list): List of match data from TBA API.
+        event (tba.EventData): The event's qualification matches.
         use_practice_before (int): The cutoff match number to include practice matches.
+        store (std.ScoreStore): Scores to predict with; defaults to the score file.
+        rating (dict): Keyword arguments of store.engine; see accuracyGrid.
+        fill_unscouted (bool): Use OPR for teams without scouting data; see accuracyGrid.
     Returns:
         dict: A dictionary with match progress as keys and accuracy as values.
     """
-    match_count = len(list(filter(lambda x: x["comp_level"] in ["qm"], tba_data)))
-    result={}
-    tba_data.sort(key=lambda x: (x["comp_level"], x["match_number"]))
-    tba_data = list(filter(lambda x: x["comp_level"] in ["qm"], tba_data))
-    for progress in range(1, match_count + 1):
-        correct_predictions = 0
-        all_predictions = 0
-        for match in tba_data:
-            # show 6 team keys by 2 alliances in table
-
-            # Ensure match has alliances and team keys
-            blue_alliance = match["alliances"]["blue"]["team_keys"]
-            red_alliance = match["alliances"]["red"]["team_keys"]
-
-            # remove 'frc' prefix
-
-            blue_alliance = [team.replace("frc", "") for team in blue_alliance]
-            red_alliance = [team.replace("frc", "") for team in red_alliance]
-            if int(match["match_number"]) <= progress:
-                predict_data = stdfun.calculate_team_stats(
-                    cutoff_q_number=int(match["match_number"]),
-                    use_practice_before=use_practice_before
-                )
-            else:
-                predict_data = stdfun.calculate_team_stats(cutoff_q_number=progress,use_practice_before=use_practice_before)
-            predictWin = predict.alliance_win_prediction(
-                blue_alliance, red_alliance, predict_data
-            )
-            if match.get("winning_alliance", "") == (
-                "blue"
-                if predictWin["blue_win_prob"] > predictWin["red_win_prob"]
-                else "red"
-            ):
-                correct_predictions += 1
-            all_predictions += 1
-        result[progress] = correct_predictions / all_predictions if all_predictions > 0 else 0
-    return result
-
-@st.cache_data()
-def accuracyByPracticeBefore(tba_data, progress=1):
+    grid = accuracyGrid(event, store, rating, fill_unscouted)
+    match_count = len(grid) - 1
+    row = grid[_grid_index(use_practice_before, match_count)]
+    return {progress: row[progress].item() for progress in range(1, match_count + 1)}
+
+
+def accuracyByPracticeBefore(
+    event, progress=1, store=None, rating=None, fill_unscouted=False
+):
     """
     Calculate the accuracy of predictions based on the number of practice matches
     used before the qualification matches.
-    This function iterates through the matches, calculates the win predictions
-    for each alliance, and compares them to the actual winning alliance.
+    Each match is predicted the same way as in accuracyByProgress and compared to
+    the actual winning alliance. This is a column of accuracyGrid.
     It returns a dictionary where the keys are the number of practice matches used
     before the qualification matches and the values are the accuracy of predictions.
     Args:
-        tba_data (list): List of match data from TBA API.
+        event (tba.EventData): The event's qualification matches.
         progress (int): The match number up to which predictions are made.
+        store (std.ScoreStore): Scores to predict with; defaults to the score file.
+        rating (dict): Keyword arguments of store.engine; see accuracyGrid.
+        fill_unscouted (bool): Use OPR for teams without scouting data; see accuracyGrid.
     Returns:
         dict: A dictionary with the number of practice matches used as keys and accuracy as values.
     """
-    match_count = len(list(filter(lambda x: x["comp_level"] in ["qm"], tba_data)))
-    result={}
-    tba_data.sort(key=lambda x: (x["comp_level"], x["match_number"]))
-    tba_data = list(filter(lambda x: x["comp_level"] in ["qm"], tba_data))
-    for use_practice_before in range(1, match_count + 1):
-        correct_predictions = 0
-        all_predictions = 0
-        for match in tba_data:
-            # show 6 team keys by 2 alliances in table
-
-            # Ensure match has alliances and team keys
-            blue_alliance = match["alliances"]["blue"]["team_keys"]
-            red_alliance = match["alliances"]["red"]["team_keys"]
-
-            # remove 'frc' prefix
-
-            blue_alliance = [team.replace("frc", "") for team in blue_alliance]
-            red_alliance = [team.replace("frc", "") for team in red_alliance]
-            if int(match["match_number"]) <= progress:
-                predict_data = stdfun.calculate_team_stats(
-                    cutoff_q_number=int(match["match_number"]),
-                    use_practice_before=use_practice_before
-                )
-            else:
-                predict_data = stdfun.calculate_team_stats(cutoff_q_number=progress,use_practice_before=use_practice_before)
-            predictWin = predict.alliance_win_prediction(
-                blue_alliance, red_alliance, predict_data
-            )
-            if match.get("winning_alliance", "") == (
-                "blue"
-                if predictWin["blue_win_prob"] > predictWin["red_win_prob"]
-                else "red"
-            ):
-                correct_predictions += 1
-            all_predictions += 1
-        result[use_practice_before] = correct_predictions / all_predictions if all_predictions > 0 else 0
-    return result
+    grid = accuracyGrid(event, store, rating, fill_unscouted)
+    match_count = len(grid) - 1
+    column = grid[:, _grid_index(progress, match_count)]
+    return {
+        use_practice_before: column[use_practice_before].item()
+        for use_practice_before in range(1, match_count + 1)
+    }
+
 
 if __name__ == "__main__":
-    tba_data  = tba.get_match_schedule(event_key='2025casd')
-    if tba_data:
-        progress_accuracy = accuracyByProgress(tba_data)
+    event = tba.get_event_data(event_key="2025casd")
+    if len(event):
+        progress_accuracy = accuracyByProgress(event)
         print(f"Progress Accuracy: {progress_accuracy}")
     else:
-        print("No data available for the event.")
\ No newline at end of file
+        print("No data available for the event.")
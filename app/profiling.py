@@ -0,0 +1,213 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Trace events kept per run; call counts and totals are always complete
+MAX_TRACE_EVENTS = 20000
+
+
+class Profiler:
+    """
+    Call counts, wall time and cache hits / misses per named stage, such as
+    "tba.get" or "std.load_score_store", since the last reset().
+    A stage's time includes the stages nested in it. Every call is also kept as a
+    trace event, so a run can be exported and opened in chrome://tracing or Perfetto.
+    The profiler can be shared between threads.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget every recorded stage, e.g. at the start of a Streamlit rerun."""
+        with self._lock:
+            self._stages = {}
+            self._events = []
+            self._start = time.perf_counter()
+
+    def _entry(self, name):
+        entry = self._stages.get(name)
+        if entry is None:
+            entry = {"calls": 0, "seconds": 0.0, "hits": 0, "misses": 0}
+            self._stages[name] = entry
+        return entry
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a block of code as one call of a stage.
+        Args:
+            name (str): Stage name, by convention "module.function".
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                entry = self._entry(name)
+                entry["calls"] += 1
+                entry["seconds"] += end - start
+                if len(self._events) < MAX_TRACE_EVENTS:
+                    self._events.append(
+                        (name, start, end - start, threading.get_ident())
+                    )
+
+    def cache(self, name, hit):
+        """
+        Count a cache hit or miss of a stage.
+        Args:
+            name (str): Stage name.
+            hit (bool): True if cached data was used.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entry(name)["hits" if hit else "misses"] += 1
+
+    def count(self, name, key):
+        """
+        Returns:
+            int: The stage's "calls", "hits" or "misses" so far.
+        """
+        with self._lock:
+            entry = self._stages.get(name)
+            return entry[key] if entry is not None else 0
+
+    def stats(self):
+        """
+        Returns:
+            list of dict: One row per stage with "stage", "calls", "seconds", "hits"
+            and "misses", slowest first.
+        """
+        with self._lock:
+            rows = [{"stage": name, **entry} for name, entry in self._stages.items()]
+        return sorted(rows, key=lambda row: row["seconds"], reverse=True)
+
+    def trace(self):
+        """
+        Returns:
+            dict: The run in the Chrome trace event format, times in microseconds.
+        """
+        with self._lock:
+            events = list(self._events)
+            start = self._start
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "cat": name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": (begin - start) * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": 0,
+                    "tid": thread,
+                }
+                for name, begin, duration, thread in events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def export_trace(self, path):
+        """
+        Write trace() as JSON.
+        Args:
+            path (str): Output file, e.g. "trace.json".
+        """
+        with open(path, "w") as f:
+            json.dump(self.trace(), f)
+
+
+# The module functions record to the current context's profiler. The app gives each
+# session its own with use(), so concurrent sessions do not reset each other's
+# stages; CLI tools record to PROFILER.
+PROFILER = Profiler()
+_current = contextvars.ContextVar("profiler", default=PROFILER)
+
+
+def use(profiler):
+    """
+    Record the stages of the current context, e.g. one Streamlit script run, to a
+    profiler. Threads started afterwards begin with PROFILER again.
+    Args:
+        profiler (Profiler): The profiler to record to.
+    """
+    _current.set(profiler)
+
+
+@contextmanager
+def using(profiler):
+    """
+    Record the stages of a block of code, e.g. one Streamlit fragment run, to a
+    profiler, then go back to the context's previous profiler.
+    Args:
+        profiler (Profiler): The profiler to record to.
+    """
+    token = _current.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _current.reset(token)
+
+
+def current():
+    """
+    Returns:
+        Profiler: The profiler the module functions record to in this context.
+    """
+    return _current.get()
+
+
+def timed(name):
+    """
+    Decorator timing every call of a function as a stage of the current profiler.
+    Args:
+        name (str): Stage name.
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _current.get().stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Shortcuts to the current profiler's methods
+def reset():
+    _current.get().reset()
+
+
+def stage(name):
+    return _current.get().stage(name)
+
+
+def cache(name, hit):
+    _current.get().cache(name, hit)
+
+
+def count(name, key):
+    return _current.get().count(name, key)
+
+
+def stats():
+    return _current.get().stats()
+
+
+def trace():
+    return _current.get().trace()
+
+
+def export_trace(path):
+    _current.get().export_trace(path)
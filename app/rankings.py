@@ -0,0 +1,244 @@
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+import predict
+import profiling
+
+# 2025 qualification ranking points: 3 for a win and 1 for a tie, plus up to three
+# bonus RPs (auto, coral and barge)
+WIN_RP = 3
+TIE_RP = 1
+BONUS_RPS = 3
+# Top seeds become alliance captains
+CAPTAINS = 8
+# Projections by the caller's cache key and the simulation settings, least recently
+# used first. Each holds two (simulations, teams) arrays, so only a few are kept.
+PROJECTION_CACHE_SIZE = 8
+_projections = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def project_rankings(
+    event,
+    engine,
+    cutoff_q_number=math.inf,
+    include_practice=True,
+    simulations=10000,
+    seed=None,
+    workers=1,
+    cache_key=None,
+):
+    """
+    Project the final qualification rankings by simulating the rest of the schedule.
+    Matches played before the cutoff keep their TBA results. Every other match is
+    simulated with the alliance_win_prediction model: each alliance's score is normal
+    with the summed team averages and variances, using the data before the cutoff.
+    Bonus RPs are binomial with the alliance's average bonus rate in played matches.
+    Teams are ranked by ranking score (RP per match), then by average match score.
+    Args:
+        event (tba.EventData): The event's qualification schedule and results.
+        engine (std.TeamStatsEngine): Team statistics, e.g. ScoreStore.engine().
+        cutoff_q_number (int): First match to simulate; inf simulates only unplayed matches.
+        include_practice (bool): Whether practice matches are used for team statistics.
+        simulations (int): Number of simulated events.
+        seed (int): Seed for reproducible results.
+        workers (int): Processes to split the simulations over.
+        cache_key (tuple): Identifies the event and the engine's scores and options,
+            e.g. (event.cache_key(), store.cache_key(), rating options). The
+            projection is then reused for the same key and arguments; None always
+            simulates.
+    Returns:
+        dict: "teams" (team numbers), "ranking_points" and "seeds" arrays of shape
+        (simulations, teams), and per team "mean_rp", "mean_seed", "captain_prob"
+        (seed within CAPTAINS) and "seed_probs" of shape (teams, seeds). Cached
+        projections have read-only arrays.
+    """
+    if cache_key is None:
+        return _project_rankings(
+            event, engine, cutoff_q_number, include_practice, simulations, seed, workers
+        )
+    key = (cache_key, cutoff_q_number, include_practice, simulations, seed, workers)
+    with _cache_lock:
+        projection = _projections.get(key)
+        if projection is not None:
+            _projections.move_to_end(key)
+    profiling.cache("rankings.project_rankings", projection is not None)
+    if projection is not None:
+        return projection
+
+    projection = _project_rankings(
+        event, engine, cutoff_q_number, include_practice, simulations, seed, workers
+    )
+    for value in projection.values():
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+    with _cache_lock:
+        _projections[key] = projection
+        while len(_projections) > PROJECTION_CACHE_SIZE:
+            _projections.popitem(last=False)
+    return projection
+
+
+def clear_cache():
+    """Forget every cached projection."""
+    with _cache_lock:
+        _projections.clear()
+
+
+def _project_rankings(
+    event, engine, cutoff_q_number, include_practice, simulations, seed, workers
+):
+    team_count = len(event.teams)
+    played = (event.blue_scores >= 0) & (event.match_numbers < cutoff_q_number)
+    remaining = ~played
+
+    _, means, std_devs = engine.arrays(cutoff_q_number, include_practice)
+    blue_stats, red_stats = event.alliance_indices(engine.team_index)
+    prediction = predict.batch_win_prediction(
+        blue_stats[remaining], red_stats[remaining], means, std_devs
+    )
+
+    # Ranking points, match points and bonus rates from the played matches
+    base_rp = np.zeros(team_count)
+    base_points = np.zeros(team_count)
+    bonus = np.zeros(team_count)
+    bonus_matches = np.zeros(team_count)
+    for teams, scores, other_scores, rp in (
+        (event.blue_teams, event.blue_scores, event.red_scores, event.blue_rp),
+        (event.red_teams, event.red_scores, event.blue_scores, event.red_rp),
+    ):
+        win_rp = np.where(
+            scores > other_scores, WIN_RP, np.where(scores == other_scores, TIE_RP, 0)
+        )
+        known = played & (rp >= 0)
+        total_rp = np.where(known, rp, win_rp)
+        np.add.at(base_rp, teams[played], total_rp[played, None])
+        np.add.at(base_points, teams[played], scores[played, None])
+        np.add.at(bonus, teams[known], (rp - win_rp)[known, None])
+        np.add.at(bonus_matches, teams[known], 1)
+    event_rate = bonus.sum() / max(bonus_matches.sum() * BONUS_RPS, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bonus_rate = np.where(
+            bonus_matches > 0, bonus / (bonus_matches * BONUS_RPS), event_rate
+        )
+    bonus_rate = np.clip(bonus_rate, 0, 1)
+
+    # (remaining matches, teams) incidence matrices add match results to team totals
+    def incidence(teams):
+        matrix = np.zeros((len(teams), team_count))
+        np.add.at(matrix, (np.arange(len(teams))[:, None], teams), 1)
+        return matrix
+
+    schedule = {
+        "blue_avg": prediction["blue_avg"],
+        "blue_std": prediction["blue_std"],
+        "red_avg": prediction["red_avg"],
+        "red_std": prediction["red_std"],
+        "blue_bonus": bonus_rate[event.blue_teams[remaining]].mean(axis=1),
+        "red_bonus": bonus_rate[event.red_teams[remaining]].mean(axis=1),
+        "blue_incidence": incidence(event.blue_teams[remaining]),
+        "red_incidence": incidence(event.red_teams[remaining]),
+        "base_rp": base_rp,
+        "base_points": base_points,
+        "matches": np.maximum(
+            np.bincount(
+                np.concatenate([event.blue_teams, event.red_teams]).ravel(),
+                minlength=team_count,
+            ),
+            1,
+        ),
+    }
+
+    workers = max(1, min(workers, simulations))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    sizes = [len(chunk) for chunk in np.array_split(np.arange(simulations), workers)]
+    if workers == 1:
+        chunks = [_simulate_rankings(schedule, sizes[0], seeds[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(partial(_simulate_rankings, schedule), sizes, seeds))
+    ranking_points = np.concatenate([chunk[0] for chunk in chunks])
+    final_seeds = np.concatenate([chunk[1] for chunk in chunks])
+
+    seed_counts = np.bincount(
+        (np.arange(team_count) * team_count + final_seeds - 1).ravel(),
+        minlength=team_count * team_count,
+    ).reshape(team_count, team_count)
+    return {
+        "teams": list(event.teams),
+        "ranking_points": ranking_points,
+        "seeds": final_seeds,
+        "mean_rp": ranking_points.mean(axis=0),
+        "mean_seed": final_seeds.mean(axis=0),
+        "captain_prob": (final_seeds <= CAPTAINS).mean(axis=0),
+        "seed_probs": seed_counts / max(len(final_seeds), 1),
+    }
+
+
+def _simulate_rankings(schedule, simulations, seed):
+    """
+    Simulate the remaining matches of a schedule.
+    Returns:
+        tuple: (ranking_points, seeds) arrays of shape (simulations, teams).
+    """
+    rng = np.random.default_rng(seed)
+    shape = (simulations, len(schedule["blue_avg"]))
+    blue = rng.normal(schedule["blue_avg"], schedule["blue_std"], shape)
+    red = rng.normal(schedule["red_avg"], schedule["red_std"], shape)
+    blue_rp = np.where(blue > red, WIN_RP, np.where(blue == red, TIE_RP, 0))
+    red_rp = np.where(red > blue, WIN_RP, np.where(blue == red, TIE_RP, 0))
+    blue_rp = blue_rp + rng.binomial(BONUS_RPS, schedule["blue_bonus"], shape)
+    red_rp = red_rp + rng.binomial(BONUS_RPS, schedule["red_bonus"], shape)
+
+    ranking_points = (
+        schedule["base_rp"]
+        + blue_rp @ schedule["blue_incidence"]
+        + red_rp @ schedule["red_incidence"]
+    )
+    points = (
+        schedule["base_points"]
+        + blue @ schedule["blue_incidence"]
+        + red @ schedule["red_incidence"]
+    )
+    order = np.lexsort(
+        (-points / schedule["matches"], -ranking_points / schedule["matches"]), axis=-1
+    )
+    seeds = np.empty_like(order)
+    np.put_along_axis(
+        seeds, order, np.arange(1, order.shape[1] + 1)[None, :], axis=1
+    )
+    return ranking_points, seeds
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import std as stdfun
+    import tba
+
+    parser = argparse.ArgumentParser(
+        description="Project the final qualification rankings of an event."
+    )
+    parser.add_argument("--event", default=tba.EVENT_KEY)
+    parser.add_argument("--simulations", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    event = tba.get_event_data(args.event)
+    engine = stdfun.load_score_store(event=args.event).engine()
+    start = time.perf_counter()
+    result = project_rankings(
+        event, engine, simulations=args.simulations, workers=args.workers
+    )
+    print(f"Simulated {args.simulations} events in {time.perf_counter() - start:.2f}s")
+    for i in np.argsort(result["mean_seed"]).tolist():
+        print(
+            f"{result['teams'][i]:>6}: seed {result['mean_seed'][i]:5.1f}, "
+            f"RP {result['mean_rp'][i]:5.1f}, top {CAPTAINS} {result['captain_prob'][i]:.0%}"
+        )
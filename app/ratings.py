@@ -0,0 +1,260 @@
+import math
+from bisect import bisect_left
+from collections import deque
+
+import numpy as np
+
+
+class RatingTracker:
+    """
+    Running per-team score mean and standard deviation, updated in O(1) per score.
+    With half_life, every older score's weight halves after that many newer scores
+    of the same team (exponentially weighted); with window, only the last `window`
+    scores count; with neither, every score counts equally, as in std.calculate_stats.
+    Each update is recorded under a key (such as the match number), so the ratings
+    before any key can be looked up afterwards for backtesting.
+    """
+
+    def __init__(self, half_life=None, window=None):
+        if half_life is not None and window is not None:
+            raise ValueError("Use either half_life or window, not both")
+        self.decay = 0.5 ** (1 / half_life) if half_life else 1.0
+        self.window = window
+        self._state = {}
+        self._keys = {}  # team -> keys of its updates, in update order
+        self._history = {}  # team -> (count, mean, std_dev) after each update
+
+    def copy(self, teams=()):
+        """
+        Copy the tracker so it can be updated while this one is still read.
+        Args:
+            teams (iterable of str): Teams that will be updated; only their histories
+                are copied, the others are shared.
+        Returns:
+            RatingTracker: The copy.
+        """
+        tracker = RatingTracker(window=self.window)
+        tracker.decay = self.decay
+        tracker._state = dict(self._state)
+        tracker._keys = dict(self._keys)
+        tracker._history = dict(self._history)
+        for team in teams:
+            if team in self._keys:
+                tracker._keys[team] = list(self._keys[team])
+                tracker._history[team] = list(self._history[team])
+            if self.window and team in self._state:
+                scores, total, total_sq = self._state[team]
+                tracker._state[team] = (deque(scores), total, total_sq)
+        return tracker
+
+    def update(self, team, score, key):
+        """
+        Add one score. Keys of a team must not decrease.
+        Args:
+            team (str): Team number.
+            score (float): The team's score.
+            key (float): Position of the score in time, e.g. the qualification number.
+        Returns:
+            tuple: The team's new (count, mean, std_dev).
+        """
+        if self.window:
+            rating = self._update_window(team, score)
+        else:
+            rating = self._update_weighted(team, score)
+        self._keys.setdefault(team, []).append(key)
+        self._history.setdefault(team, []).append(rating)
+        return rating
+
+    def _update_weighted(self, team, score):
+        # Weighted Welford update: older weights decay, the new score has weight 1
+        count, weight, weight_sq, mean, spread = self._state.get(team, (0, 0, 0, 0, 0))
+        weight = self.decay * weight + 1
+        weight_sq = self.decay**2 * weight_sq + 1
+        delta = score - mean
+        mean += delta / weight
+        spread = self.decay * spread + delta * (score - mean)
+        self._state[team] = (count + 1, weight, weight_sq, mean, spread)
+        # Unbiased for reliability weights; equals the sample variance without decay
+        effective = weight - weight_sq / weight
+        variance = spread / effective if effective > 1e-12 else 0.0
+        return count + 1, mean, math.sqrt(max(variance, 0.0))
+
+    def _update_window(self, team, score):
+        scores, total, total_sq = self._state.get(team, (deque(), 0, 0))
+        scores.append(score)
+        total += score
+        total_sq += score * score
+        if len(scores) > self.window:
+            old = scores.popleft()
+            total -= old
+            total_sq -= old * old
+        self._state[team] = (scores, total, total_sq)
+        n = len(scores)
+        variance = (n * total_sq - total * total) / (n * (n - 1)) if n > 1 else 0.0
+        return n, total / n, math.sqrt(max(variance, 0.0))
+
+    def rating(self, team, cutoff=math.inf):
+        """
+        Get a team's rating from the updates with keys before a cutoff.
+        Args:
+            team (str): Team number.
+            cutoff (float): Only updates with a smaller key are used.
+        Returns:
+            tuple: (count, mean, std_dev); (0, 0.0, 0.0) without updates.
+        """
+        keys = self._keys.get(team, [])
+        position = bisect_left(keys, cutoff)
+        if position == 0:
+            return 0, 0.0, 0.0
+        return self._history[team][position - 1]
+
+    def ratings(self, teams, cutoffs):
+        """
+        Get the ratings of many teams at many cutoffs.
+        Args:
+            teams (list of str): Team numbers.
+            cutoffs (numpy.ndarray): Cutoffs of any shape.
+        Returns:
+            tuple: (count, mean, std_dev) arrays of shape cutoffs.shape + (teams,).
+        """
+        cutoffs = np.asarray(cutoffs, dtype=float)
+        result = np.zeros((3,) + cutoffs.shape + (len(teams),))
+        for i, team in enumerate(teams):
+            keys = self._keys.get(team)
+            if not keys:
+                continue
+            history = np.array([(0, 0.0, 0.0)] + self._history[team])
+            positions = np.searchsorted(keys, cutoffs, side="left")
+            result[..., i] = np.moveaxis(history[positions], -1, 0)
+        return result[0], result[1], result[2]
+
+
+class RatingEngine:
+    """
+    Time-weighted alternative to std.TeamStatsEngine with the same query interface.
+    Practice matches are streamed before qualification matches, and a second tracker
+    without practice matches serves cutoffs that leave them out.
+    """
+
+    def __init__(self, matches, half_life=None, window=None):
+        self.teams = sorted({team for match in matches for team in match.scores})
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.with_practice = RatingTracker(half_life, window)
+        self.without_practice = RatingTracker(half_life, window)
+        practice = sorted(
+            (match for match in matches if match.match_type == "Practice"),
+            key=lambda match: match.match_number,
+        )
+        qualifications = sorted(
+            (match for match in matches if match.match_type == "Qualifications"),
+            key=lambda match: match.match_number,
+        )
+        self._last = {}  # team -> _order() of its latest score
+        for match in practice + qualifications:
+            for team_number, score in match.scores.items():
+                self.add_score(match.match_type, match.match_number, team_number, score)
+
+    def add_score(self, match_type, match_number, team_number, score):
+        """
+        Stream in one score in O(1). Qualification scores must arrive in match order,
+        after every practice score of the team.
+        Args:
+            match_type (str): "Practice" or "Qualifications"; other types are ignored.
+            match_number (int): The match number.
+            team_number (str): The team.
+            score (float): The team's score.
+        """
+        if team_number not in self.team_index:
+            self.team_index[team_number] = len(self.teams)
+            self.teams.append(team_number)
+        if match_type in ("Practice", "Qualifications"):
+            self._last[team_number] = _order(match_type, match_number)
+        if match_type == "Practice":
+            # Practice matches come before every qualification cutoff
+            self.with_practice.update(team_number, score, -math.inf)
+        elif match_type == "Qualifications":
+            self.with_practice.update(team_number, score, match_number)
+            self.without_practice.update(team_number, score, match_number)
+
+    def with_scores(self, changes):
+        """
+        Get the engine for the scores after some changes. New scores that come after
+        each of their team's earlier scores are streamed in with add_score, and only
+        the changed teams' histories are copied; this engine is left as it is for
+        readers still using it.
+        Args:
+            changes (list of tuple): (match_type, match_number, team_number, old_score,
+                new_score) per changed score; None where there was or is no score.
+        Returns:
+            RatingEngine: The updated engine, or None if a score was changed or
+            removed, or arrived before a later one of its team, which needs a rebuild.
+        """
+        changes = sorted(
+            (change for change in changes if _order(*change[:2]) is not None),
+            key=lambda change: _order(*change[:2]),
+        )
+        last = dict(self._last)
+        for match_type, match_number, team_number, old_score, _ in changes:
+            order = _order(match_type, match_number)
+            if old_score is not None or (
+                team_number in last and order <= last[team_number]
+            ):
+                return None
+            last[team_number] = order
+
+        teams = {change[2] for change in changes}
+        engine = RatingEngine([])
+        engine.teams = list(self.teams)
+        engine.team_index = dict(self.team_index)
+        engine.with_practice = self.with_practice.copy(teams)
+        engine.without_practice = self.without_practice.copy(teams)
+        engine._last = dict(self._last)
+        for match_type, match_number, team_number, _, new_score in changes:
+            engine.add_score(match_type, match_number, team_number, new_score)
+        return engine
+
+    def arrays(self, cutoff_q_number, include_practice):
+        """
+        Get each team's match count, mean and standard deviation for one or more cutoffs.
+        Args:
+            cutoff_q_number (int or array): Only qualification matches before this number are used.
+            include_practice (bool or array): Whether practice matches are included, per cutoff.
+        Returns:
+            tuple: (count, mean, std_dev) arrays aligned with self.teams, with a leading
+            cutoff axis when an array of cutoffs is given.
+        """
+        include_practice = np.asarray(include_practice)
+        with_practice = self.with_practice.ratings(self.teams, cutoff_q_number)
+        if include_practice.ndim == 0:
+            if include_practice:
+                return with_practice
+            return self.without_practice.ratings(self.teams, cutoff_q_number)
+        without_practice = self.without_practice.ratings(self.teams, cutoff_q_number)
+        return tuple(
+            np.where(include_practice[:, None], with_values, without_values)
+            for with_values, without_values in zip(with_practice, without_practice)
+        )
+
+    def team_stats(self, cutoff_q_number, include_practice):
+        """
+        Get team statistics for a cutoff in the calculate_team_stats format.
+        Args:
+            cutoff_q_number (int): Only qualification matches before this number are used.
+            include_practice (bool): Whether practice matches are included.
+        Returns:
+            dict: {team_number: {"average": float, "std_dev": float}} for teams with data.
+        """
+        count, mean, std_dev = self.arrays(cutoff_q_number, include_practice)
+        return {
+            self.teams[i]: {"average": mean[i].item(), "std_dev": std_dev[i].item()}
+            for i in np.flatnonzero(count).tolist()
+        }
+
+
+def _order(match_type, match_number):
+    # Streaming order of a score: practice matches first, then qualifications
+    if match_type == "Practice":
+        return (0, match_number)
+    if match_type == "Qualifications":
+        return (1, match_number)
+    return None
@@ -1,11 +1,43 @@
-import firebase_admin
-from firebase_admin import credentials
-from firebase_admin import firestore
+import argparse
 import json
+import os
+import tempfile
+from datetime import datetime
 
-cred = credentials.Certificate("././key.json")
-app = firebase_admin.initialize_app(cred)
-db = firestore.client()
+import numpy as np
+
+import columnar
+import scoring
+
+# Service account key of the Firebase project
+KEY_PATH = "././key.json"
+COLLECTION_PATH = "matches/8020/2025_San_Diego"
+EVENT_KEY = "2025casd"
+# Season whose scoring rules (scoring.RULES) apply to the collection
+SEASON = 2025
+SCORES_PATH = "app/match_team_scores"
+# Remembers which documents the score store already contains, per collection
+SYNC_STATE_PATH = "app/match_team_scores.sync.json"
+
+
+_db = None
+
+
+def get_db():
+    """
+    Connect to Firestore on first use, so importing this module does not need
+    key.json or load firebase_admin.
+    Returns:
+        google.cloud.firestore.Client: The Firestore client.
+    """
+    global _db
+    if _db is None:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        app = firebase_admin.initialize_app(credentials.Certificate(KEY_PATH))
+        _db = firestore.client(app)
+    return _db
 
 
 # Score calculation function
@@ -17,70 +49,244 @@ def calculate_team_score(data):
     Returns:
         int: The calculated score for the team.
     """
-    score = 0
-
-    # Auto phase
-    if data["auto"].get("leave", False):
-        score += 3
-    coral_auto = data["auto"].get("coral", [0, 0, 0, 0])
-    auto_coral_scores = [3, 4, 6, 7]  # L1, L2, L3, L4
-    for i, count in enumerate(coral_auto):
-        score += count * auto_coral_scores[i]
-    score += data["auto"].get("net", 0) * 4
-    score += data["auto"].get("processor", 0) * 6
-
-    # Teleop phase
-    coral_teleop = data["teleop"].get("coral", [0, 0, 0, 0])
-    teleop_coral_scores = [2, 3, 4, 5]  # L1, L2, L3, L4
-    for i, count in enumerate(coral_teleop):
-        score += count * teleop_coral_scores[i]
-    score += data["teleop"].get("net", 0) * 4
-    score += data["teleop"].get("processor", 0) * 6
-
-    # Endgame phase
-    barge_status = data["endgame"].get("bargeStatus", "Did Not Attempt")
-    if barge_status == "Success Deep Cage":
-        score += 12
-    elif barge_status == "Success Shallow Cage":
-        score += 6
-    elif barge_status == "Park":
-        score += 2
-
-    return score
-
-
-
-def save_scores_by_match():
+    return scoring.score_document(data, SEASON)
+
+
+def parse_document_id(doc_id):
+    """
+    Split a scouting document id such as "Qualifications_12_8020".
+    Args:
+        doc_id (str): The Firestore document id.
+    Returns:
+        tuple: (match_type, match_number, team_number), or None if the id is invalid.
+    """
+    parts = doc_id.split("_")
+    if len(parts) != 3 or not parts[1].isdigit():
+        print(f"Invalid Id: {doc_id}")
+        return None
+    match_type, match_number, team_number = parts
+    return match_type, int(match_number), team_number
+
+
+def save_scores_by_match(
+    collection=None, scores_path=SCORES_PATH, state_path=SYNC_STATE_PATH
+):
     """Fetch match documents from Firestore, calculate team scores,
-    and save the results in a JSON file.
+    and save the results in the columnar score store.
     This function retrieves match data from the Firestore database,
-    calculates the score for each team in each match, and organizes
-    the results by match ID. The final scores are saved in a JSON file
-    named "match_team_scores.json". Each match ID contains a dictionary
-    of team numbers and their corresponding scores.
+    calculates the score for each team in each match, and stores one
+    row per team and match with the total and per-component scores
+    (see columnar.py). Rows of other events in the store are kept.
+    The sync state is saved as well, so later runs can use sync_scores.
+    Args:
+        collection: Firestore collection of scouting documents. Defaults to COLLECTION_PATH.
+        scores_path (str): Directory of the columnar score store.
+        state_path (str): Path of the sync state file.
     """
-    docs = db.collection("matches/8020/2025_San_Diego").stream()
+    sync_scores(collection, scores_path=scores_path, state_path=state_path, full=True)
+    print(f"Saved as {scores_path}")
+
 
-    match_scores = {}
+def sync_scores(
+    collection=None,
+    collection_path=COLLECTION_PATH,
+    event=EVENT_KEY,
+    scores_path=SCORES_PATH,
+    state_path=SYNC_STATE_PATH,
+    updated_field=None,
+    full=False,
+):
+    """
+    Bring the event's rows of the score store up to date with Firestore, only
+    re-scoring documents that are new or changed since the last sync.
+    With updated_field, only documents whose field is at or past the stored high-water
+    mark are queried, which is what saves Firestore reads. Without it, the collection
+    is streamed and compared against the stored update times, which also finds deleted
+    documents. A full export is made when there is no sync state for the collection,
+    or when the score store is not the one the sync state was saved with.
+    Args:
+        collection: Firestore collection of scouting documents. Defaults to collection_path.
+        collection_path (str): Firestore path of the collection, keys the sync state.
+        event (str): Event key the collection's scores are stored under.
+        scores_path (str): Directory of the columnar score store.
+        state_path (str): Path of the sync state file.
+        updated_field (str): Document field holding its last update time, if the
+            scouting app writes one.
+        full (bool): Re-score every document.
+    Returns:
+        dict: Counts of "changed" and "removed" documents.
+    """
+    if collection is None:
+        collection = get_db().collection(collection_path)
+    rules = scoring.get_rules(SEASON)
+
+    all_states = _read_json(state_path) or {}
+    state = all_states.get(collection_path)
+    other_rows, event_rows = _read_rows(scores_path, event, rules.columns)
+    if (
+        state is not None
+        and event_rows is not None
+        and state.get("store_version") != columnar.store_version(scores_path)
+    ):
+        # The store was deleted, regenerated or written by another tool since the
+        # last sync, so the documents in the state may be missing from it
+        print(f"{scores_path} does not match the sync state, re-exporting {event}")
+        full = True
+    if full or state is None or event_rows is None:
+        state = {"documents": {}, "high_water_mark": None}
+        event_rows = {}
+        full = True
+
+    known = state["documents"]
+    mark = _decode_mark(state.get("high_water_mark"))
+    incremental_query = updated_field is not None and mark is not None and not full
+    if incremental_query:
+        from firebase_admin import firestore
+
+        docs = collection.where(
+            filter=firestore.FieldFilter(updated_field, ">=", mark)
+        ).stream()
+    else:
+        docs = collection.stream()
+
+    seen = set()
+    pending = []  # (row key, data) of new and changed documents
     for doc in docs:
-        doc_id = doc.id
-        parts = doc_id.split("_")
-        if len(parts) == 3:
-            match_type, match_number, team_number = parts
-            match_id = f"{match_type}_{match_number}"
-            score = calculate_team_score(doc.to_dict())
-
-            if match_id not in match_scores:
-                match_scores[match_id] = {}
-            match_scores[match_id][team_number] = score
-        else:
-            print(f"Invalid Id: {doc_id}")
-            
-    with open("app/match_team_scores.json", "w") as f:
-        json.dump(match_scores, f, indent=2)
-
-    print("Saved as match_team_scores.json")
+        seen.add(doc.id)
+        data = doc.to_dict()
+        if updated_field is not None and data.get(updated_field) is not None:
+            if mark is None or data[updated_field] > mark:
+                mark = data[updated_field]
+
+        update_time = doc.update_time.isoformat() if doc.update_time else None
+        if known.get(doc.id) == update_time and update_time is not None:
+            continue
+        known[doc.id] = update_time
+        key = parse_document_id(doc.id)
+        if key is not None:
+            pending.append((key, data))
+
+    counts = rules.document_counts(data for _, data in pending)
+    for (key, _), row in zip(pending, counts.tolist()):
+        event_rows[key] = tuple(row)
+    changed = len(pending)
+
+    # A full stream shows every document, so anything missing was deleted
+    removed = 0
+    if not incremental_query:
+        for doc_id in set(known) - seen:
+            del known[doc_id]
+            key = parse_document_id(doc_id)
+            if key is not None and event_rows.pop(key, None) is not None:
+                removed += 1
+
+    if changed or removed or full:
+        state["store_version"] = _write_rows(
+            scores_path, event, rules, other_rows, event_rows
+        )
+    state["high_water_mark"] = _encode_mark(mark)
+    all_states[collection_path] = state
+    _write_json(state_path, all_states)
+    return {"changed": changed, "removed": removed}
+
+
+def _read_rows(scores_path, event, components):
+    """
+    Split the score store into the rows of other events (kept as they are) and the
+    event's per-component counts keyed by (match_type, match_number, team_number).
+    The event's rows are None if they cannot be updated in place.
+    """
+    table, stored_components = columnar.read_table(scores_path)
+    if table is None:
+        return None, None
+    is_event = np.array(table["event"], dtype=str) == event
+    other_rows = {name: np.asarray(values)[~is_event] for name, values in table.items()}
+    if stored_components != list(components):
+        print(f"{scores_path} uses other score components, re-exporting {event}")
+        if len(other_rows["total"]):
+            other_rows["counts"] = other_rows["points"] = None
+        return other_rows, None
+    event_rows = {}
+    for i in np.flatnonzero(is_event).tolist():
+        key = (table["match_type"][i], int(table["match_number"][i]), table["team"][i])
+        event_rows[key] = tuple(table["counts"][i].tolist())
+    return other_rows, event_rows
+
+
+def _write_rows(scores_path, event, rules, other_rows, event_rows):
+    keys = list(event_rows)
+    counts = np.array(list(event_rows.values()), dtype=np.int64).reshape(
+        len(keys), len(rules.columns)
+    )
+    scored = rules.score_counts(counts)
+    table = {
+        "event": [event] * len(keys),
+        "match_type": [key[0] for key in keys],
+        "match_number": [key[1] for key in keys],
+        "team": [key[2] for key in keys],
+        "total": scored.totals,
+        "counts": scored.counts,
+        "points": scored.points,
+    }
+    if other_rows is not None and len(other_rows["total"]):
+        for name in table:
+            other = other_rows[name]
+            if other is None:
+                # Rows stored with other components keep only their totals
+                other = np.zeros((len(other_rows["total"]), len(rules.columns)))
+            table[name] = np.concatenate([np.asarray(other), np.asarray(table[name])])
+    return columnar.write_columnar(scores_path, table, rules.columns)
+
+
+def _encode_mark(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    return {"type": "value", "value": value}
+
+
+def _decode_mark(mark):
+    if mark is None:
+        return None
+    if mark["type"] == "datetime":
+        return datetime.fromisoformat(mark["value"])
+    return mark["value"]
+
+
+def _read_json(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_json(path, data, **kwargs):
+    # Replace the file in one step so the app never reads a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp_path, path)
+
 
 if __name__ == "__main__":
-    save_scores_by_match()
-    print("Scores by match saved successfully.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(
+        description="Export scouting scores from Firestore into the columnar score store."
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="only re-score new and changed documents since the last run",
+    )
+    parser.add_argument(
+        "--updated-field",
+        help="document field with its last update time, to query only newer documents",
+    )
+    args = parser.parse_args()
+    if args.sync:
+        counts = sync_scores(updated_field=args.updated_field)
+        print(f"Synced scores: {counts['changed']} changed, {counts['removed']} removed.")
+    else:
+        save_scores_by_match()
+        print("Scores by match saved successfully.")
@@ -0,0 +1,271 @@
+import math
+import sqlite3
+import threading
+
+import columnar
+import std as stdfun
+
+DB_PATH = "app/scores.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    event TEXT NOT NULL,
+    match_type TEXT NOT NULL,
+    match_number INTEGER NOT NULL,
+    team TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    components TEXT,
+    PRIMARY KEY (event, match_type, match_number, team)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS revisions (
+    event TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_event_team ON scores (event, team);
+CREATE INDEX IF NOT EXISTS scores_team ON scores (team, event);
+"""
+
+
+class ScoreDatabase:
+    """
+    SQLite database of scouting scores for many events and seasons.
+    Rows are clustered on the primary key (event, match_type, match_number, team), which
+    is the (event, match_type, match_number) index serving one event's cutoff slices.
+    The (event, team) and (team, event) indexes serve team histories and priors.
+    Per-component points are kept as a comma-separated string next to the total, and
+    every write bumps the event's revision, which versions its ScoreStore.
+    One connection is shared by every thread, such as Streamlit's script threads, and
+    a lock serializes its use.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock:
+            self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    def add_scores(self, rows, replace_events=()):
+        """
+        Insert or replace score rows.
+        Args:
+            rows (iterable of tuple): (event, match_type, match_number, team, total,
+                components) rows; components is a list of points or None.
+            replace_events (iterable of str): Events whose existing rows are deleted
+                first, in the same transaction, so the rows become their full data.
+        Returns:
+            int: Number of rows written.
+        """
+        records = [
+            (
+                event,
+                match_type,
+                int(match_number),
+                str(team),
+                int(total),
+                None if components is None else ",".join(map(str, components)),
+            )
+            for event, match_type, match_number, team, total, components in rows
+        ]
+        replace_events = set(replace_events)
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "DELETE FROM scores WHERE event = ?",
+                [(event,) for event in replace_events],
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)", records
+            )
+            self.connection.executemany(
+                "INSERT INTO revisions VALUES (?, 1)"
+                " ON CONFLICT (event) DO UPDATE SET revision = revision + 1",
+                [
+                    (event,)
+                    for event in replace_events | {record[0] for record in records}
+                ],
+            )
+        return len(records)
+
+    def revision(self, event):
+        """
+        Args:
+            event (str): Event key.
+        Returns:
+            int: Number of writes to the event so far, 0 if it has no scores.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT revision FROM revisions WHERE event = ?", (event,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def import_columnar(self, path, event=None):
+        """
+        Copy rows of a columnar score store into the database. The imported events'
+        rows are replaced, so rows removed from the store leave the database too.
+        Args:
+            path (str): Directory of the columnar store.
+            event (str): Only import this event; None imports every event.
+        Returns:
+            int: Number of rows written.
+        """
+        store = columnar.ColumnarScores(path)
+        rows = store.rows(
+            event, ("event", "match_type", "match_number", "team", "total", "points")
+        )
+        components = rows["points"].tolist() if store.components else None
+        return self.add_scores(
+            zip(
+                rows["event"],
+                rows["match_type"],
+                rows["match_number"].tolist(),
+                rows["team"],
+                rows["total"].tolist(),
+                components or [None] * len(rows["team"]),
+            ),
+            replace_events=store.events if event is None else [event],
+        )
+
+    def events(self):
+        """
+        Returns:
+            list: Event keys in the database.
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT DISTINCT event FROM scores ORDER BY event"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def event_scores(self, event, cutoff_q_number=None, include_practice=True):
+        """
+        Get one event's scores, optionally only the data before a qualification cutoff.
+        Args:
+            event (str): Event key.
+            cutoff_q_number (int): Only qualification matches before this number; None
+                returns every match of the event.
+            include_practice (bool): Whether practice matches are returned with a cutoff.
+        Returns:
+            list: (match_type, match_number, team, total) rows.
+        """
+        with self._lock:
+            if cutoff_q_number is None:
+                query = (
+                    "SELECT match_type, match_number, team, total FROM scores"
+                    " WHERE event = ?"
+                )
+                return self.connection.execute(query, (event,)).fetchall()
+            rows = self.connection.execute(
+                "SELECT match_type, match_number, team, total FROM scores"
+                " WHERE event = ? AND match_type = 'Qualifications' AND match_number < ?",
+                (event, cutoff_q_number),
+            ).fetchall()
+            if include_practice:
+                rows += self.connection.execute(
+                    "SELECT match_type, match_number, team, total FROM scores"
+                    " WHERE event = ? AND match_type = 'Practice'",
+                    (event,),
+                ).fetchall()
+        return rows
+
+    def score_store(self, event):
+        """
+        Load one event into a ScoreStore for the stats engine and predictions.
+        Args:
+            event (str): Event key.
+        Returns:
+            std.ScoreStore: The event's scores.
+        """
+        # Rows and revision are read together, so the version matches the rows
+        with self._lock:
+            rows = self.event_scores(event)
+            version = self.revision(event)
+        match_types, match_numbers, teams, totals = zip(*rows) if rows else ([],) * 4
+        return stdfun.ScoreStore.from_columns(
+            match_types,
+            match_numbers,
+            teams,
+            totals,
+            version=version,
+            source=f"{self.path}#{event}",
+        )
+
+    def team_history(self, team, events=None):
+        """
+        Get a team's scores across events.
+        Args:
+            team (str): Team number.
+            events (list of str): Limit to these events; None uses every event.
+        Returns:
+            list: (event, match_type, match_number, total) rows ordered by event and match.
+        """
+        query = (
+            "SELECT event, match_type, match_number, total FROM scores WHERE team = ?"
+        )
+        params = [str(team)]
+        if events is not None:
+            query += f" AND event IN ({', '.join('?' * len(events))})"
+            params += list(events)
+        query += " ORDER BY event, match_type, match_number"
+        with self._lock:
+            return self.connection.execute(query, params).fetchall()
+
+    def team_priors(self, teams, exclude_event=None, match_types=("Qualifications",)):
+        """
+        Get each team's mean and sample standard deviation over other events, for use
+        as a prior before it has played at the current event.
+        Args:
+            teams (list of str): Team numbers.
+            exclude_event (str): Event left out, usually the one being predicted.
+            match_types (tuple of str): Match types to use.
+        Returns:
+            dict: {team_number: {"average": float, "std_dev": float, "count": int}} for
+            teams with data, in the calculate_team_stats format.
+        """
+        teams = [str(team) for team in teams]
+        if not teams:
+            return {}
+        query = (
+            "SELECT team, COUNT(*), SUM(total), SUM(total * total) FROM scores"
+            f" WHERE team IN ({', '.join('?' * len(teams))})"
+            f" AND match_type IN ({', '.join('?' * len(match_types))})"
+        )
+        params = teams + list(match_types)
+        if exclude_event is not None:
+            query += " AND event != ?"
+            params.append(exclude_event)
+        query += " GROUP BY team"
+
+        with self._lock:
+            rows = self.connection.execute(query, params).fetchall()
+        result = {}
+        for team, count, total, total_sq in rows:
+            mean = total / count
+            variance = 0
+            if count > 1:
+                variance = (count * total_sq - total * total) / (count * (count - 1))
+            result[team] = {
+                "average": mean,
+                "std_dev": math.sqrt(max(variance, 0)),
+                "count": count,
+            }
+        return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Import a columnar score store into the score database."
+    )
+    parser.add_argument("path", nargs="?", default=stdfun.SCORES_PATH)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--event", help="only import this event")
+    args = parser.parse_args()
+    database = ScoreDatabase(args.db)
+    count = database.import_columnar(args.path, args.event)
+    print(f"Imported {count} rows, events: {', '.join(database.events())}")
@@ -0,0 +1,241 @@
+from itertools import chain, repeat
+from operator import itemgetter
+
+import numpy as np
+
+# Scoring rules per season: phase -> document field -> points.
+# A number is points per count, a list gives points per index of a list field (e.g.
+# coral L1-L4), and a dict maps the field's values to points, such as {True: 3} for
+# a yes/no field; values missing from the dict score 0.
+RULES = {
+    2025: {
+        "auto": {
+            "leave": {True: 3},
+            "coral": [3, 4, 6, 7],  # L1, L2, L3, L4
+            "net": 4,
+            "processor": 6,
+        },
+        "teleop": {
+            "coral": [2, 3, 4, 5],  # L1, L2, L3, L4
+            "net": 4,
+            "processor": 6,
+        },
+        "endgame": {
+            "bargeStatus": {
+                "Park": 2,
+                "Success Shallow Cage": 6,
+                "Success Deep Cage": 12,
+            },
+        },
+    },
+}
+DEFAULT_SEASON = 2025
+
+_compiled = {}
+
+
+class CompiledRules:
+    """
+    A season's rule table compiled for batch scoring.
+    Every document becomes one row of `columns`: counts for number and list fields,
+    and a value code for dict fields. Points are counts * weights, with the code
+    columns replaced by a lookup in their points array.
+    """
+
+    def __init__(self, table):
+        self.columns = []
+        weights = []
+        self.lookups = {}  # column index -> (value codes dict, points array)
+        # phase -> [(field, list size or None, value codes or None)]
+        self.fields = []
+        for phase, fields in table.items():
+            extractors = []
+            for field, points in fields.items():
+                name = f"{phase}_{field}"
+                if isinstance(points, dict):
+                    codes = {value: code for code, value in enumerate(points, 1)}
+                    self.lookups[len(self.columns)] = (
+                        codes,
+                        np.array([0, *points.values()]),
+                    )
+                    extractors.append((field, None, codes))
+                    self.columns.append(name)
+                    weights.append(0)
+                elif isinstance(points, (list, tuple)):
+                    extractors.append((field, len(points), None))
+                    for level, level_points in enumerate(points):
+                        self.columns.append(f"{name}_l{level + 1}")
+                        weights.append(level_points)
+                else:
+                    extractors.append((field, None, None))
+                    self.columns.append(name)
+                    weights.append(points)
+            self.fields.append((phase, extractors))
+        self.weights = np.array(weights)
+
+    def document_counts(self, docs):
+        """
+        Turn scouting documents into rows of `columns`. Each field is read from every
+        document in one pass straight into an array, so the rule table is walked once
+        per batch rather than once per document.
+        Missing and None values count as 0, like an unchecked box or an empty counter.
+        Args:
+            docs (iterable of dict): Scouting documents.
+        Returns:
+            numpy.ndarray: Integer array of shape (documents, columns).
+        """
+        docs = list(docs)
+        counts = np.empty((len(docs), len(self.columns)), dtype=np.int64)
+        column = 0
+        for phase, extractors in self.fields:
+            phase_data = list(map(itemgetter(phase), docs))
+            for field, size, codes in extractors:
+                if codes is not None:
+                    counts[:, column] = np.fromiter(
+                        map(
+                            codes.get,
+                            map(dict.get, phase_data, repeat(field)),
+                            repeat(0),
+                        ),
+                        dtype=np.int64,
+                        count=len(docs),
+                    )
+                    column += 1
+                elif size is not None:
+                    counts[:, column : column + size] = _list_counts(
+                        list(map(dict.get, phase_data, repeat(field))),
+                        size,
+                        f"{phase}_{field}",
+                    )
+                    column += size
+                else:
+                    counts[:, column] = _scalar_counts(phase_data, field)
+                    column += 1
+        return counts
+
+    def score_counts(self, counts):
+        """
+        Score feature rows, such as stored counts re-scored under another season's rules.
+        Args:
+            counts (numpy.ndarray): Integer array of shape (documents, columns).
+        Returns:
+            ScoredBatch: Per-column points and total scores.
+        """
+        points = counts * self.weights
+        for column, (_, lookup) in self.lookups.items():
+            points[:, column] = lookup[counts[:, column]]
+        return ScoredBatch(self.columns, counts, points)
+
+    def score_documents(self, docs):
+        """
+        Score a batch of scouting documents.
+        Args:
+            docs (iterable of dict): Scouting documents.
+        Returns:
+            ScoredBatch: Columnar counts, per-column points and total scores.
+        """
+        return self.score_counts(self.document_counts(docs))
+
+
+def _scalar_counts(phase_data, field):
+    try:
+        return np.fromiter(
+            map(dict.get, phase_data, repeat(field)),
+            dtype=np.int64,
+            count=len(phase_data),
+        )
+    except (TypeError, ValueError):
+        # None or non-numeric values among them
+        return np.array(
+            [values.get(field) or 0 for values in phase_data], dtype=np.int64
+        )
+
+
+def _list_counts(lists, size, name):
+    # Lists that all have `size` numbers are chained into one array; missing lists,
+    # None entries and short lists take the padding path
+    try:
+        if set(map(len, lists)) == {size}:
+            return np.fromiter(
+                chain.from_iterable(lists), dtype=np.int64, count=len(lists) * size
+            ).reshape(len(lists), size)
+    except (TypeError, ValueError):
+        pass
+    return np.array(
+        [[value or 0 for value in _pad(values or (), size, name)] for values in lists],
+        dtype=np.int64,
+    ).reshape(len(lists), size)
+
+
+def _pad(values, size, name):
+    if len(values) == size:
+        return values
+    if len(values) > size:
+        raise ValueError(
+            f"Expected at most {size} values for {name}, got {len(values)}"
+        )
+    return list(values) + [0] * (size - len(values))
+
+
+class ScoredBatch:
+    """
+    Scores of a batch of scouting documents.
+    counts holds the columnar features (dict fields as value codes), points the
+    points earned per column and totals the score of each document.
+    """
+
+    def __init__(self, columns, counts, points):
+        self.columns = columns
+        self.counts = counts
+        self.points = points
+        self.totals = points.sum(axis=1)
+
+    def __len__(self):
+        return len(self.totals)
+
+    def breakdown(self, i):
+        """
+        Get the points per column of one document.
+        Args:
+            i (int): Row of the document in the batch.
+        Returns:
+            dict: {column: points}.
+        """
+        return dict(zip(self.columns, self.points[i].tolist()))
+
+
+def get_rules(season=DEFAULT_SEASON):
+    """
+    Get a season's compiled scoring rules.
+    Args:
+        season (int): Key of RULES.
+    Returns:
+        CompiledRules: Compiled on first use and reused afterwards.
+    """
+    if season not in _compiled:
+        _compiled[season] = CompiledRules(RULES[season])
+    return _compiled[season]
+
+
+def score_documents(docs, season=DEFAULT_SEASON):
+    """
+    Score a batch of scouting documents with one weights product.
+    Args:
+        docs (iterable of dict): Scouting documents.
+        season (int): Season whose rules apply.
+    Returns:
+        ScoredBatch: Columnar counts, per-column points and total scores.
+    """
+    return get_rules(season).score_documents(docs)
+
+
+def score_document(data, season=DEFAULT_SEASON):
+    """
+    Score one scouting document.
+    Args:
+        data (dict): Match data containing auto, teleop, and endgame phases.
+        season (int): Season whose rules apply.
+    Returns:
+        int: The calculated score for the team.
+    """
+    return int(score_documents([data], season).totals[0])
@@ -0,0 +1,368 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import predict
+import std as stdfun
+
+# A batch is evaluated once this many requests are queued or MAX_DELAY seconds after
+# its first request arrived, whichever comes first
+MAX_BATCH = 512
+MAX_DELAY = 0.001
+# Number of recent request latencies the published percentiles are computed over
+LATENCY_WINDOW = 10000
+MAX_BODY = 64 * 1024
+ALLIANCE_SIZE = 3
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class PredictionService:
+    """
+    Answers match prediction queries from in-memory team statistics.
+    Queries that arrive together are collected into one batch and evaluated with a
+    single engine.arrays and predict.batch_win_prediction call, so the cost per query
+    stays small with many clients. The statistics engine comes from the current
+    ScoreStore, so a reloaded or live-updated store is picked up by the next batch.
+    """
+
+    def __init__(
+        self, get_store, rating=None, max_batch=MAX_BATCH, max_delay=MAX_DELAY
+    ):
+        """
+        Args:
+            get_store (callable): Returns the current std.ScoreStore, e.g.
+                partial(std.load_score_store, path) or the store of an ingest service.
+            rating (dict): Keyword arguments of ScoreStore.engine, e.g. {"half_life": 4}.
+            max_batch (int): Most queries evaluated together.
+            max_delay (float): Seconds a query waits for others to join its batch.
+        """
+        self.get_store = get_store
+        self.rating = rating or {}
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._queue = None
+        self._worker = None
+
+    async def start(self):
+        """Start the batching task; must be called from the event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        """Stop the batching task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def predict(
+        self, blue_teams, red_teams, cutoff_q_number=math.inf, include_practice=True
+    ):
+        """
+        Predict one match; waits for the batch it joins to be evaluated.
+        Args:
+            blue_teams (list of str): Team numbers of the blue alliance.
+            red_teams (list of str): Team numbers of the red alliance.
+            cutoff_q_number (float): Only qualification matches before this number are used.
+            include_practice (bool): Whether practice matches are used.
+        Returns:
+            dict: The alliance_win_prediction keys as floats.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(
+            (blue_teams, red_teams, cutoff_q_number, include_practice, future)
+        )
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+            self._evaluate(batch)
+
+    def _evaluate(self, batch):
+        try:
+            results = self.evaluate([query[:4] for query in batch])
+        except Exception:
+            # Evaluate the queries one at a time, so a bad one only fails its own request
+            results = []
+            for query in batch:
+                try:
+                    results.append(self.evaluate([query[:4]])[0])
+                except Exception as e:
+                    results.append(e)
+        self.batches += 1
+        for (*_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def evaluate(self, queries):
+        """
+        Predict many matches with one vectorized evaluation.
+        Args:
+            queries (list of tuple): (blue_teams, red_teams, cutoff_q_number,
+                include_practice) per match.
+        Returns:
+            list of dict: The alliance_win_prediction keys as floats, per query.
+        """
+        engine = self.get_store().engine(**self.rating)
+        blue_teams, red_teams, cutoffs, include = zip(*queries)
+        # One row of statistics per distinct (cutoff, practice) pair in the batch
+        keys = sorted(set(zip(cutoffs, include)))
+        rows = {key: i for i, key in enumerate(keys)}
+        _, means, std_devs = engine.arrays(
+            np.array([key[0] for key in keys], dtype=float),
+            np.array([key[1] for key in keys], dtype=bool),
+        )
+        match_rows = [rows[key] for key in zip(cutoffs, include)]
+        prediction = predict.batch_win_prediction(
+            predict.alliance_indices(blue_teams, engine.team_index),
+            predict.alliance_indices(red_teams, engine.team_index),
+            means[match_rows],
+            std_devs[match_rows],
+        )
+        columns = {key: values.tolist() for key, values in prediction.items()}
+        return [
+            {key: values[i] for key, values in columns.items()}
+            for i in range(len(queries))
+        ]
+
+    def record_latency(self, seconds):
+        self.requests += 1
+        self._latencies.append(seconds)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Request, batch and error counts, and the p50 / p99 latency in
+            milliseconds over the last LATENCY_WINDOW requests.
+        """
+        latencies = np.array(self._latencies) * 1000
+        p50, p99 = (
+            np.percentile(latencies, [50, 99]).tolist()
+            if len(latencies)
+            else (None, None)
+        )
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "errors": self.errors,
+            "mean_batch_size": self.requests / self.batches if self.batches else None,
+            "p50_ms": p50,
+            "p99_ms": p99,
+        }
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection, keeping it open between requests."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get("content-length", "0")
+                if not length.isdecimal():
+                    # Without a valid length the rest of the connection cannot be read
+                    self.errors += 1
+                    await self._respond(
+                        writer, 400, {"error": "invalid Content-Length"}, False
+                    )
+                    break
+                length = int(length)
+                if length > MAX_BODY:
+                    self.errors += 1
+                    await self._respond(
+                        writer, 413, {"error": "request too large"}, False
+                    )
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                status, result = await self._route(request_line.decode("latin-1"), body)
+                if status == 200 and result is not None and "blue_win_prob" in result:
+                    self.record_latency(time.perf_counter() - start)
+                elif status != 200:
+                    self.errors += 1
+                await self._respond(writer, status, result, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, request_line, body):
+        try:
+            return await self._dispatch(request_line, body)
+        except Exception as e:
+            # An unexpected failure answers this request instead of dropping the connection
+            print(f"Error serving {request_line.strip()}: {e!r}")
+            return 500, {"error": "internal server error"}
+
+    async def _dispatch(self, request_line, body):
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            return 400, {"error": "malformed request line"}
+        url = urlsplit(target)
+        if url.path == "/metrics":
+            return 200, self.metrics()
+        if url.path != "/predict":
+            return 404, {"error": f"unknown path {url.path}"}
+        if method == "GET":
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        elif method == "POST":
+            try:
+                query = json.loads(body or b"{}")
+            except ValueError:
+                return 400, {"error": "body is not JSON"}
+        else:
+            return 405, {"error": f"{method} not allowed"}
+
+        try:
+            blue_teams, red_teams, cutoff, include = parse_query(query)
+        except (KeyError, TypeError, ValueError) as e:
+            return 400, {"error": f"invalid query: {e}"}
+        result = await self.predict(blue_teams, red_teams, cutoff, include)
+        return 200, result
+
+    async def _respond(self, writer, status, result, keep_alive):
+        payload = json.dumps(result).encode()
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode()
+            + payload
+        )
+        await writer.drain()
+
+
+def parse_query(query):
+    """
+    Read a prediction query from request parameters.
+    Args:
+        query (dict): "blue" and "red" team lists of three teams each (numbers or
+            "frc" keys, as a list or comma-separated), and optional "cutoff"
+            (qualification number, default all matches) and "include_practice"
+            (default true).
+    Returns:
+        tuple: (blue_teams, red_teams, cutoff_q_number, include_practice).
+    """
+    alliances = []
+    for alliance in ("blue", "red"):
+        teams = query[alliance]
+        if isinstance(teams, str):
+            teams = teams.split(",")
+        teams = [str(team).strip().replace("frc", "") for team in teams]
+        teams = [team for team in teams if team]
+        if len(teams) != ALLIANCE_SIZE:
+            raise ValueError(
+                f"{alliance} needs {ALLIANCE_SIZE} teams, got {len(teams)}"
+            )
+        alliances.append(teams)
+    cutoff = query.get("cutoff")
+    cutoff = math.inf if cutoff in (None, "") else float(cutoff)
+    include = query.get("include_practice", True)
+    if isinstance(include, str):
+        include = include.lower() not in ("0", "false", "no")
+    return alliances[0], alliances[1], cutoff, bool(include)
+
+
+async def serve(service, host="127.0.0.1", port=8502):
+    """
+    Run the HTTP server until cancelled.
+    Args:
+        service (PredictionService): The service answering the requests.
+        host (str): Interface to listen on.
+        port (int): Port to listen on.
+    """
+    await service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Serving predictions on http://{host}:{port}/predict")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="HTTP service answering match predictions from in-memory team statistics."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--scores", default=None, help="score store to read")
+    parser.add_argument(
+        "--event",
+        default=None,
+        help="event whose scores are used; raw_data.EVENT_KEY by default",
+    )
+    parser.add_argument(
+        "--half-life", type=float, help="exponentially weighted ratings"
+    )
+    parser.add_argument("--window", type=int, help="only each team's last N matches")
+    parser.add_argument("--max-delay", type=float, default=MAX_DELAY * 1000, help="ms")
+    args = parser.parse_args()
+
+    rating = {}
+    if args.half_life:
+        rating["half_life"] = args.half_life
+    if args.window:
+        rating["window"] = args.window
+    get_store = partial(stdfun.load_score_store, args.scores, event=args.event)
+    get_store()  # Fail early if there is no score data
+    service = PredictionService(get_store, rating, max_delay=args.max_delay / 1000)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
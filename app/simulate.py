@@ -0,0 +1,308 @@
+import math
+
+import numpy as np
+
+import columnar
+import scoring
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class TeamHistory:
+    """
+    Every practice and qualification score row of one event, grouped by team, from
+    which score models for any cutoff are built. Rows may carry per-component counts
+    (see scoring.CompiledRules.columns), which the component model needs.
+    """
+
+    def __init__(
+        self, match_types, match_numbers, teams, totals, counts=None, components=()
+    ):
+        match_types = np.asarray(match_types, dtype=str)
+        keep = (match_types == "Practice") | (match_types == "Qualifications")
+        self.teams, team_codes = np.unique(
+            np.asarray(teams, dtype=str)[keep], return_inverse=True
+        )
+        self.teams = self.teams.tolist()
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.components = list(components)
+        self._team = team_codes.reshape(-1)
+        self._practice = match_types[keep] == "Practice"
+        self._match_number = np.asarray(match_numbers, dtype=np.int64)[keep]
+        self._total = np.asarray(totals, dtype=np.int64)[keep]
+        self._counts = None
+        if counts is not None and self.components:
+            self._counts = np.asarray(counts, dtype=np.int64)[keep]
+
+    @classmethod
+    def from_store(cls, store):
+        """
+        Args:
+            store (std.ScoreStore): Scores of one event; totals only.
+        Returns:
+            TeamHistory: The store's rows.
+        """
+        rows = [
+            (match.match_type, match.match_number, team, score)
+            for match in store.matches
+            for team, score in match.scores.items()
+        ]
+        return cls(*zip(*rows)) if rows else cls([], [], [], [])
+
+    @classmethod
+    def from_columnar(cls, path, event):
+        """
+        Args:
+            path (str): Directory of a columnar score store.
+            event (str): Event key.
+        Returns:
+            TeamHistory: The event's rows, with per-component counts.
+        """
+        store = columnar.ColumnarScores(path)
+        rows = store.rows(
+            event, ("match_type", "match_number", "team", "total", "counts")
+        )
+        return cls(
+            rows["match_type"],
+            rows["match_number"],
+            rows["team"],
+            rows["total"],
+            counts=rows["counts"],
+            components=store.components,
+        )
+
+    def _selected(self, cutoff_q_number, include_practice):
+        selected = ~self._practice & (self._match_number < cutoff_q_number)
+        if include_practice:
+            selected |= self._practice
+        return selected
+
+    def bootstrap(self, cutoff_q_number=math.inf, include_practice=True):
+        """
+        Model each team's score as a draw from its own past scores.
+        Args:
+            cutoff_q_number (int): Only qualification matches before this number are used.
+            include_practice (bool): Whether practice matches are used.
+        Returns:
+            BootstrapModel: Model over the selected rows.
+        """
+        selected = self._selected(cutoff_q_number, include_practice)
+        team = self._team[selected]
+        order = np.argsort(team, kind="stable")
+        team = team[order]
+        counts = np.bincount(team, minlength=len(self.teams))
+        # Position of each row within its team's history
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        column = np.arange(len(team)) - starts[team]
+        values = np.zeros((len(self.teams) + 1, max(counts.max(initial=0), 1)))
+        values[team, column] = self._total[selected][order]
+        return BootstrapModel(values, np.append(counts, 0))
+
+    def components_model(
+        self,
+        cutoff_q_number=math.inf,
+        include_practice=True,
+        season=scoring.DEFAULT_SEASON,
+    ):
+        """
+        Model each team's score as the sum of fitted per-component distributions.
+        Args:
+            cutoff_q_number (int): Only qualification matches before this number are used.
+            include_practice (bool): Whether practice matches are used.
+            season (int): Season whose rules (scoring.RULES) score the components.
+        Returns:
+            ComponentModel: Model over the selected rows.
+        """
+        rules = scoring.get_rules(season)
+        if self._counts is None or self.components != rules.columns:
+            raise ValueError(
+                f"Per-component counts for the {season} rules are not available"
+            )
+        selected = self._selected(cutoff_q_number, include_practice)
+        team = self._team[selected]
+        counts = self._counts[selected]
+        matches = np.bincount(team, minlength=len(self.teams) + 1)
+
+        count_columns = [c for c in range(len(rules.columns)) if c not in rules.lookups]
+        rates = np.zeros((len(self.teams) + 1, len(count_columns)))
+        np.add.at(rates, team, counts[:, count_columns])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.where(matches[:, None] > 0, rates / matches[:, None], 0.0)
+
+        categories = {}
+        for column, (codes, points) in rules.lookups.items():
+            frequency = np.zeros((len(self.teams) + 1, len(points)))
+            np.add.at(frequency, (team, counts[:, column]), 1)
+            # Teams without data always get code 0, which scores no points
+            frequency[matches == 0, 0] = 1
+            categories[column] = (
+                frequency / frequency.sum(axis=1, keepdims=True),
+                points,
+            )
+        return ComponentModel(rates, rules.weights[count_columns], categories)
+
+
+class BootstrapModel:
+    """
+    Resamples every team's past scores. values holds one row per team (plus a
+    zero row for unknown teams) padded to the longest history; counts holds how
+    many entries of each row are real.
+    """
+
+    def __init__(self, values, counts):
+        self.values = values
+        self.counts = counts
+
+    def alliance_scores(self, rng, teams, samples):
+        """
+        Draw alliance scores.
+        Args:
+            rng (numpy.random.Generator): Random generator.
+            teams (numpy.ndarray): Team indices of shape (matches, 3); -1 means no data.
+            samples (int): Draws per match.
+        Returns:
+            numpy.ndarray: Alliance scores of shape (matches, samples).
+        """
+        teams = np.where(teams < 0, len(self.values) - 1, teams)
+        # A team without history draws index 0 of its all-zero row
+        counts = np.maximum(self.counts[teams], 1)[:, None, :]
+        draws = (rng.random((len(teams), samples, teams.shape[1])) * counts).astype(
+            np.intp
+        )
+        return self.values[teams[:, None, :], draws].sum(axis=2)
+
+
+class ComponentModel:
+    """
+    Counted actions (coral levels, net, processor) are Poisson with each team's mean
+    count, and yes/no fields such as leave and endgame-style fields are categorical
+    with each team's observed frequencies. Components are independent, so an alliance's score
+    distribution is the convolution of its components' distributions; it is built
+    once per match and every sample is a single inverse-CDF draw from it.
+    """
+
+    def __init__(self, rates, weights, categories):
+        self.rates = rates
+        self.weights = weights
+        self.categories = categories
+
+    def alliance_distribution(self, teams):
+        """
+        Get the score distribution of each alliance.
+        Args:
+            teams (numpy.ndarray): Team indices of shape (matches, 3); -1 means no data.
+        Returns:
+            numpy.ndarray: Array of shape (matches, scores) whose row i holds the
+            probability of each score 0, 1, ... for match i.
+        """
+        teams = np.where(teams < 0, len(self.rates) - 1, teams)
+        # The alliance's counts are Poisson with the summed team means, and counts of
+        # the same weight add up to one Poisson variable per weight
+        weights = np.unique(self.weights[self.weights > 0])
+        alliance_rates = np.stack(
+            [
+                self.rates[teams][:, :, self.weights == w].sum(axis=(1, 2))
+                for w in weights
+            ],
+            axis=1,
+        )
+        distributions = []
+        for i in range(len(teams)):
+            distribution = np.ones(1)
+            for weight, rate in zip(weights.tolist(), alliance_rates[i].tolist()):
+                if rate > 0:
+                    distribution = np.convolve(
+                        distribution, _weighted_poisson(rate, weight)
+                    )
+            for probabilities, points in self.categories.values():
+                for team in teams[i].tolist():
+                    distribution = np.convolve(
+                        distribution, np.bincount(points, probabilities[team])
+                    )
+            distributions.append(distribution)
+
+        result = np.zeros((len(teams), max(map(len, distributions), default=1)))
+        for i, distribution in enumerate(distributions):
+            result[i, : len(distribution)] = distribution
+        return result
+
+    def alliance_scores(self, rng, teams, samples):
+        """
+        Draw alliance scores.
+        Args:
+            rng (numpy.random.Generator): Random generator.
+            teams (numpy.ndarray): Team indices of shape (matches, 3); -1 means no data.
+            samples (int): Draws per match.
+        Returns:
+            numpy.ndarray: Alliance scores of shape (matches, samples).
+        """
+        distribution = self.alliance_distribution(teams)
+        matches, width = distribution.shape
+        cumulative = np.cumsum(distribution, axis=1)
+        cumulative /= cumulative[:, -1:]
+        # Offset every match's CDF by its row number, so one searchsorted over the
+        # flattened rows inverts all of them
+        rows = np.arange(matches)[:, None]
+        flat = (cumulative + rows).ravel()
+        draws = rng.random((matches, samples)) + rows
+        scores = np.searchsorted(flat, draws.ravel()).reshape(matches, samples)
+        return np.minimum(scores - rows * width, width - 1)
+
+
+def _weighted_poisson(rate, weight):
+    # Poisson probabilities of weight * count, truncated far out in the tail
+    k = np.arange(int(rate + 10 * math.sqrt(rate)) + 10)
+    log_factorial = np.concatenate([[0.0], np.cumsum(np.log(k[1:]))])
+    result = np.zeros(len(k) * weight - weight + 1)
+    result[::weight] = np.exp(k * math.log(rate) - rate - log_factorial)
+    return result
+
+
+def simulate_schedule(
+    model, blue_teams, red_teams, samples=10000, seed=None, quantiles=QUANTILES
+):
+    """
+    Simulate every match of a schedule at once.
+    Args:
+        model (BootstrapModel or ComponentModel): Team score model.
+        blue_teams (numpy.ndarray): Team indices of shape (matches, 3); -1 means no data.
+        red_teams (numpy.ndarray): Team indices of shape (matches, 3); -1 means no data.
+        samples (int): Simulations per match.
+        seed (int or numpy.random.Generator): Seed for reproducible results.
+        quantiles (tuple of float): Score quantiles to report.
+    Returns:
+        dict: Arrays of shape (matches,) for "blue_avg", "red_avg", "blue_win_prob",
+        "red_win_prob" and "tie_prob", and (matches, len(quantiles)) for
+        "blue_quantiles" and "red_quantiles".
+    """
+    rng = np.random.default_rng(seed)
+    blue = model.alliance_scores(rng, np.asarray(blue_teams), samples)
+    red = model.alliance_scores(rng, np.asarray(red_teams), samples)
+    return {
+        "blue_avg": blue.mean(axis=1),
+        "red_avg": red.mean(axis=1),
+        "blue_win_prob": (blue > red).mean(axis=1),
+        "red_win_prob": (blue < red).mean(axis=1),
+        "tie_prob": (blue == red).mean(axis=1),
+        "blue_quantiles": np.quantile(blue, quantiles, axis=1).T,
+        "red_quantiles": np.quantile(red, quantiles, axis=1).T,
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    import std as stdfun
+    import tba
+
+    event = tba.get_event_data("2025casd")
+    history = TeamHistory.from_store(stdfun.load_score_store(event=event.event_key))
+    blue_teams, red_teams = event.alliance_indices(history.team_index)
+    start = time.perf_counter()
+    result = simulate_schedule(history.bootstrap(), blue_teams, red_teams, seed=0)
+    print(f"Simulated {len(event)} matches in {time.perf_counter() - start:.2f}s")
+    for i, match_number in enumerate(event.match_numbers.tolist()):
+        print(
+            f"Q{match_number}: blue {result['blue_win_prob'][i]:.1%}, "
+            f"red {result['red_win_prob'][i]:.1%}, tie {result['tie_prob'][i]:.1%}"
+        )
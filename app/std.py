@@ -1,59 +1,484 @@
 import json
 import math
+import os
+import threading
+from collections import namedtuple
 
+import numpy as np
 
-def calculate_team_stats(
-    cutoff_q_number, json_path="app/match_team_scores.json", use_practice_before=math.inf
-):
+import columnar
+import profiling
+import ratings
+import raw_data
+
+# One parsed entry of the score file: match type ("Practice", "Qualifications", ...),
+# match number as an int and a {team_number: score} dict.
+MatchScores = namedtuple("MatchScores", ["match_type", "match_number", "scores"])
+
+# Columnar score store written by raw_data.py; the JSON file is the older format
+SCORES_PATH = "app/match_team_scores"
+LEGACY_SCORES_PATH = "app/match_team_scores.json"
+
+# Loaded stores keyed by (absolute path, event): {key: (mtime_ns, ScoreStore)}
+_stores = {}
+
+
+class ScoreStore:
+    """
+    In-memory index of per-team match scores.
+    Match ids are parsed once into MatchScores entries, and team statistics are
+    cached per (cutoff, practice included) so repeated queries are dictionary lookups.
+    source names where the scores come from, and version identifies the data the
+    store holds (the score file's mtime, or a counter bumped by apply_scores).
+    The store can be updated from another thread while it is being read.
+    """
+
+    def __init__(self, matches=(), version=0, source=""):
+        self.matches = list(matches)
+        self.version = version
+        self._first_version = version
+        self.source = source
+        self._engines = {}
+        self._stats_cache = {}
+        self._changes = []  # (version, team_number) for every applied update
+        self._lock = threading.Condition()
+
+    @classmethod
+    def from_match_scores(cls, match_scores, **kwargs):
+        """
+        Build a store from the {match_id: {team_number: score}} layout used by
+        match_team_scores.json.
+        Args:
+            match_scores (dict): Scores keyed by match id such as "Qualifications_12".
+            **kwargs: Passed on to ScoreStore, e.g. version and source.
+        Returns:
+            ScoreStore: The parsed store. Invalid match ids are reported and skipped.
+        """
+        matches = []
+        for match_id, teams in match_scores.items():
+            parsed = parse_match_id(match_id)
+            if parsed is None:
+                continue
+            match_type, match_number = parsed
+            matches.append(MatchScores(match_type, match_number, teams))
+        return cls(matches, **kwargs)
+
+    @classmethod
+    def from_columns(cls, match_types, match_numbers, teams, totals, **kwargs):
+        """
+        Build a store from score rows, such as those of a columnar store.
+        Args:
+            match_types (list of str): Match type of each row.
+            match_numbers (list of int): Match number of each row.
+            teams (list of str): Team number of each row.
+            totals (list of int): Score of each row.
+            **kwargs: Passed on to ScoreStore, e.g. version and source.
+        Returns:
+            ScoreStore: The store.
+        """
+        by_match = {}
+        for match_type, match_number, team_number, score in zip(
+            match_types, match_numbers, teams, totals
+        ):
+            by_match.setdefault((match_type, match_number), {})[team_number] = score
+        matches = [
+            MatchScores(match_type, match_number, scores)
+            for (match_type, match_number), scores in by_match.items()
+        ]
+        return cls(matches, **kwargs)
+
+    def cache_key(self):
+        return (self.source, self.version)
+
+    def apply_scores(self, updates):
+        """
+        Set or remove team scores and bump the version once for the whole batch.
+        Args:
+            updates (list of tuple): (match_id, team_number, score) entries; a score
+                of None removes the team from the match.
+        Returns:
+            int: The new version.
+        """
+        with self._lock:
+            by_match = {
+                (match.match_type, match.match_number): match for match in self.matches
+            }
+            changes = []  # (match_type, match_number, team_number, old, new score)
+            for match_id, team_number, score in updates:
+                parsed = parse_match_id(match_id)
+                if parsed is None:
+                    continue
+                match = by_match.get(parsed)
+                scores = dict(match.scores) if match is not None else {}
+                old_score = scores.get(team_number)
+                if score is None:
+                    scores.pop(team_number, None)
+                else:
+                    scores[team_number] = score
+                by_match[parsed] = MatchScores(parsed[0], parsed[1], scores)
+                if old_score != score:
+                    changes.append(
+                        (parsed[0], parsed[1], team_number, old_score, score)
+                    )
+
+            self.matches = [match for match in by_match.values() if match.scores]
+            self.version += 1
+            self._changes.extend(
+                (self.version, team) for team in {change[2] for change in changes}
+            )
+            # Engines take only the changed scores; one that cannot is rebuilt on next use
+            engines = {}
+            for key, engine in self._engines.items():
+                engine = engine.with_scores(changes)
+                if engine is not None:
+                    engines[key] = engine
+            self._engines = engines
+            self._stats_cache = {}
+            self._lock.notify_all()
+            return self.version
+
+    def changed_teams(self, since_version):
+        """
+        Get the teams whose scores changed after a version.
+        Args:
+            since_version: A version previously read from the store.
+        Returns:
+            set: Team numbers updated by apply_scores since that version, or None if
+            the version is not one of this store's, e.g. the store was reloaded since,
+            so any team may have changed.
+        """
+        with self._lock:
+            if since_version is None or not (
+                self._first_version <= since_version <= self.version
+            ):
+                return None
+            return {team for version, team in self._changes if version > since_version}
+
+    def wait_for_update(self, version, timeout=None):
+        """
+        Block until the store is newer than a version.
+        Args:
+            version: A version previously read from the store.
+            timeout (float): Seconds to wait at most.
+        Returns:
+            bool: True if the store was updated.
+        """
+        with self._lock:
+            return self._lock.wait_for(lambda: self.version != version, timeout)
+
+    def engine(self, half_life=None, window=None):
+        """
+        Get the statistics engine for the current matches.
+        Args:
+            half_life (float): Weight recent matches more, halving a score's weight
+                after this many newer matches of the team (see ratings.RatingTracker).
+            window (int): Only use each team's last this many matches.
+        Returns:
+            TeamStatsEngine or ratings.RatingEngine: The prefix-sum engine with equal
+            weights, otherwise a rating engine. Built on first use, and updated with
+            the changed scores by apply_scores.
+        """
+        key = (half_life, window)
+        with self._lock:
+            engine = self._engines.get(key)
+            profiling.cache("std.engine", engine is not None)
+            if engine is None:
+                with profiling.stage("std.engine"):
+                    if half_life is None and window is None:
+                        engine = TeamStatsEngine(self.matches)
+                    else:
+                        engine = ratings.RatingEngine(self.matches, half_life, window)
+                self._engines[key] = engine
+            return engine
+
+    def team_stats(self, cutoff_q_number, use_practice_before=math.inf):
+        """
+        Get team statistics for a qualification cutoff.
+        Args:
+            cutoff_q_number (int): Only qualification matches before this number are used.
+            use_practice_before (int): Practice matches are used when the cutoff is at or below this number.
+        Returns:
+            dict: {team_number: {"average": float, "std_dev": float}}. The dict is shared
+            between callers with the same arguments and must not be modified.
+        """
+        include_practice = cutoff_q_number <= use_practice_before
+        key = (cutoff_q_number, include_practice)
+        with self._lock:
+            engine = self.engine()
+            cache = self._stats_cache
+        stats = cache.get(key)
+        profiling.cache("std.team_stats", stats is not None)
+        if stats is None:
+            with profiling.stage("std.team_stats"):
+                stats = engine.team_stats(cutoff_q_number, include_practice)
+            cache[key] = stats
+        return stats
+
+
+class TeamStatsEngine:
+    """
+    Running per-team count / sum / sum of squares over qualification matches in
+    match-number order, so the statistics for any cutoff are an O(teams) lookup.
+    Row k of the cumulative arrays covers the first k qualification matches; practice
+    matches are kept as a separate total that is added when they are included.
+    """
+
+    def __init__(self, matches):
+        self.teams = sorted({team for match in matches for team in match.scores})
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.qualification_numbers = np.array(
+            sorted(
+                {
+                    match.match_number
+                    for match in matches
+                    if match.match_type == "Qualifications"
+                }
+            ),
+            dtype=np.int64,
+        )
+
+        team_count = len(self.teams)
+        self._practice = np.zeros((3, team_count))
+        self._per_match = np.zeros((3, len(self.qualification_numbers) + 1, team_count))
+        for match in matches:
+            for team_number, score in match.scores.items():
+                self._add(match.match_type, match.match_number, team_number, score, 1)
+        self._cumulative = np.cumsum(self._per_match, axis=1)
+
+    def _add(self, match_type, match_number, team_number, score, sign):
+        if match_type == "Practice":
+            totals = self._practice
+        elif match_type == "Qualifications":
+            row = np.searchsorted(self.qualification_numbers, match_number)
+            totals = self._per_match[:, row + 1]
+        else:
+            return
+        i = self.team_index[team_number]
+        totals[0, i] += sign
+        totals[1, i] += sign * score
+        totals[2, i] += sign * score * score
+
+    def with_scores(self, changes):
+        """
+        Get the engine for the scores after some changes, moving these per-match
+        totals over instead of adding up every match again. This engine is left as
+        it is for readers still using it.
+        Args:
+            changes (list of tuple): (match_type, match_number, team_number, old_score,
+                new_score) per changed score; None where there was or is no score.
+        Returns:
+            TeamStatsEngine: The updated engine. Teams whose scores were all removed
+            keep a column with a count of 0.
+        """
+        engine = TeamStatsEngine([])
+        engine.teams = sorted(
+            set(self.teams)
+            | {team for _, _, team, _, score in changes if score is not None}
+        )
+        engine.team_index = {team: i for i, team in enumerate(engine.teams)}
+        engine.qualification_numbers = np.union1d(
+            self.qualification_numbers,
+            [
+                number
+                for match_type, number, _, _, score in changes
+                if match_type == "Qualifications" and score is not None
+            ],
+        ).astype(np.int64)
+
+        columns = np.array([engine.team_index[team] for team in self.teams], dtype=int)
+        rows = np.concatenate(
+            [
+                [0],
+                np.searchsorted(
+                    engine.qualification_numbers, self.qualification_numbers
+                )
+                + 1,
+            ]
+        )
+        team_count = len(engine.teams)
+        engine._practice = np.zeros((3, team_count))
+        engine._practice[:, columns] = self._practice
+        engine._per_match = np.zeros(
+            (3, len(engine.qualification_numbers) + 1, team_count)
+        )
+        engine._per_match[:, rows[:, None], columns] = self._per_match
+        for match_type, match_number, team_number, old_score, new_score in changes:
+            if old_score is not None:
+                engine._add(match_type, match_number, team_number, old_score, -1)
+            if new_score is not None:
+                engine._add(match_type, match_number, team_number, new_score, 1)
+        engine._cumulative = np.cumsum(engine._per_match, axis=1)
+        return engine
+
+    def totals(self, cutoff_q_number, include_practice):
+        """
+        Get each team's count, sum and sum of squares for one or more cutoffs.
+        Args:
+            cutoff_q_number (int or array): Only qualification matches before this number are used.
+            include_practice (bool or array): Whether practice matches are included, per cutoff.
+        Returns:
+            numpy.ndarray: Array of shape (3, teams), or (3, cutoffs, teams) for an array
+            of cutoffs, holding count, sum and sum of squares.
+        """
+        row = np.searchsorted(self.qualification_numbers, cutoff_q_number)
+        # One practice flag per cutoff, and the practice totals broadcast over cutoffs
+        include_practice = np.broadcast_to(include_practice, np.shape(row))
+        practice = self._practice.reshape((3,) + (1,) * np.ndim(row) + (-1,))
+        return self._cumulative[:, row] + practice * include_practice[..., None]
+
+    def arrays(self, cutoff_q_number, include_practice):
+        """
+        Get each team's match count, mean and sample standard deviation for one or more cutoffs.
+        Args:
+            cutoff_q_number (int or array): Only qualification matches before this number are used.
+            include_practice (bool or array): Whether practice matches are included, per cutoff.
+        Returns:
+            tuple: (count, mean, std_dev) arrays aligned with self.teams, with a leading
+            cutoff axis when an array of cutoffs is given. Teams without data have a mean
+            and standard deviation of 0, as in calculate_stats.
+        """
+        count, total, total_sq = self.totals(cutoff_q_number, include_practice)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(count > 0, total / count, 0.0)
+            variance = np.where(
+                count > 1,
+                (count * total_sq - total * total) / (count * (count - 1)),
+                0.0,
+            )
+        std_dev = np.sqrt(np.maximum(variance, 0.0))
+        return count, mean, std_dev
+
+    def team_stats(self, cutoff_q_number, include_practice):
+        """
+        Get team statistics for a cutoff in the calculate_team_stats format.
+        Args:
+            cutoff_q_number (int): Only qualification matches before this number are used.
+            include_practice (bool): Whether practice matches are included.
+        Returns:
+            dict: {team_number: {"average": float, "std_dev": float}} for teams with data.
+        """
+        count, mean, std_dev = self.arrays(cutoff_q_number, include_practice)
+        result = {}
+        for i in np.flatnonzero(count).tolist():
+            result[self.teams[i]] = {
+                "average": mean[i].item(),
+                "std_dev": std_dev[i].item(),
+            }
+        return result
+
+
+def parse_match_id(match_id):
+    """
+    Split a match id such as "Qualifications_12" into its type and number.
+    Args:
+        match_id (str): The match id from the score file.
+    Returns:
+        tuple: (match_type, match_number), or None if the id is invalid.
+    """
+    parts = match_id.split("_")
+    if len(parts) != 2:
+        print(f"Invalid match_id：{match_id}")
+        return None
+
+    match_type, match_number_str = parts
+    try:
+        match_number = int(match_number_str)
+    except ValueError:
+        print(f"Invalid match number{match_number_str}")
+        return None
+    return match_type, match_number
+
+
+def scores_path(json_path=None):
+    """
+    Get the score data load_score_store reads.
+    Args:
+        json_path (str): A columnar store directory or a JSON score file, or None.
+    Returns:
+        str: json_path, or SCORES_PATH if it is None and a columnar store exists,
+        otherwise LEGACY_SCORES_PATH.
+    """
+    if json_path is not None:
+        return json_path
+    return SCORES_PATH if os.path.isdir(SCORES_PATH) else LEGACY_SCORES_PATH
+
+
+@profiling.timed("std.load_score_store")
+def load_score_store(json_path=None, event=None):
+    """
+    Load match scores into a ScoreStore, reusing the previous store until the
+    data is written again.
+    Args:
+        json_path (str): A columnar store directory or a JSON score file. Defaults to
+            SCORES_PATH, or LEGACY_SCORES_PATH if there is no columnar store.
+        event (str): Event whose rows of a columnar store are used; defaults to
+            raw_data.EVENT_KEY. A JSON score file holds a single event and has no
+            event rows to choose from.
+    Returns:
+        ScoreStore: The store for the data's current contents.
+    """
+    if event is None:
+        event = raw_data.EVENT_KEY
+    path = os.path.abspath(scores_path(json_path))
+    columnar_store = os.path.isdir(path)
+    # Two writes within the file system's timestamp granularity share an mtime, so
+    # the stamp also holds the columnar version directory (new on every write) or
+    # the JSON file's size and inode (new when it is replaced)
+    if columnar_store:
+        mtime = columnar.modified_ns(path)
+        stamp = (mtime, columnar.current_dir(path))
+    else:
+        stat = os.stat(path)
+        mtime = stat.st_mtime_ns
+        stamp = (mtime, stat.st_size, stat.st_ino)
+    key = (path, event)
+    cached = _stores.get(key)
+    profiling.cache("std.load_score_store", cached is not None and cached[0] == stamp)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    # Versions only grow, so caches keyed on the version see the new data
+    version = mtime if cached is None else max(mtime, cached[1].version + 1)
+
+    source = f"{path}#{event}"
+    if columnar_store:
+        rows = columnar.ColumnarScores(path).rows(event)
+        store = ScoreStore.from_columns(
+            rows["match_type"],
+            rows["match_number"].tolist(),
+            rows["team"],
+            rows["total"].tolist(),
+            version=version,
+            source=source,
+        )
+    else:
+        with open(path, "r") as f:
+            match_scores = json.load(f)
+        store = ScoreStore.from_match_scores(
+            match_scores, version=version, source=source
+        )
+    _stores[key] = (stamp, store)
+    return store
+
+
+def clear_cache():
+    """Forget the stores load_score_store reuses, so the next call reads the data again."""
+    _stores.clear()
+
+
+@profiling.timed("std.calculate_team_stats")
+def calculate_team_stats(cutoff_q_number, json_path=None, use_practice_before=math.inf):
     """
     Calculate team statistics from match scores.
     Args:
         cutoff_q_number (int): The cutoff match number for qualifications.
-        json_path (str): Path to the JSON file containing match scores.
+        json_path (str): Columnar store directory or JSON file with the match scores;
+            see load_score_store for the default.
         use_practice_before (int): The match number before which practice matches are included.
     Returns:
         dict: A dictionary containing team numbers as keys and their average scores and standard deviations as values.
     """
-    with open(json_path, "r") as f:
-        match_scores = json.load(f)
-
-    team_scores = {}
-
-    raw_log = {}
-
-    for match_id, teams in match_scores.items():
-        parts = match_id.split("_")
-        if len(parts) != 2:
-            print(f"Invalid match_id：{match_id}")
-            continue
-
-        match_type, match_number_str = parts
-        try:
-            match_number = int(match_number_str)
-        except ValueError:
-            print(f"Invalid match number{match_number_str}")
-            continue
-
-        include_match = (
-            match_type == "Practice" and cutoff_q_number <= use_practice_before
-        ) or (match_type == "Qualifications" and match_number < cutoff_q_number)
-
-        if not include_match:
-            continue
-
-        for team_number, score in teams.items():
-            if team_number not in team_scores:
-                team_scores[team_number] = []
-            team_scores[team_number].append(score)
-            if team_number not in raw_log:
-                raw_log[team_number] = []
-            raw_log[team_number].append({"match_id": match_id, "score": score})
-
-    result = {}
-    for team_number, scores in team_scores.items():
-        mean, std_dev = calculate_stats(scores)
-        result[team_number] = {"average": mean, "std_dev": std_dev}
-    return result
+    store = load_score_store(json_path)
+    return store.team_stats(cutoff_q_number, use_practice_before)
 
 
 def calculate_stats(scores):
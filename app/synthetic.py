@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+# Team score model: each team's average is drawn from a normal distribution and its
+# match-to-match spread from a uniform one; scores are rounded and never negative
+TEAM_MEAN = 30.0
+TEAM_MEAN_SPREAD = 12.0
+TEAM_STD_RANGE = (4.0, 12.0)
+# Points an alliance scores beyond its scouted team scores, e.g. fouls
+ALLIANCE_NOISE = 5.0
+WIN_RP = 3
+TIE_RP = 1
+BONUS_RPS = 3
+# Scouting document model: Poisson counts per counted field and the endgame results
+# with these probabilities
+AUTO_CORAL_RATES = (0.6, 0.3, 0.3, 0.5)  # L1, L2, L3, L4
+TELEOP_CORAL_RATES = (1.5, 1.2, 1.2, 1.5)
+BARGE_STATUSES = {
+    "Did Not Attempt": 0.2,
+    "Park": 0.3,
+    "Success Shallow Cage": 0.2,
+    "Success Deep Cage": 0.3,
+}
+
+
+def generate_event(
+    matches=80,
+    teams=None,
+    practice_matches=10,
+    scouted=1.0,
+    event_key="2025synth",
+    seed=0,
+):
+    """
+    Generate a synthetic event with a balanced qualification schedule.
+    Args:
+        matches (int): Number of qualification matches.
+        teams (int): Number of teams; defaults to about 12 matches per team, at least 24.
+        practice_matches (int): Number of practice matches in the score data.
+        scouted (float): Fraction of teams that have scouting data.
+        event_key (str): Event key of the generated matches.
+        seed (int): Seed for reproducible events.
+    Returns:
+        tuple: (tba_matches, match_scores). tba_matches is a list of matches shaped
+        like the TBA /event/{key}/matches response, match_scores is the
+        {match_id: {team_number: score}} layout of match_team_scores.json.
+    """
+    rng = np.random.default_rng(seed)
+    if teams is None:
+        teams = max(24, matches // 2)
+    if teams < 6:
+        raise ValueError("An event needs at least 6 teams")
+    numbers = sorted(
+        rng.choice(np.arange(1, 10000), size=teams, replace=False).tolist()
+    )
+    numbers = [str(number) for number in numbers]
+    means = np.maximum(rng.normal(TEAM_MEAN, TEAM_MEAN_SPREAD, teams), 0)
+    std_devs = rng.uniform(*TEAM_STD_RANGE, teams)
+    scouted_teams = set(
+        rng.choice(teams, size=round(teams * scouted), replace=False).tolist()
+    )
+
+    def schedule(count):
+        # Teams with the fewest matches so far play next, in random order
+        appearances = np.zeros(teams)
+        result = []
+        for _ in range(count):
+            order = np.lexsort((rng.random(teams), appearances))
+            playing = rng.permutation(order[:6])
+            appearances[playing] += 1
+            result.append((playing[:3], playing[3:]))
+        return result
+
+    def team_scores(playing):
+        scores = rng.normal(means[playing], std_devs[playing])
+        return np.maximum(np.round(scores), 0).astype(int)
+
+    match_scores = {}
+    for number, (blue, red) in enumerate(schedule(practice_matches), start=1):
+        playing = np.concatenate([blue, red])
+        match_scores[f"Practice_{number}"] = {
+            numbers[team]: score
+            for team, score in zip(playing.tolist(), team_scores(playing).tolist())
+            if team in scouted_teams
+        }
+
+    tba_matches = []
+    for number, (blue, red) in enumerate(schedule(matches), start=1):
+        match_id = f"Qualifications_{number}"
+        match_scores[match_id] = {}
+        alliances = {}
+        for alliance, playing in (("blue", blue), ("red", red)):
+            scores = team_scores(playing)
+            for team, score in zip(playing.tolist(), scores.tolist()):
+                if team in scouted_teams:
+                    match_scores[match_id][numbers[team]] = score
+            noise = max(round(rng.normal(0, ALLIANCE_NOISE)), -int(scores.sum()))
+            alliances[alliance] = {
+                "score": int(scores.sum()) + noise,
+                "team_keys": [f"frc{numbers[team]}" for team in playing.tolist()],
+                "surrogate_team_keys": [],
+                "dq_team_keys": [],
+            }
+        blue_score = alliances["blue"]["score"]
+        red_score = alliances["red"]["score"]
+        winner = (
+            "blue"
+            if blue_score > red_score
+            else "red" if red_score > blue_score else ""
+        )
+        breakdown = {}
+        for alliance in ("blue", "red"):
+            rp = WIN_RP if winner == alliance else TIE_RP if not winner else 0
+            rp += int(rng.binomial(BONUS_RPS, 0.4))
+            breakdown[alliance] = {
+                "totalPoints": alliances[alliance]["score"],
+                "rp": rp,
+            }
+        tba_matches.append(
+            {
+                "key": f"{event_key}_qm{number}",
+                "event_key": event_key,
+                "comp_level": "qm",
+                "set_number": 1,
+                "match_number": number,
+                "alliances": alliances,
+                "winning_alliance": winner,
+                "score_breakdown": breakdown,
+            }
+        )
+    # Matches without scouted teams have no scouting documents
+    return tba_matches, {key: value for key, value in match_scores.items() if value}
+
+
+def generate_documents(count, seed=0):
+    """
+    Generate scouting documents in the layout of the Firestore match forms.
+    Args:
+        count (int): Number of documents.
+        seed (int): Seed for reproducible documents.
+    Returns:
+        list of dict: Documents with auto, teleop and endgame phases.
+    """
+    rng = np.random.default_rng(seed)
+    leave = (rng.random(count) < 0.8).tolist()
+    auto_coral = rng.poisson(AUTO_CORAL_RATES, (count, 4)).tolist()
+    teleop_coral = rng.poisson(TELEOP_CORAL_RATES, (count, 4)).tolist()
+    net = rng.poisson((0.3, 1.0), (count, 2)).tolist()
+    processor = rng.poisson((0.2, 0.8), (count, 2)).tolist()
+    barge = rng.choice(
+        list(BARGE_STATUSES), size=count, p=list(BARGE_STATUSES.values())
+    ).tolist()
+    return [
+        {
+            "auto": {
+                "leave": leave[i],
+                "coral": auto_coral[i],
+                "net": net[i][0],
+                "processor": processor[i][0],
+            },
+            "teleop": {
+                "coral": teleop_coral[i],
+                "net": net[i][1],
+                "processor": processor[i][1],
+            },
+            "endgame": {"bargeStatus": barge[i]},
+        }
+        for i in range(count)
+    ]
+
+
+def write_event(output_dir, **kwargs):
+    """
+    Generate an event and write matches.json and match_team_scores.json.
+    Args:
+        output_dir (str): Directory for the two files.
+        **kwargs: Passed on to generate_event.
+    Returns:
+        tuple: Paths of (matches.json, match_team_scores.json).
+    """
+    tba_matches, match_scores = generate_event(**kwargs)
+    os.makedirs(output_dir, exist_ok=True)
+    matches_path = os.path.join(output_dir, "matches.json")
+    scores_path = os.path.join(output_dir, "match_team_scores.json")
+    with open(matches_path, "w") as f:
+        json.dump(tba_matches, f, indent=2)
+    with open(scores_path, "w") as f:
+        json.dump(match_scores, f, indent=2, sort_keys=True)
+    return matches_path, scores_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic event: TBA matches and scouting scores."
+    )
+    parser.add_argument("output", help="directory for the generated files")
+    parser.add_argument("--matches", type=int, default=80)
+    parser.add_argument("--teams", type=int, default=None)
+    parser.add_argument("--practice", type=int, default=10)
+    parser.add_argument("--scouted", type=float, default=1.0)
+    parser.add_argument("--event", default="2025synth")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = write_event(
+        args.output,
+        matches=args.matches,
+        teams=args.teams,
+        practice_matches=args.practice,
+        scouted=args.scouted,
+        event_key=args.event,
+        seed=args.seed,
+    )
+    print(f"Wrote {paths[0]} and {paths[1]}")
@@ -1,15 +1,400 @@
-# Get tba key from .env file
+import hashlib
+import json
 import os
-import streamlit as st
-from dotenv import load_dotenv
-load_dotenv()
-TBA_API = os.getenv("TBA_API")
+import re
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+import profiling
+
+# Settings of the shared client, read from the environment or the .env file when
+# get_client() first runs: TBA_API (the API key), TBA_BASE_URL, TBA_CACHE_DIR,
+# TBA_CACHE_TTL and TBA_RATE_LIMIT. These are their defaults.
+TBA_BASE_URL = "https://www.thebluealliance.com/api/v3"
+# Responses are kept on disk so a restarted app does not download everything again
+TBA_CACHE_DIR = ".tba_cache"
+# Seconds a cached response is used without asking TBA; None uses TBA's max-age
+TBA_CACHE_TTL = None
+# Requests per second shared by every thread using the client
+TBA_RATE_LIMIT = "20"
 
 EVENT_KEY = "2025casd"
+# Teams per qualification alliance; EventData stores them as (matches, 3) arrays
+ALLIANCE_SIZE = 3
+
+# Status codes worth retrying: rate limited or a server-side error
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True, eq=False)
+class EventData:
+    """
+    Compact, immutable view of an event's qualification schedule and results.
+    Matches are sorted by match number; blue_teams and red_teams index into teams.
+    Two EventData are equal when their event key and version match, so caches can
+    key on cache_key() instead of hashing the match data.
+    """
+
+    event_key: str
+    version: str
+    teams: tuple  # team numbers without the "frc" prefix
+    match_numbers: np.ndarray  # (matches,)
+    blue_teams: np.ndarray  # (matches, 3)
+    red_teams: np.ndarray  # (matches, 3)
+    winners: tuple  # "blue", "red" or "" per match
+    blue_scores: np.ndarray  # (matches,), -1 before the match is played
+    red_scores: np.ndarray  # (matches,)
+    blue_rp: np.ndarray  # (matches,) ranking points from the score breakdown, -1 if missing
+    red_rp: np.ndarray  # (matches,)
+    total_matches: int  # all matches of the event, including playoffs
+
+    def cache_key(self):
+        return (self.event_key, self.version)
+
+    def __eq__(self, other):
+        return isinstance(other, EventData) and self.cache_key() == other.cache_key()
+
+    def __hash__(self):
+        return hash(self.cache_key())
+
+    def __len__(self):
+        return len(self.match_numbers)
+
+    def alliance_indices(self, team_index):
+        """
+        Map both alliances onto another team numbering, such as a stats engine's.
+        Args:
+            team_index (dict): Maps team number to its position in the stats arrays.
+        Returns:
+            tuple: (blue_teams, red_teams) index arrays of shape (matches, 3); teams
+            missing from team_index are -1.
+        """
+        mapping = np.array([team_index.get(team, -1) for team in self.teams], dtype=np.intp)
+        return mapping[self.blue_teams], mapping[self.red_teams]
+
+    def team_keys(self, alliance):
+        """
+        Get the TBA team keys of one alliance for every match.
+        Args:
+            alliance (str): "blue" or "red".
+        Returns:
+            list: One list of team keys such as "frc8020" per match.
+        """
+        indices = self.blue_teams if alliance == "blue" else self.red_teams
+        return [[f"frc{self.teams[i]}" for i in row] for row in indices.tolist()]
+
+
+def build_event_data(event_key, matches, version=None):
+    """
+    Build an EventData from the TBA match list.
+    Every qualification alliance must have ALLIANCE_SIZE teams; otherwise a
+    ValueError names the match.
+    Args:
+        event_key (str): The event key for the FRC event.
+        matches (list): Match data from the TBA API. It is not modified.
+        version (str): Identifies this copy of the data, such as TBA's Last-Modified
+            header. Defaults to a hash of the match data.
+    Returns:
+        EventData: The qualification schedule and results.
+    """
+    if version is None:
+        version = hashlib.sha1(
+            json.dumps(matches, sort_keys=True).encode()
+        ).hexdigest()
+
+    qualifications = sorted(
+        filter(lambda x: x["comp_level"] in ["qm"], matches),
+        key=lambda x: x["match_number"],
+    )
+    teams = sorted(
+        {
+            team.replace("frc", "")
+            for match in qualifications
+            for alliance in ("blue", "red")
+            for team in match["alliances"][alliance]["team_keys"]
+        }
+    )
+    team_index = {team: i for i, team in enumerate(teams)}
+
+    def alliance_array(alliance):
+        rows = []
+        for match in qualifications:
+            team_keys = match["alliances"][alliance]["team_keys"]
+            if len(team_keys) != ALLIANCE_SIZE:
+                raise ValueError(
+                    f"Qualification {match['match_number']} of {event_key} has "
+                    f"{len(team_keys)} {alliance} teams, expected {ALLIANCE_SIZE}"
+                )
+            rows.append([team_index[team.replace("frc", "")] for team in team_keys])
+        return _frozen(np.array(rows, dtype=np.intp).reshape(-1, ALLIANCE_SIZE))
+
+    def score_array(alliance):
+        scores = [match["alliances"][alliance]["score"] for match in qualifications]
+        return _frozen(np.array(scores, dtype=np.int64))
+
+    def rp_array(alliance):
+        rp = [
+            (match.get("score_breakdown") or {}).get(alliance, {}).get("rp", -1)
+            for match in qualifications
+        ]
+        return _frozen(np.array(rp, dtype=np.int64))
+
+    return EventData(
+        event_key=event_key,
+        version=version,
+        teams=tuple(teams),
+        match_numbers=_frozen(
+            np.array(
+                [int(match["match_number"]) for match in qualifications],
+                dtype=np.int64,
+            )
+        ),
+        blue_teams=alliance_array("blue"),
+        red_teams=alliance_array("red"),
+        winners=tuple(match.get("winning_alliance") or "" for match in qualifications),
+        blue_scores=score_array("blue"),
+        red_scores=score_array("red"),
+        blue_rp=rp_array("blue"),
+        red_rp=rp_array("red"),
+        total_matches=len(matches),
+    )
+
+
+def _frozen(array):
+    array.setflags(write=False)
+    return array
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket allowing `rate` requests per second on average and
+    bursts of up to `burst` requests.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        if not self.rate > 0:
+            raise ValueError(f"Rate limit must be positive, got {rate}")
+        self.burst = float(burst if burst is not None else max(1.0, self.rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# data: decoded JSON body, version: Last-Modified (or a content hash),
+# from_cache: True when TBA was not asked or answered 304 Not Modified
+TBAResponse = namedtuple("TBAResponse", ["data", "version", "from_cache"])
+
+
+class TBAClient:
+    """
+    TBA API client with connection reuse and a persistent response cache.
+    A cached response is used as-is while it is fresh (the configured TTL, or TBA's
+    Cache-Control max-age), then revalidated with If-Modified-Since / If-None-Match.
+    Requests go through an optional shared rate limiter and are retried on 429/5xx
+    and connection errors with exponential backoff (or TBA's Retry-After).
+    If TBA cannot be reached, the last cached response is returned instead.
+    The client can be shared between threads.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        base_url=TBA_BASE_URL,
+        cache_dir=TBA_CACHE_DIR,
+        ttl=TBA_CACHE_TTL,
+        timeout=10,
+        rate_limit=TBA_RATE_LIMIT,
+        retries=3,
+        backoff=0.5,
+        pool_size=16,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.ttl = None if ttl is None else float(ttl)
+        self.timeout = timeout
+        self.rate_limiter = None if rate_limit is None else RateLimiter(rate_limit)
+        self.retries = retries
+        self.backoff = backoff
+        # requests is loaded with the first client; reading EventData does not need it
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        self.session.headers["X-TBA-Auth-Key"] = api_key or ""
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """
+        Get a TBA API path such as "/event/2025casd/matches".
+        Args:
+            path (str): API path relative to the base URL.
+        Returns:
+            TBAResponse: The decoded response and its version.
+        """
+        with profiling.stage("tba.get"):
+            response = self._get(path)
+        profiling.cache("tba.get", response.from_cache)
+        return response
+
+    def _get(self, path):
+        import requests
+
+        entry = self._load_entry(path)
+        if entry is not None and time.time() < entry["checked"] + self._lifetime(entry):
+            return TBAResponse(entry["data"], entry["version"], True)
+
+        headers = {}
+        if entry is not None:
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+        try:
+            response = self._request(path, headers)
+        except requests.RequestException as e:
+            if entry is None:
+                raise
+            print(f"TBA request failed, using cached {path}: {e}")
+            return TBAResponse(entry["data"], entry["version"], True)
+        if response.status_code in RETRY_STATUS and entry is not None:
+            print(f"TBA returned {response.status_code}, using cached {path}")
+            return TBAResponse(entry["data"], entry["version"], True)
+
+        if response.status_code == 304 and entry is not None:
+            entry["checked"] = time.time()
+            entry["max_age"] = _max_age(response)
+            self._save_entry(path, entry)
+            return TBAResponse(entry["data"], entry["version"], True)
+        if response.status_code != 200:
+            raise Exception(f"Error fetching {path}: {response.status_code}")
+
+        data = response.json()
+        last_modified = response.headers.get("Last-Modified")
+        entry = {
+            "data": data,
+            "last_modified": last_modified,
+            "etag": response.headers.get("ETag"),
+            "version": last_modified
+            or hashlib.sha1(response.content).hexdigest(),
+            "checked": time.time(),
+            "max_age": _max_age(response),
+        }
+        self._save_entry(path, entry)
+        return TBAResponse(data, entry["version"], False)
+
+    def _request(self, path, headers):
+        import requests
+
+        for attempt in range(self.retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.get(
+                    self.base_url + path, headers=headers, timeout=self.timeout
+                )
+            except requests.RequestException:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2**attempt)
+                continue
+            if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            time.sleep(
+                float(retry_after)
+                if retry_after.isdigit()
+                else self.backoff * 2**attempt
+            )
+
+    def _lifetime(self, entry):
+        return self.ttl if self.ttl is not None else entry["max_age"]
+
+    def _cache_path(self, path):
+        name = hashlib.sha1((self.base_url + path).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _load_entry(self, path):
+        with self._lock:
+            entry = self._memory.get(path)
+        if entry is not None or not self.cache_dir:
+            return entry
+        try:
+            with open(self._cache_path(path), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._memory[path] = entry
+        return entry
+
+    def _save_entry(self, path, entry):
+        with self._lock:
+            self._memory[path] = entry
+        if not self.cache_dir:
+            return
+        # Write to a temporary file first so readers never see a partial entry
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._cache_path(path))
+
+
+def _max_age(response):
+    match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+    return int(match.group(1)) if match else 0
+
+
+_client = None
+
+
+def get_client():
+    """
+    Get the shared TBA client configured from the environment.
+    Returns:
+        TBAClient: The client used by the functions in this module.
+    """
+    global _client
+    if _client is None:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _client = TBAClient(
+            api_key=os.getenv("TBA_API"),
+            base_url=os.getenv("TBA_BASE_URL", TBA_BASE_URL),
+            cache_dir=os.getenv("TBA_CACHE_DIR", TBA_CACHE_DIR),
+            ttl=os.getenv("TBA_CACHE_TTL", TBA_CACHE_TTL),
+            rate_limit=os.getenv("TBA_RATE_LIMIT", TBA_RATE_LIMIT),
+        )
+    return _client
 
-import requests
 
-@st.cache_data
 def get_match_schedule(event_key):
     """
     Get the match schedule for a given event from The Blue Alliance (TBA) API.
@@ -18,13 +403,79 @@ def get_match_schedule(event_key):
     Returns:
         list: A list of matches for the specified event.
     """
-    url = f"https://www.thebluealliance.com/api/v3/event/{event_key}/matches"
-    headers = {"X-TBA-Auth-Key": TBA_API}
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        return response.json()
+    return get_client().get(f"/event/{event_key}/matches").data
+
+
+def get_event_keys(year, district=None):
+    """
+    Get the event keys of a season, or of one district in that season.
+    Args:
+        year (int): The season, such as 2025.
+        district (str): District abbreviation such as "fim", or None for all events.
+    Returns:
+        list: Event keys such as "2025casd".
+    """
+    if district:
+        path = f"/district/{year}{district}/events/keys"
     else:
-        raise Exception(f"Error fetching match schedule: {response.status_code}")
+        path = f"/events/{year}/keys"
+    return get_client().get(path).data
+
+
+def fetch_events(
+    event_keys, endpoints=("matches", "teams", "rankings"), max_workers=8, client=None
+):
+    """
+    Fetch several endpoints for many events concurrently.
+    Requests share the client's rate limiter, retries and response cache, so the
+    results are the same ones the single-event functions read afterwards.
+    Args:
+        event_keys (list of str): The events to fetch.
+        endpoints (tuple of str): Event endpoints, e.g. "matches" for /event/{key}/matches.
+        max_workers (int): Number of requests in flight at once.
+        client (TBAClient): Client to use; defaults to the shared client.
+    Returns:
+        dict: {event_key: {endpoint: data}}. Failed requests are reported and are None.
+    """
+    client = client or get_client()
+    jobs = [(event_key, endpoint) for event_key in event_keys for endpoint in endpoints]
+
+    def fetch(job):
+        event_key, endpoint = job
+        try:
+            return client.get(f"/event/{event_key}/{endpoint}").data
+        except Exception as e:
+            print(f"Error fetching {endpoint} for {event_key}: {e}")
+            return None
+
+    results = {event_key: {} for event_key in event_keys}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for (event_key, endpoint), data in zip(jobs, pool.map(fetch, jobs)):
+            results[event_key][endpoint] = data
+    return results
+
+
+# EventData built per (event key, version), so it is rebuilt only when TBA has new data
+_event_data = {}
+
+
+def get_event_data(event_key):
+    """
+    Get the qualification schedule and results for an event as an EventData.
+    Args:
+        event_key (str): The event key for the FRC event.
+    Returns:
+        EventData: The event's qualification matches.
+    """
+    with profiling.stage("tba.get_event_data"):
+        response = get_client().get(f"/event/{event_key}/matches")
+        event = _event_data.get(event_key)
+        hit = event is not None and event.version == response.version
+        if not hit:
+            event = build_event_data(event_key, response.data, response.version)
+            _event_data[event_key] = event
+    profiling.cache("tba.get_event_data", hit)
+    return event
 
 # run get match schedule when this file is run
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules import each other by bare name, as when run from app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "app"))
+
+import std as stdfun  # noqa: E402
+import synthetic  # noqa: E402
+import tba  # noqa: E402
+
+
+def _brute_force_stats(
+    match_scores, cutoff, include_practice, statistics=stdfun.calculate_stats
+):
+    """
+    Team statistics straight from the score dict, as calculate_team_stats computed
+    them: practice scores first, then qualification scores in match order.
+    Args:
+        statistics (callable): Maps a team's list of scores to (average, std_dev).
+    """
+    team_scores = {}
+    for match_id, teams in sorted(
+        match_scores.items(), key=lambda item: stdfun.parse_match_id(item[0])
+    ):
+        match_type, match_number = stdfun.parse_match_id(match_id)
+        if (match_type == "Practice" and include_practice) or (
+            match_type == "Qualifications" and match_number < cutoff
+        ):
+            for team, score in teams.items():
+                team_scores.setdefault(team, []).append(score)
+    return {
+        team: dict(zip(("average", "std_dev"), statistics(scores)))
+        for team, scores in team_scores.items()
+    }
+
+
+def _assert_same_stats(stats, expected):
+    assert stats.keys() == expected.keys()
+    for team, values in expected.items():
+        assert stats[team]["average"] == pytest.approx(values["average"])
+        assert stats[team]["std_dev"] == pytest.approx(values["std_dev"], abs=1e-9)
+
+
+def _synthetic_event(seed, matches=24, played=None, **kwargs):
+    """
+    Generate a synthetic event; matches after `played` have not been played yet:
+    no scores, winner or breakdown.
+    Returns:
+        tuple: (tba_matches, match_scores, event).
+    """
+    tba_matches, match_scores = synthetic.generate_event(
+        matches=matches, seed=seed, **kwargs
+    )
+    for match in tba_matches[played:] if played is not None else ():
+        for alliance in ("blue", "red"):
+            match["alliances"][alliance]["score"] = -1
+        match["winning_alliance"] = ""
+        match["score_breakdown"] = None
+    return tba_matches, match_scores, tba.build_event_data("2025synth", tba_matches)
+
+
+@pytest.fixture
+def brute_force_stats():
+    return _brute_force_stats
+
+
+@pytest.fixture
+def assert_same_stats():
+    return _assert_same_stats
+
+
+@pytest.fixture
+def synthetic_event():
+    return _synthetic_event
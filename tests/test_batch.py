@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+import batch
+import columnar
+import scoring
+import std as stdfun
+import synthetic
+import tba
+
+
+def test_several_events_need_a_columnar_store(tmp_path):
+    scores = tmp_path / "match_team_scores.json"
+    scores.write_text(json.dumps({"Qualifications_1": {"1": 10}}))
+    with pytest.raises(ValueError, match="single event"):
+        batch.run_batch(
+            ["2025casd", "2025cave"], str(tmp_path / "out"), scores_path=str(scores)
+        )
+    assert not (tmp_path / "out").exists()
+
+
+class FakeClient:
+    def __init__(self, matches):
+        self.matches = matches
+
+    def get(self, path):
+        return tba.TBAResponse(self.matches, "v1", True)
+
+
+def test_event_without_scouting_data_has_no_accuracy(tmp_path, monkeypatch):
+    tba_matches, match_scores = synthetic.generate_event(matches=12, seed=1)
+    monkeypatch.setattr(tba, "_client", FakeClient(tba_matches))
+    rows = [
+        (*stdfun.parse_match_id(match_id), team, score)
+        for match_id, teams in match_scores.items()
+        for team, score in teams.items()
+    ]
+    path = str(tmp_path / "scores")
+    columnar.write_columnar(
+        path,
+        {
+            "event": ["2025synth"] * len(rows),
+            "match_type": [row[0] for row in rows],
+            "match_number": [row[1] for row in rows],
+            "team": [row[2] for row in rows],
+            "total": [row[3] for row in rows],
+        },
+        scoring.get_rules().columns,
+    )
+
+    scouted = batch.run_event("2025synth", str(tmp_path), scores_path=path)
+    assert scouted["matches"] == 12
+    assert 0 <= scouted["accuracy"] <= 1
+    empty = batch.run_event("2025empty", str(tmp_path), scores_path=path)
+    assert empty == {
+        "event_key": "2025empty",
+        "error": "no scouting data for 2025empty",
+    }
+    assert "accuracy" not in empty
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == ["2025synth.json"]
@@ -0,0 +1,53 @@
+import numpy as np
+
+import bracket
+
+# Alliances left at each stage: two are eliminated in round 2, two in round 3 and
+# one in each later round
+SLOTS = [6, 4, 3, 2, 1]
+
+
+def test_every_round_fills_its_slots():
+    rng = np.random.default_rng(3)
+    means = rng.uniform(60, 120, bracket.ALLIANCES)
+    result = bracket.simulate_bracket(
+        bracket.alliance_win_matrix(means, np.full(8, 400.0)), 20000, seed=4
+    )
+    assert np.allclose(result["reach_probs"].sum(axis=0), SLOTS)
+    # Elimination is final, so reaching a stage is never likelier than the one before
+    assert (np.diff(result["reach_probs"], axis=1) <= 0).all()
+    assert np.allclose(result["win_probs"].sum(), 1)
+    assert np.allclose(
+        result["win_probs"], np.bincount(result["champions"], minlength=8) / 20000
+    )
+
+
+def test_stronger_alliance_wins_most_often():
+    means = np.full(bracket.ALLIANCES, 80.0)
+    # The fifth seed scores twice as much as everyone else
+    means[4] = 160
+    result = bracket.simulate_bracket(
+        bracket.alliance_win_matrix(means, np.full(8, 400.0)), 20000, seed=5
+    )
+    assert result["win_probs"].argmax() == 4
+    assert result["win_probs"][4] > 0.9
+    # Evenly matched alliances share the rest
+    others = np.delete(result["win_probs"], 4)
+    assert others.max() < 0.05
+    # The strongest alliance is the likeliest to reach every stage
+    assert (result["reach_probs"].argmax(axis=0) == 4).all()
+
+    # With equal alliances the double elimination gives every seed a chance
+    even = bracket.simulate_bracket(np.full((8, 8), 0.5), 20000, seed=6)
+    assert np.allclose(even["reach_probs"].sum(axis=0), SLOTS)
+    assert (even["win_probs"] > 0.05).all()
+
+
+def test_seeded_simulations_are_cached():
+    bracket.clear_cache()
+    win_matrix = np.full((8, 8), 0.5)
+    first = bracket.simulate_bracket(win_matrix, 1000, seed=7)
+    assert bracket.simulate_bracket(win_matrix.copy(), 1000, seed=7) is first
+    assert not first["reach_probs"].flags.writeable
+    assert bracket.simulate_bracket(win_matrix, 1000, seed=8) is not first
+    assert bracket.simulate_bracket(win_matrix, 1000) is not first
@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+
+import columnar
+
+
+def table(total):
+    return {
+        "event": ["2025test", "2025test"],
+        "match_type": ["Qualifications", "Qualifications"],
+        "match_number": [1, 1],
+        "team": ["1", "2"],
+        "total": [total, total + 1],
+    }
+
+
+def test_write_swaps_the_current_version(tmp_path):
+    path = str(tmp_path / "scores")
+    first = columnar.write_columnar(path, table(10))
+    reader = columnar.ColumnarScores(path)
+    second = columnar.write_columnar(path, table(20))
+
+    assert columnar.store_version(path) == second != first
+    assert columnar.ColumnarScores(path).rows()["total"].tolist() == [20, 21]
+    # A reader opened before the swap keeps reading the version it started with
+    assert reader.rows()["total"].tolist() == [10, 11]
+
+    columnar.write_columnar(path, table(30))
+    versions = [entry for entry in os.listdir(path) if entry.startswith("v-")]
+    assert len(versions) == 2
+
+
+def test_store_without_versions_is_read_and_replaced(tmp_path):
+    path = tmp_path / "scores"
+    columnar.write_columnar(str(path), table(10))
+    # Lay the store out as before versions were kept in directories
+    current = path / open(path / columnar.CURRENT_FILE).read()
+    for entry in os.listdir(current):
+        os.replace(current / entry, path / entry)
+    os.rmdir(current)
+    os.remove(path / columnar.CURRENT_FILE)
+
+    assert columnar.read_table(str(path))[0]["total"].tolist() == [10, 11]
+    columnar.write_columnar(str(path), table(20))
+    assert sorted(os.listdir(path))[0] == columnar.CURRENT_FILE
+    assert not any(entry.endswith(".npy") for entry in os.listdir(path))
+    assert np.array_equal(columnar.ColumnarScores(str(path)).column("total"), [20, 21])
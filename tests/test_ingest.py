@@ -0,0 +1,126 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import ingest
+import raw_data
+
+
+class FakeFeed:
+    """Stands in for a Firestore collection: the test pushes the snapshots."""
+
+    def __init__(self):
+        self.callback = None
+        self.unsubscribed = False
+
+    def on_snapshot(self, callback):
+        self.callback = callback
+        return SimpleNamespace(unsubscribe=self.unsubscribe)
+
+    def unsubscribe(self):
+        self.unsubscribed = True
+
+    def push(self, *changes):
+        self.callback([], list(changes), None)
+
+
+def change(kind, doc_id, data=None):
+    document = SimpleNamespace(id=doc_id, to_dict=lambda: data)
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=document)
+
+
+def processor(count):
+    # 6 points per teleop processor
+    return {"auto": {}, "teleop": {"processor": count}, "endgame": {}}
+
+
+MALFORMED = {"auto": {"coral": [0] * 5}, "teleop": {}, "endgame": {}}
+
+
+def scores(store):
+    return {
+        f"{match.match_type}_{match.match_number}": dict(match.scores)
+        for match in store.matches
+    }
+
+
+def test_snapshots_update_the_store_and_changed_teams():
+    feed = FakeFeed()
+    service = ingest.ScoreIngestService(feed, raw_data.calculate_team_score)
+    store = service.store
+    assert not service.start(timeout=0)
+
+    feed.push(
+        change("ADDED", "Qualifications_1_254", processor(2)),
+        change("ADDED", "Qualifications_1_1678", processor(3)),
+        change("ADDED", "Practice_1_254", processor(1)),
+    )
+    assert service.start(timeout=0)
+    assert scores(store) == {
+        "Qualifications_1": {"254": 12, "1678": 18},
+        "Practice_1": {"254": 6},
+    }
+    first = store.version
+    engine = store.engine()
+
+    feed.push(
+        change("MODIFIED", "Qualifications_1_254", processor(4)),
+        change("REMOVED", "Practice_1_254"),
+        change("ADDED", "Qualifications_2_8020", MALFORMED),
+        change("ADDED", "not-a-document-id", processor(1)),
+        change("ADDED", "Qualifications_2_1678", processor(0)),
+    )
+    assert service.errors == 1
+    assert store.version == first + 1
+    assert scores(store) == {
+        "Qualifications_1": {"254": 24, "1678": 18},
+        "Qualifications_2": {"1678": 0},
+    }
+    assert store.changed_teams(first) == {"254", "1678"}
+    assert store.changed_teams(store.version) == set()
+    # The engine built before the update was updated with the changes
+    assert store.engine() is not engine
+    assert store.engine().team_stats(3, True)["254"]["average"] == 24
+
+    # A snapshot with only malformed documents leaves the version alone
+    feed.push(change("MODIFIED", "Qualifications_1_1678", MALFORMED))
+    assert service.errors == 2
+    assert store.version == first + 1
+
+    service.stop()
+    assert feed.unsubscribed
+
+
+class PushingFeed(FakeFeed):
+    """Sends its first snapshot from another thread, as Firestore does."""
+
+    def __init__(self, *changes):
+        super().__init__()
+        self.changes = changes
+
+    def on_snapshot(self, callback):
+        watch = super().on_snapshot(callback)
+        threading.Thread(target=self.push, args=self.changes).start()
+        return watch
+
+
+def test_malformed_first_snapshot_still_releases_start():
+    feed = PushingFeed(
+        # Phases stored as a string and a list instead of a dict
+        change("ADDED", "Qualifications_1_254", {**processor(1), "teleop": "4"}),
+        change("ADDED", "Qualifications_1_1678", {**processor(1), "teleop": [4]}),
+        change("ADDED", "Qualifications_1_8020", processor(2)),
+    )
+
+    def teleop_processor_score(data):
+        # Walks the fields like the original calculate_team_score, which raises
+        # AttributeError rather than KeyError or TypeError on these forms
+        return data["teleop"].get("processor", 0) * 6
+
+    service = ingest.ScoreIngestService(feed, teleop_processor_score)
+    start = time.perf_counter()
+    assert service.start(timeout=30)
+    assert time.perf_counter() - start < 5
+    assert service.errors == 2
+    assert scores(service.store) == {"Qualifications_1": {"8020": 12}}
+    service.stop()
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+import opr
+import std as stdfun
+import synthetic
+import tba
+
+
+def test_spread_does_not_collapse_before_the_fit_is_overdetermined():
+    model = opr.OPRModel()
+    model.add_alliance(["1", "2", "3"], (30,))
+    model.add_alliance(["4", "5", "6"], (60,))
+    model.solve()
+    appearances, contribution, std_dev = model.team_arrays()
+    # Two alliances fit six teams exactly, so the spread comes from the scores
+    assert abs(contribution[:3].sum() - 30) < 1e-6
+    assert (std_dev > 0).all()
+    assert appearances.tolist() == [1] * 6
+
+
+def test_solve_recovers_known_contributions():
+    rng = np.random.default_rng(1)
+    teams = [str(team) for team in range(1, 9)]
+    contributions = rng.uniform(5, 40, (len(teams), 2))
+    model = opr.OPRModel(components=("total", "autoPoints"))
+    for _ in range(30):
+        alliance = rng.choice(len(teams), 3, replace=False)
+        model.add_alliance(
+            [teams[i] for i in alliance], contributions[alliance].sum(axis=0)
+        )
+    solution = model.solve()
+    order = [model.team_index[team] for team in teams]
+    np.testing.assert_allclose(solution[order], contributions, atol=1e-6)
+    # Without noise the fit leaves no residuals
+    assert np.allclose(model._residuals, 0, atol=1e-6)
+
+
+def test_filled_engine_only_fills_unscouted_teams():
+    tba_matches, match_scores = synthetic.generate_event(
+        matches=30, scouted=0.5, seed=2
+    )
+    event = tba.build_event_data("2025synth", tba_matches)
+    engine = stdfun.ScoreStore.from_match_scores(match_scores).engine()
+    filled = opr.OPRFilledEngine(engine, event)
+    assert filled.teams[: len(engine.teams)] == list(engine.teams)
+    assert set(filled.teams) == set(engine.teams) | set(event.teams)
+
+    cutoffs = np.array([1, 12, 31])
+    count, mean, std_dev = engine.arrays(cutoffs, False)
+    filled_count, filled_mean, filled_std_dev = filled.arrays(cutoffs, False)
+    scouted = count > 0
+    columns = count.shape[1]
+    # Scouted teams keep their statistics
+    for values, filled_values in (
+        (count, filled_count),
+        (mean, filled_mean),
+        (std_dev, filled_std_dev),
+    ):
+        np.testing.assert_array_equal(
+            filled_values[:, :columns][scouted], values[scouted]
+        )
+
+    for row, cutoff in enumerate(cutoffs.tolist()):
+        model = opr.OPRModel()
+        for match in tba_matches:
+            if match["match_number"] < cutoff:
+                model.add_tba_match(match)
+        model.solve()
+        appearances, contribution, _ = model.team_arrays()
+        for i, team in enumerate(filled.teams):
+            if i < columns and scouted[row, i]:
+                continue
+            position = model.team_index.get(team)
+            if position is None:
+                assert filled_mean[row, i] == 0
+                assert filled_count[row, i] == 0
+            else:
+                assert filled_mean[row, i] == pytest.approx(
+                    contribution[position], abs=1e-6
+                )
+                assert filled_count[row, i] == appearances[position]
+
+
+def test_filled_engine_is_reused_until_the_scores_change():
+    opr.clear_cache()
+    tba_matches, match_scores = synthetic.generate_event(
+        matches=30, scouted=0.5, seed=5
+    )
+    event = tba.build_event_data("2025synth", tba_matches)
+    store = stdfun.ScoreStore.from_match_scores(match_scores, source="filled")
+    filled = opr.filled_engine(store, event)
+    cutoffs = np.array([1, 12, 31])
+    filled.arrays(cutoffs, True)
+    assert opr.filled_engine(store, event) is filled
+    assert opr.filled_engine(store, event, {"half_life": 4}) is not filled
+
+    match_id = "Qualifications_3"
+    team = next(iter(match_scores[match_id]))
+    store.apply_scores([(match_id, team, 99)])
+    updated = opr.filled_engine(store, event)
+    assert updated is not filled
+    assert updated.engine is store.engine()
+    # The OPRs solved before the update are kept
+    assert updated._oprs.keys() == filled._oprs.keys()
+    fresh = opr.OPRFilledEngine(store.engine(), event)
+    for values, expected in zip(
+        updated.arrays(cutoffs, True), fresh.arrays(cutoffs, True)
+    ):
+        np.testing.assert_allclose(values, expected)
+    opr.clear_cache()
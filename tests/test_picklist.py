@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+import picklist
+import predict
+
+# Team "n" averages 10 * n points
+TEAMS = [str(n) for n in range(1, 10)]
+MEANS = [10.0 * n for n in range(1, 10)]
+
+
+def test_project_alliances_is_a_serpentine_draft():
+    table = picklist.StrengthTable(TEAMS, MEANS, [5.0] * 9)
+    # First picks in seed order, second picks in reverse
+    assert table.project_alliances(TEAMS, captains=3) == [
+        ["1", "9", "4"],
+        ["2", "8", "5"],
+        ["3", "7", "6"],
+    ]
+    # A picked team is no longer a captain, so the next seed moves up
+    seed_order = ["1", "9", "2", "3", "4"]
+    assert table.project_alliances(seed_order, captains=3) == [
+        ["1", "9", "4"],
+        ["2", "8", "5"],
+        ["3", "7", "6"],
+    ]
+    # Declined and kept captains are not picked; the first alliance runs out of teams
+    assert table.project_alliances(
+        seed_order, captains=3, exclude=["8"], keep_captains=["9"]
+    ) == [["1", "7"], ["9", "6", "3"], ["2", "5", "4"]]
+
+
+def test_rank_partners_prunes_only_dominated_pairs():
+    rng = np.random.default_rng(5)
+    teams = [str(n) for n in range(100, 116)]
+    means = rng.uniform(10, 60, len(teams))
+    std_devs = rng.uniform(2, 25, len(teams))
+    # A weak and a strong opponent: a low spread helps against the first, a high
+    # spread against the second, so neither the best mean nor one pair wins out
+    means[1:4], means[4:7] = 10, 70
+    table = picklist.StrengthTable(teams, means, std_devs)
+    stats = {
+        team: {"average": mean, "std_dev": std_dev}
+        for team, mean, std_dev in zip(teams, means.tolist(), std_devs.tolist())
+    }
+    opponents = [["101", "102", "103"], ["104", "105", "106"], ["107", "108"]]
+
+    ranked = table.rank_partners("100", opponents, prune=False)
+    available = teams[9:]
+    assert len(ranked) == len(available) * (len(available) - 1) // 2
+    for row in ranked:
+        expected = [
+            predict.alliance_win_prediction(["100", *row["partners"]], opponent, stats)[
+                "blue_win_prob"
+            ]
+            for opponent in opponents
+        ]
+        assert row["win_probs"] == pytest.approx(expected)
+        assert row["mean_win_prob"] == pytest.approx(np.mean(expected))
+        assert row["worst_win_prob"] == pytest.approx(min(expected))
+    assert [row["mean_win_prob"] for row in ranked] == sorted(
+        (row["mean_win_prob"] for row in ranked), reverse=True
+    )
+
+    def dominates(a, b):
+        return all(x >= y for x, y in zip(a, b)) and any(x > y for x, y in zip(a, b))
+
+    kept = [
+        row["partners"]
+        for row in ranked
+        if not any(dominates(other["win_probs"], row["win_probs"]) for other in ranked)
+    ]
+    pruned = [row["partners"] for row in table.rank_partners("100", opponents)]
+    assert pruned == kept
+    assert 1 < len(kept) < len(ranked)
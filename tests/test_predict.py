@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+import predict
+
+KEYS = ("blue_avg", "blue_std", "red_avg", "red_std", "blue_win_prob", "red_win_prob")
+
+
+def random_matches(rng, teams, matches):
+    # Teams are "0", "1", ...; index teams, which has no statistics, stands for -1
+    order = np.argsort(rng.random((matches, teams + 1)), axis=1)
+    playing = np.where(order[:, :6] == teams, -1, order[:, :6])
+    return playing[:, :3], playing[:, 3:]
+
+
+def scalar_predictions(blue_teams, red_teams, means, std_devs):
+    stats = {
+        str(i): {"average": mean, "std_dev": std_dev}
+        for i, (mean, std_dev) in enumerate(zip(means.tolist(), std_devs.tolist()))
+    }
+
+    def names(teams):
+        return [str(team) if team >= 0 else "none" for team in teams]
+
+    return [
+        predict.alliance_win_prediction(names(blue), names(red), stats)
+        for blue, red in zip(blue_teams.tolist(), red_teams.tolist())
+    ]
+
+
+def assert_same_predictions(batch, expected):
+    for key in KEYS:
+        assert batch[key].tolist() == pytest.approx(
+            [prediction[key] for prediction in expected], abs=1e-12
+        )
+
+
+def test_batch_matches_the_scalar_prediction():
+    rng = np.random.default_rng(1)
+    teams = 12
+    # Small integer averages make equal alliance sums common, and most teams
+    # are certain, so both the normal CDF and the tie rule are exercised
+    means = rng.integers(0, 3, teams).astype(float)
+    std_devs = np.where(rng.random(teams) < 0.7, 0.0, rng.uniform(1, 10, teams))
+    blue_teams, red_teams = random_matches(rng, teams, 500)
+
+    batch = predict.batch_win_prediction(blue_teams, red_teams, means, std_devs)
+    expected = scalar_predictions(blue_teams, red_teams, means, std_devs)
+    assert_same_predictions(batch, expected)
+    certain = (batch["blue_std"] == 0) & (batch["red_std"] == 0)
+    assert certain.any() and not certain.all()
+    assert set(batch["blue_win_prob"][certain].tolist()) == {0.0, 0.5, 1.0}
+
+    # Per-match statistics picked with rows give the same result as each row's own
+    all_means = np.stack([means, means + 1])
+    all_std_devs = np.stack([std_devs, np.zeros(teams)])
+    rows = rng.integers(0, 2, len(blue_teams))
+    batch = predict.batch_win_prediction(
+        blue_teams, red_teams, all_means, all_std_devs, rows=rows
+    )
+    for row in (0, 1):
+        selected = rows == row
+        expected = scalar_predictions(
+            blue_teams[selected], red_teams[selected], all_means[row], all_std_devs[row]
+        )
+        assert_same_predictions({key: batch[key][selected] for key in KEYS}, expected)
+
+
+def test_certain_alliances_follow_the_tie_rule():
+    difference = np.array([3.0, 0.0, -2.0, 1.0])
+    combined_std = np.array([0.0, 0.0, 0.0, 1.0])
+    win_prob = predict.win_probability(difference, combined_std)
+    assert win_prob[:3].tolist() == [1.0, 0.5, 0.0]
+    assert win_prob[3] == pytest.approx(
+        predict.predict_win_probability(1.0, 1.0, 0.0, 0.0)
+    )
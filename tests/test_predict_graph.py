@@ -0,0 +1,134 @@
+import math
+
+import numpy as np
+import pytest
+
+import predict
+import predict_graph
+import std as stdfun
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    predict_graph.clear_cache()
+    yield
+    predict_graph.clear_cache()
+
+
+class BruteForce:
+    """The per-match loop accuracyByProgress used before the accuracy grid."""
+
+    def __init__(self, tba_matches, match_scores, brute_force_stats):
+        self.matches = sorted(tba_matches, key=lambda x: x["match_number"])
+        self.match_scores = match_scores
+        self._brute_force_stats = brute_force_stats
+        self._stats = {}
+
+    def stats(self, cutoff, include_practice):
+        key = (cutoff, include_practice)
+        if key not in self._stats:
+            self._stats[key] = self._brute_force_stats(
+                self.match_scores, cutoff, include_practice
+            )
+        return self._stats[key]
+
+    def accuracy(self, progress, use_practice_before):
+        correct_predictions = 0
+        for match in self.matches:
+            blue = [
+                team.replace("frc", "")
+                for team in match["alliances"]["blue"]["team_keys"]
+            ]
+            red = [
+                team.replace("frc", "")
+                for team in match["alliances"]["red"]["team_keys"]
+            ]
+            cutoff = min(match["match_number"], progress)
+            predictWin = predict.alliance_win_prediction(
+                blue, red, self.stats(cutoff, cutoff <= use_practice_before)
+            )
+            predicted = (
+                "blue"
+                if predictWin["blue_win_prob"] > predictWin["red_win_prob"]
+                else "red"
+            )
+            correct_predictions += match["winning_alliance"] == predicted
+        return correct_predictions / len(self.matches)
+
+
+@pytest.fixture
+def brute_force(brute_force_stats):
+    return lambda tba_matches, match_scores: BruteForce(
+        tba_matches, match_scores, brute_force_stats
+    )
+
+
+@pytest.mark.parametrize("use_practice_before", [0, 1, 7, 24, 100, math.inf])
+def test_accuracy_by_progress_matches_the_per_match_loop(
+    use_practice_before, synthetic_event, brute_force
+):
+    tba_matches, match_scores, event = synthetic_event(5, practice_matches=6, scouted=0.9)
+    store = stdfun.ScoreStore.from_match_scores(match_scores, source="progress")
+    brute = brute_force(tba_matches, match_scores)
+
+    result = predict_graph.accuracyByProgress(event, use_practice_before, store)
+    assert list(result) == list(range(1, len(event) + 1))
+    for progress, accuracy in result.items():
+        assert accuracy == pytest.approx(brute.accuracy(progress, use_practice_before))
+
+
+@pytest.mark.parametrize("progress", [1, 9, 24])
+def test_accuracy_by_practice_before_matches_the_per_match_loop(
+    progress, synthetic_event, brute_force
+):
+    tba_matches, match_scores, event = synthetic_event(6, practice_matches=6, scouted=0.9)
+    store = stdfun.ScoreStore.from_match_scores(match_scores, source="practice")
+    brute = brute_force(tba_matches, match_scores)
+
+    result = predict_graph.accuracyByPracticeBefore(event, progress, store)
+    assert list(result) == list(range(1, len(event) + 1))
+    for use_practice_before, accuracy in result.items():
+        assert accuracy == pytest.approx(brute.accuracy(progress, use_practice_before))
+    # Row 0 of the grid never uses practice matches
+    grid = predict_graph.accuracyGrid(event, store)
+    assert grid[0, progress] == pytest.approx(brute.accuracy(progress, 0))
+
+
+def test_incremental_grid_equals_a_fresh_recompute(synthetic_event, brute_force):
+    tba_matches, match_scores, event = synthetic_event(7, practice_matches=6, scouted=0.9)
+    # The store keeps references to the dicts it was built from
+    store = stdfun.ScoreStore.from_match_scores(
+        {match_id: dict(teams) for match_id, teams in match_scores.items()},
+        source="live",
+    )
+    predict_graph.accuracyGrid(event, store)
+    schedule = predict_graph.schedule_prediction(event, 10, 5, store)
+
+    team = next(iter(match_scores["Qualifications_3"]))
+    new_team = event.teams[0]
+    updates = [
+        ("Qualifications_3", team, None),
+        ("Qualifications_8", next(iter(match_scores["Qualifications_8"])), 120),
+        ("Practice_1", new_team, 90),
+    ]
+    store.apply_scores(updates)
+    for match_id, team_number, score in updates:
+        if score is None:
+            del match_scores[match_id][team_number]
+        else:
+            match_scores[match_id][team_number] = score
+    incremental = predict_graph.accuracyGrid(event, store)
+    incremental_schedule = predict_graph.schedule_prediction(event, 10, 5, store)
+    assert incremental_schedule is not schedule
+
+    predict_graph.clear_cache()
+    fresh_store = stdfun.ScoreStore.from_match_scores(match_scores, source="fresh")
+    fresh = predict_graph.accuracyGrid(event, fresh_store)
+    np.testing.assert_array_equal(incremental, fresh)
+    fresh_schedule = predict_graph.schedule_prediction(event, 10, 5, fresh_store)
+    for name, values in fresh_schedule.items():
+        assert incremental_schedule[name].tolist() == pytest.approx(values.tolist())
+
+    brute = brute_force(tba_matches, match_scores)
+    for progress in (1, 12, 24):
+        assert incremental[7, progress] == pytest.approx(brute.accuracy(progress, 7))
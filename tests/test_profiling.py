@@ -0,0 +1,49 @@
+import threading
+
+import profiling
+
+
+@profiling.timed("test.work")
+def work():
+    profiling.cache("test.cache", True)
+
+
+def test_each_context_records_to_its_own_profiler():
+    profilers = [profiling.Profiler(), profiling.Profiler()]
+    both_recorded = threading.Barrier(2)
+
+    def run(profiler, calls):
+        profiling.use(profiler)
+        profiling.reset()
+        for _ in range(calls):
+            work()
+        both_recorded.wait()
+        # Resetting one session's profiler leaves the other's stages alone
+        if calls == 1:
+            profiling.reset()
+
+    threads = [
+        threading.Thread(target=run, args=(profiler, calls))
+        for profiler, calls in zip(profilers, (1, 3))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert profilers[0].count("test.work", "calls") == 0
+    assert profilers[1].count("test.work", "calls") == 3
+    assert profilers[1].count("test.cache", "hits") == 3
+    assert profiling.PROFILER.count("test.work", "calls") == 0
+
+
+def test_using_records_a_block_and_restores_the_profiler():
+    outer, inner = profiling.Profiler(), profiling.Profiler()
+    profiling.use(outer)
+    with profiling.using(inner):
+        work()
+    work()
+    assert inner.count("test.work", "calls") == 1
+    assert outer.count("test.work", "calls") == 1
+    assert profiling.current() is outer
+    profiling.use(profiling.PROFILER)
@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+
+import rankings
+import std as stdfun
+
+PLAYED = 20
+
+
+def tba_rp(tba_matches, teams, before):
+    """Ranking points every team earned in the matches before a match number."""
+    totals = np.zeros(len(teams))
+    for match in tba_matches:
+        if match["match_number"] >= before or match["score_breakdown"] is None:
+            continue
+        for alliance in ("blue", "red"):
+            for key in match["alliances"][alliance]["team_keys"]:
+                totals[teams.index(key[3:])] += match["score_breakdown"][alliance]["rp"]
+    return totals
+
+
+def remaining_matches(tba_matches, teams, before):
+    counts = np.zeros(len(teams), dtype=int)
+    for match in tba_matches:
+        if match["match_number"] < before and match["score_breakdown"] is not None:
+            continue
+        for alliance in ("blue", "red"):
+            for key in match["alliances"][alliance]["team_keys"]:
+                counts[teams.index(key[3:])] += 1
+    return counts
+
+
+def test_played_matches_keep_their_rp_and_only_the_rest_is_simulated(synthetic_event):
+    # Matches after PLAYED have not been played yet
+    tba_matches, match_scores, event = synthetic_event(11, matches=40, played=PLAYED)
+    engine = stdfun.ScoreStore.from_match_scores(match_scores).engine()
+    teams = list(event.teams)
+    max_rp = rankings.WIN_RP + rankings.BONUS_RPS
+    for cutoff in (math.inf, 12, 1):
+        projection = rankings.project_rankings(
+            event, engine, cutoff, simulations=400, seed=1
+        )
+        assert projection["teams"] == teams
+        simulated = projection["ranking_points"] - tba_rp(tba_matches, teams, cutoff)
+        remaining = remaining_matches(tba_matches, teams, cutoff)
+        assert (simulated >= 0).all()
+        assert (simulated <= max_rp * remaining).all()
+        # Every team has unplayed matches, so its simulated RP varies
+        assert (simulated.std(axis=0) > 0).all()
+        # Seeds are a ranking of the teams in every simulation
+        assert (np.sort(projection["seeds"], axis=1) == np.arange(1, 25)).all()
+
+
+def test_fully_played_event_has_fixed_rankings(synthetic_event):
+    tba_matches, match_scores, event = synthetic_event(12, matches=30)
+    engine = stdfun.ScoreStore.from_match_scores(match_scores).engine()
+    projection = rankings.project_rankings(event, engine, simulations=50, seed=2)
+
+    expected = tba_rp(tba_matches, list(event.teams), math.inf)
+    assert (projection["ranking_points"] == expected).all()
+    assert (projection["seeds"] == projection["seeds"][0]).all()
+    # Seeds follow the ranking score, RP per match; all matches come after match 1
+    played = remaining_matches(tba_matches, list(event.teams), 1)
+    order = np.argsort(projection["seeds"][0])
+    assert (np.diff((expected / played)[order]) <= 0).all()
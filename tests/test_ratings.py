@@ -0,0 +1,121 @@
+import math
+
+import numpy as np
+import pytest
+
+import ratings
+import std as stdfun
+import synthetic
+
+
+def weighted_stats(scores, half_life):
+    """Exponentially weighted mean and reliability-weighted standard deviation."""
+    decay = 0.5 ** (1 / half_life)
+    weights = decay ** np.arange(len(scores) - 1, -1, -1)
+    scores = np.asarray(scores, dtype=float)
+    mean = (weights * scores).sum() / weights.sum()
+    effective = weights.sum() - (weights**2).sum() / weights.sum()
+    if effective <= 1e-12:
+        return mean, 0.0
+    return mean, math.sqrt((weights * (scores - mean) ** 2).sum() / effective)
+
+
+def window_stats(scores, window):
+    return stdfun.calculate_stats(scores[-window:])
+
+
+@pytest.mark.parametrize(
+    "options, expected_stats",
+    [
+        ({"half_life": 3}, lambda scores: weighted_stats(scores, 3)),
+        ({"half_life": 0.5}, lambda scores: weighted_stats(scores, 0.5)),
+        ({"window": 4}, lambda scores: window_stats(scores, 4)),
+        ({"window": 1}, lambda scores: window_stats(scores, 1)),
+        ({}, stdfun.calculate_stats),
+    ],
+)
+def test_tracker_matches_brute_force_after_every_update(options, expected_stats):
+    rng = np.random.default_rng(2)
+    scores = rng.integers(0, 80, 15).tolist()
+    tracker = ratings.RatingTracker(**options)
+    for i, score in enumerate(scores):
+        count, mean, std_dev = tracker.update("8020", score, key=i + 1)
+        expected_mean, expected_std = expected_stats(scores[: i + 1])
+        assert mean == pytest.approx(expected_mean)
+        assert std_dev == pytest.approx(expected_std, abs=1e-9)
+        if "window" in options:
+            assert count == min(i + 1, options["window"])
+        else:
+            assert count == i + 1
+
+    # Past cutoffs see only the updates with smaller keys
+    assert tracker.rating("8020", 1) == (0, 0.0, 0.0)
+    assert tracker.rating("254", 10) == (0, 0.0, 0.0)
+    for cutoff in range(2, len(scores) + 2):
+        _, mean, std_dev = tracker.rating("8020", cutoff)
+        expected_mean, expected_std = expected_stats(scores[: cutoff - 1])
+        assert mean == pytest.approx(expected_mean)
+        assert std_dev == pytest.approx(expected_std, abs=1e-9)
+    cutoffs = np.array([[1, 5], [9, 100]])
+    count, mean, _ = tracker.ratings(["8020", "254"], cutoffs)
+    assert count.shape == (2, 2, 2)
+    assert mean[1, 0, 0] == pytest.approx(expected_stats(scores[:8])[0])
+    assert (count[..., 1] == 0).all()
+
+
+def test_engine_matches_per_team_histories_at_every_cutoff(
+    brute_force_stats, assert_same_stats
+):
+    _, match_scores = synthetic.generate_event(matches=24, seed=9)
+    engine = stdfun.ScoreStore.from_match_scores(match_scores).engine(half_life=4)
+    for cutoff in range(0, 27):
+        for include_practice in (True, False):
+            assert_same_stats(
+                engine.team_stats(cutoff, include_practice),
+                brute_force_stats(
+                    match_scores,
+                    cutoff,
+                    include_practice,
+                    lambda scores: weighted_stats(scores, 4),
+                ),
+            )
+
+
+def test_with_scores_streams_new_scores_and_refuses_the_rest():
+    _, match_scores = synthetic.generate_event(matches=20, practice_matches=4, seed=10)
+    store = stdfun.ScoreStore.from_match_scores(match_scores)
+    engine = ratings.RatingEngine(store.matches, window=3)
+    before = engine.team_stats(30, True)
+    team, score = next(iter(match_scores["Qualifications_5"].items()))
+
+    # Changed or removed scores
+    assert engine.with_scores([("Qualifications", 5, team, score, score + 1)]) is None
+    assert engine.with_scores([("Qualifications", 5, team, score, None)]) is None
+    # A score before the team's latest one, also a practice score after qualifications
+    assert engine.with_scores([("Qualifications", 2, team, None, 10)]) is None
+    assert engine.with_scores([("Practice", 9, team, None, 10)]) is None
+
+    # New scores after each team's latest one are streamed in
+    changes = [
+        ("Qualifications", 21, team, None, 70),
+        ("Qualifications", 23, team, None, 0),
+        ("Qualifications", 21, "9999", None, 40),
+        ("Practice", 1, "9998", None, 15),
+        ("Qualifications", 22, "9998", None, 25),
+    ]
+    updated = engine.with_scores(list(reversed(changes)))
+    assert updated is not None
+    assert engine.team_stats(30, True) == before
+    for match_type, match_number, team_number, _, new_score in changes:
+        match_id = f"{match_type}_{match_number}"
+        match_scores.setdefault(match_id, {})[team_number] = new_score
+    fresh = ratings.RatingEngine(
+        stdfun.ScoreStore.from_match_scores(match_scores).matches, window=3
+    )
+    for cutoff in (1, 21, 22, 23, 30):
+        for include_practice in (True, False):
+            expected = fresh.team_stats(cutoff, include_practice)
+            stats = updated.team_stats(cutoff, include_practice)
+            assert stats.keys() == expected.keys()
+            for team_number, values in expected.items():
+                assert stats[team_number] == pytest.approx(values)
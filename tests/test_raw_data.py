@@ -0,0 +1,146 @@
+import shutil
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import columnar
+import raw_data
+import scoring
+import std as stdfun
+
+
+class FakeDocument:
+    def __init__(self, doc_id, data, update_time):
+        self.id = doc_id
+        self._data = data
+        self.update_time = update_time
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeQuery:
+    def __init__(self, collection, field_filter):
+        self.collection = collection
+        self.field_filter = field_filter
+
+    def stream(self):
+        field, value = self.field_filter.field_path, self.field_filter.value
+        for doc in list(self.collection.docs.values()):
+            if doc._data.get(field) is not None and doc._data[field] >= value:
+                self.collection.reads += 1
+                yield doc
+
+
+class FakeCollection:
+    """In-memory stand-in for a Firestore collection that counts document reads."""
+
+    def __init__(self):
+        self.docs = {}
+        self.reads = 0
+        self._clock = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+    def put(self, doc_id, data):
+        self._clock += timedelta(seconds=1)
+        data = dict(data, updatedAt=self._clock)
+        self.docs[doc_id] = FakeDocument(doc_id, data, self._clock)
+
+    def delete(self, doc_id):
+        del self.docs[doc_id]
+
+    def stream(self):
+        for doc in list(self.docs.values()):
+            self.reads += 1
+            yield doc
+
+    def where(self, filter=None):
+        return FakeQuery(self, filter)
+
+
+def scouting_document(l1=1, barge="Park"):
+    return {
+        "auto": {"leave": True, "coral": [l1, 0, 0, 0]},
+        "teleop": {"coral": [2, 1, 0, 0]},
+        "endgame": {"bargeStatus": barge},
+    }
+
+
+@pytest.fixture
+def collection():
+    collection = FakeCollection()
+    for match_number in range(1, 4):
+        for team in ("1", "2", "3"):
+            collection.put(f"Qualifications_{match_number}_{team}", scouting_document())
+    return collection
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "scores"), str(tmp_path / "scores.sync.json")
+
+
+def sync(collection, paths, **kwargs):
+    collection.reads = 0
+    return raw_data.sync_scores(
+        collection, scores_path=paths[0], state_path=paths[1], **kwargs
+    )
+
+
+def scores(paths):
+    store = stdfun.load_score_store(paths[0], event=raw_data.EVENT_KEY)
+    return {
+        (match.match_number, team): score
+        for match in store.matches
+        for team, score in match.scores.items()
+    }
+
+
+def test_sync_rescores_only_changed_documents(collection, paths):
+    assert sync(collection, paths) == {"changed": 9, "removed": 0}
+    assert sync(collection, paths) == {"changed": 0, "removed": 0}
+
+    collection.put("Qualifications_4_1", scouting_document(l1=5))
+    collection.put("Qualifications_1_1", scouting_document(barge="Success Deep Cage"))
+    collection.delete("Qualifications_2_3")
+    assert sync(collection, paths) == {"changed": 2, "removed": 1}
+
+    result = scores(paths)
+    expected = raw_data.calculate_team_score(scouting_document())
+    assert len(result) == 9
+    assert result[(2, "2")] == expected
+    assert (2, "3") not in result
+    assert result[(4, "1")] == raw_data.calculate_team_score(scouting_document(l1=5))
+    assert result[(1, "1")] == expected + 10
+
+
+def test_updated_field_reads_only_new_documents(collection, paths):
+    pytest.importorskip("firebase_admin")
+    sync(collection, paths, updated_field="updatedAt")
+    collection.put("Qualifications_4_1", scouting_document())
+    assert sync(collection, paths, updated_field="updatedAt")["changed"] == 1
+    # Only the document at the high-water mark and the new one are read
+    assert collection.reads == 2
+    assert len(scores(paths)) == 10
+
+
+def test_regenerated_store_triggers_full_sync(collection, paths):
+    sync(collection, paths)
+    shutil.rmtree(paths[0])
+    assert sync(collection, paths)["changed"] == 9
+    assert len(scores(paths)) == 9
+
+    # A store rewritten by another tool does not hold the synced documents either
+    columnar.write_columnar(
+        paths[0],
+        {
+            "event": ["2025other"],
+            "match_type": ["Qualifications"],
+            "match_number": [1],
+            "team": ["99"],
+            "total": [7],
+        },
+        scoring.get_rules(raw_data.SEASON).columns,
+    )
+    assert sync(collection, paths)["changed"] == 9
+    assert len(scores(paths)) == 9
+    assert stdfun.load_score_store(paths[0], event="2025other").matches
@@ -0,0 +1,157 @@
+import threading
+
+import pytest
+
+import columnar
+import score_db
+import std as stdfun
+
+COMPONENTS = ["auto_net", "teleop_processor"]
+
+
+def write_store(path, rows):
+    columnar.write_columnar(
+        path,
+        {
+            "event": [row[0] for row in rows],
+            "match_type": [row[1] for row in rows],
+            "match_number": [row[2] for row in rows],
+            "team": [row[3] for row in rows],
+            "total": [row[4] for row in rows],
+            "points": [[row[4], 0] for row in rows],
+        },
+        COMPONENTS,
+    )
+
+
+ROWS = [
+    ("2025a", "Practice", 1, "254", 40),
+    ("2025a", "Qualifications", 1, "254", 50),
+    ("2025a", "Qualifications", 1, "1678", 35),
+    ("2025a", "Qualifications", 2, "254", 62),
+    ("2025b", "Qualifications", 1, "254", 70),
+    ("2025b", "Qualifications", 3, "254", 58),
+    ("2025b", "Qualifications", 3, "1678", 41),
+]
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = score_db.ScoreDatabase(str(tmp_path / "scores.sqlite"))
+    yield database
+    database.close()
+
+
+def test_import_round_trip_and_reimport_removes_rows(tmp_path, database):
+    path = str(tmp_path / "store")
+    write_store(path, ROWS)
+    assert database.import_columnar(path) == len(ROWS)
+    assert database.events() == ["2025a", "2025b"]
+    assert sorted(database.event_scores("2025a")) == sorted(
+        row[1:] for row in ROWS if row[0] == "2025a"
+    )
+    assert database.connection.execute(
+        "SELECT components FROM scores WHERE event = '2025b' AND match_number = 1"
+    ).fetchone() == ("70,0",)
+
+    # One row was deleted and one corrected in the store since the first import
+    changed = [row for row in ROWS if row[2:4] != (1, "1678")]
+    changed = [row[:4] + (64,) if row[2:4] == (2, "254") else row for row in changed]
+    write_store(path, changed)
+    assert database.import_columnar(path, event="2025a") == 3
+    assert sorted(database.event_scores("2025a")) == [
+        ("Practice", 1, "254", 40),
+        ("Qualifications", 1, "254", 50),
+        ("Qualifications", 2, "254", 64),
+    ]
+    # Other events are left alone
+    assert len(database.event_scores("2025b")) == 3
+
+    store = database.score_store("2025a")
+    assert store.team_stats(3)["254"]["average"] == pytest.approx(154 / 3)
+    assert "1678" not in store.team_stats(3)
+
+
+def test_revision_bumps_on_every_write(tmp_path, database):
+    path = str(tmp_path / "store")
+    write_store(path, ROWS)
+    assert database.revision("2025a") == 0
+    database.import_columnar(path)
+    assert (database.revision("2025a"), database.revision("2025b")) == (1, 1)
+    database.import_columnar(path, event="2025b")
+    assert (database.revision("2025a"), database.revision("2025b")) == (1, 2)
+
+    # Emptying an event in the store still counts as a write to it
+    write_store(path, [row for row in ROWS if row[0] == "2025b"])
+    database.import_columnar(path, event="2025a")
+    assert database.event_scores("2025a") == []
+    assert database.revision("2025a") == 2
+    assert database.score_store("2025b").version == 2
+
+
+def test_connection_is_shared_safely_between_threads(database):
+    writes = 200
+    errors = []
+
+    def write():
+        # Revision n of the event scores n for every team
+        for revision in range(1, writes + 1):
+            database.add_scores(
+                [
+                    ("2025c", "Qualifications", 1, team, revision, None)
+                    for team in "123"
+                ],
+                replace_events=["2025c"],
+            )
+
+    def read():
+        try:
+            for _ in range(writes):
+                store = database.score_store("2025c")
+                totals = {
+                    score for match in store.matches for score in match.scores.values()
+                }
+                assert totals <= {store.version}
+                database.team_priors(["1", "2"])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write)]
+    threads += [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert database.revision("2025c") == writes
+
+
+def test_team_priors_match_calculate_stats(tmp_path, database):
+    path = str(tmp_path / "store")
+    write_store(path, ROWS)
+    database.import_columnar(path)
+
+    def expected(team, exclude_event=None):
+        scores = [
+            row[4]
+            for row in ROWS
+            if row[3] == team and row[1] == "Qualifications" and row[0] != exclude_event
+        ]
+        return stdfun.calculate_stats(scores), len(scores)
+
+    priors = database.team_priors(["254", "1678", "9999"])
+    assert priors.keys() == {"254", "1678"}
+    for exclude_event in (None, "2025a", "2025b"):
+        priors = database.team_priors(["254", 1678], exclude_event=exclude_event)
+        for team in ("254", "1678"):
+            (mean, std_dev), count = expected(team, exclude_event)
+            assert priors[team]["average"] == pytest.approx(mean)
+            assert priors[team]["std_dev"] == pytest.approx(std_dev)
+            assert priors[team]["count"] == count
+
+    with_practice = database.team_priors(
+        ["254"], match_types=("Practice", "Qualifications")
+    )
+    mean, std_dev = stdfun.calculate_stats([40, 50, 62, 70, 58])
+    assert with_practice["254"]["average"] == pytest.approx(mean)
+    assert with_practice["254"]["std_dev"] == pytest.approx(std_dev)
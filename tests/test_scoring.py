@@ -0,0 +1,52 @@
+import pytest
+
+import bench
+import scoring
+import synthetic
+
+DOCUMENT = {
+    "auto": {"leave": True, "coral": [1, 0, 2, 0], "net": 1, "processor": 0},
+    "teleop": {"coral": [2, 1, 0, 1], "net": 0, "processor": 1},
+    "endgame": {"bargeStatus": "Success Deep Cage"},
+}
+
+
+def test_document_score_follows_rule_table():
+    # auto 3 + 3 + 12 + 4, teleop 4 + 3 + 5 + 6, endgame 12
+    assert scoring.score_document(DOCUMENT) == 52
+    batch = scoring.score_documents([DOCUMENT, DOCUMENT])
+    assert batch.totals.tolist() == [52, 52]
+    assert batch.breakdown(0)["endgame_bargeStatus"] == 12
+
+
+def test_none_and_missing_values_count_as_zero():
+    empty = {"auto": {}, "teleop": {}, "endgame": {}}
+    nulls = {
+        "auto": {"leave": None, "coral": None, "net": None},
+        "teleop": {"coral": [1, None, 0, 0], "processor": None},
+        "endgame": {"bargeStatus": None},
+    }
+    assert scoring.score_documents([empty, nulls]).totals.tolist() == [0, 2]
+
+
+def test_short_lists_are_padded_and_long_lists_rejected():
+    short = {"auto": {"coral": [1, 1]}, "teleop": {}, "endgame": {}}
+    assert scoring.score_document(short) == 7
+    long = {"auto": {"coral": [0] * 5}, "teleop": {}, "endgame": {}}
+    with pytest.raises(ValueError):
+        scoring.score_document(long)
+
+
+def test_batch_matches_the_original_per_document_scorer():
+    docs = synthetic.generate_documents(500, seed=1)
+    expected = [bench.document_team_score(data) for data in docs]
+    # A short list with a None entry and a None count, as 0, take the slow paths
+    docs[7]["teleop"]["coral"] = [1, None]
+    docs[8]["auto"]["net"] = None
+    expected[7] = bench.document_team_score(
+        {**docs[7], "teleop": {**docs[7]["teleop"], "coral": [1, 0, 0, 0]}}
+    )
+    expected[8] = bench.document_team_score(
+        {**docs[8], "auto": {**docs[8]["auto"], "net": 0}}
+    )
+    assert scoring.score_documents(docs).totals.tolist() == expected
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import pytest
+
+import service
+import std as stdfun
+
+TEAMS = ["1", "2", "3", "4", "5", "6"]
+FAILING_CUTOFF = 13
+
+
+class FailingEngine:
+    """Engine that cannot evaluate one cutoff, like a corrupt row of statistics."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.team_index = engine.team_index
+
+    def arrays(self, cutoffs, include_practice):
+        if FAILING_CUTOFF in cutoffs.tolist():
+            raise RuntimeError("statistics unavailable")
+        return self.engine.arrays(cutoffs, include_practice)
+
+
+class Store:
+    def __init__(self):
+        scores = {team: 10 * int(team) for team in TEAMS}
+        self.store = stdfun.ScoreStore.from_match_scores(
+            {"Qualifications_1": scores}, source="test"
+        )
+
+    def engine(self):
+        return FailingEngine(self.store.engine())
+
+
+async def exchange(port, request):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        headers[name.lower()] = value.strip()
+    body = json.loads(await reader.readexactly(int(headers["content-length"])))
+    writer.close()
+    return status, body
+
+
+def run_with_server(test):
+    async def main():
+        prediction_service = service.PredictionService(Store, max_delay=0.01)
+        await prediction_service.start()
+        server = await asyncio.start_server(
+            prediction_service.handle_connection, "127.0.0.1", 0
+        )
+        try:
+            return await test(prediction_service, server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            await prediction_service.stop()
+
+    return asyncio.run(main())
+
+
+def post(query):
+    body = json.dumps(query).encode()
+    return (
+        f"POST /predict HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode() + body
+
+
+def test_alliances_need_three_teams():
+    with pytest.raises(ValueError):
+        service.parse_query({"blue": "1,2", "red": "4,5,6"})
+    with pytest.raises(ValueError):
+        service.parse_query({"blue": ["1", "2", "3", "7"], "red": ["4", "5", "6"]})
+    blue, red, cutoff, include = service.parse_query(
+        {"blue": "frc1,frc2,frc3", "red": [4, 5, 6], "cutoff": "20"}
+    )
+    assert (blue, red, cutoff, include) == (["1", "2", "3"], ["4", "5", "6"], 20, True)
+
+    async def test(_, port):
+        return await exchange(port, post({"blue": ["1", "2"], "red": ["4", "5", "6"]}))
+
+    status, body = run_with_server(test)
+    assert status == 400 and "3 teams" in body["error"]
+
+
+def test_invalid_content_length_is_rejected():
+    async def test(_, port):
+        results = []
+        for length in ("abc", "-5"):
+            request = f"POST /predict HTTP/1.1\r\nContent-Length: {length}\r\n\r\n"
+            results.append(await exchange(port, request.encode()))
+        return results
+
+    assert [status for status, _ in run_with_server(test)] == [400, 400]
+
+
+def test_failing_query_only_fails_its_own_request():
+    async def test(prediction_service, port):
+        good = {"blue": ["1", "2", "3"], "red": ["4", "5", "6"], "cutoff": 20}
+        bad = dict(good, cutoff=FAILING_CUTOFF)
+        # Both requests arrive within max_delay and share a batch
+        responses = await asyncio.gather(
+            exchange(port, post(good)), exchange(port, post(bad))
+        )
+        return responses, prediction_service.batches
+
+    (good, bad), batches = run_with_server(test)
+    assert batches == 1
+    assert good[0] == 200 and good[1]["red_win_prob"] > 0.5
+    assert bad[0] == 500
@@ -0,0 +1,106 @@
+import numpy as np
+
+import scoring
+import simulate
+
+
+def test_yes_no_component_scores_at_most_once():
+    rules = scoring.get_rules()
+    leave = rules.columns.index("auto_leave")
+    # Three teams that always leave and score nothing else
+    counts = np.zeros((3, len(rules.columns)), dtype=np.int64)
+    counts[:, leave] = 1
+    history = simulate.TeamHistory(
+        ["Qualifications"] * 3,
+        [1, 1, 1],
+        ["1", "2", "3"],
+        rules.score_counts(counts).totals,
+        counts=counts,
+        components=rules.columns,
+    )
+    model = history.components_model()
+    distribution = model.alliance_distribution(np.array([[0, 1, 2]]))
+    assert np.isclose(distribution[0, 9], 1)
+
+
+def random_history(seed, teams=6, matches=8):
+    rng = np.random.default_rng(seed)
+    rules = scoring.get_rules()
+    rows = teams * matches
+    counts = rng.poisson(1.5, (rows, len(rules.columns)))
+    for column, (_, points) in rules.lookups.items():
+        counts[:, column] = rng.integers(0, len(points), rows)
+    totals = rules.score_counts(counts).totals
+    history = simulate.TeamHistory(
+        ["Qualifications"] * rows,
+        np.repeat(np.arange(1, matches + 1), teams),
+        np.tile([str(team) for team in range(1, teams + 1)], matches),
+        totals,
+        counts=counts,
+        components=rules.columns,
+    )
+    # Each team's average total, in history.teams order, and 0 for unknown teams
+    team_totals = totals.reshape(matches, teams).mean(axis=0)
+    return history, np.append(team_totals, 0)
+
+
+def test_bootstrap_draws_only_from_each_teams_history():
+    history = simulate.TeamHistory(
+        ["Practice", "Qualifications", "Qualifications", "Qualifications"],
+        [1, 1, 2, 5],
+        ["1", "1", "2", "1"],
+        [10, 20, 7, 1000],
+    )
+    model = history.bootstrap(cutoff_q_number=5)
+    rng = np.random.default_rng(0)
+    first = history.team_index["1"]
+    second = history.team_index["2"]
+
+    alone = model.alliance_scores(rng, np.array([[first, -1, -1]]), 2000)
+    # Match 5 is at the cutoff, so its 1000 is never drawn
+    assert set(np.unique(alone).tolist()) == {10, 20}
+    together = model.alliance_scores(rng, np.array([[first, second, -1]]), 2000)
+    assert set(np.unique(together).tolist()) == {17, 27}
+    # Unknown teams score 0
+    unknown = model.alliance_scores(rng, np.array([[-1, -1, -1]]), 100)
+    assert (unknown == 0).all()
+
+
+def test_component_model_mean_matches_component_expectations():
+    history, team_totals = random_history(1)
+    model = history.components_model()
+    teams = np.array([[0, 1, 2], [3, 4, 5], [0, -1, -1]])
+    distribution = model.alliance_distribution(teams)
+    assert np.allclose(distribution.sum(axis=1), 1)
+    means = distribution @ np.arange(distribution.shape[1])
+
+    # Poisson counts keep each team's mean count and categorical fields their
+    # mean points, so the alliance's expected score is the sum of its teams'
+    # average totals
+    assert np.allclose(means, team_totals[teams].sum(axis=1))
+
+
+def test_simulate_schedule_probabilities_and_quantiles():
+    history, _ = random_history(2)
+    blue_teams = np.array([[0, 1, 2], [3, 4, 5], [0, 3, -1]])
+    red_teams = np.array([[3, 4, 5], [0, 1, 2], [1, 4, -1]])
+    for model in (history.bootstrap(), history.components_model()):
+        result = simulate.simulate_schedule(
+            model, blue_teams, red_teams, samples=2000, seed=3
+        )
+        assert np.allclose(
+            result["blue_win_prob"] + result["red_win_prob"] + result["tie_prob"], 1
+        )
+        for side in ("blue_quantiles", "red_quantiles"):
+            assert result[side].shape == (3, len(simulate.QUANTILES))
+            assert (np.diff(result[side], axis=1) >= 0).all()
+
+        again = simulate.simulate_schedule(
+            model, blue_teams, red_teams, samples=2000, seed=3
+        )
+        for key, values in result.items():
+            assert np.array_equal(values, again[key])
+        other = simulate.simulate_schedule(
+            model, blue_teams, red_teams, samples=2000, seed=4
+        )
+        assert not np.array_equal(result["blue_avg"], other["blue_avg"])
@@ -0,0 +1,128 @@
+import json
+import os
+
+import columnar
+import raw_data
+import scoring
+import std as stdfun
+import synthetic
+
+
+def test_store_defaults_to_the_configured_event(tmp_path):
+    path = str(tmp_path / "scores")
+    columnar.write_columnar(
+        path,
+        {
+            "event": [raw_data.EVENT_KEY, raw_data.EVENT_KEY, "2025other"],
+            "match_type": ["Qualifications"] * 3,
+            "match_number": [1, 1, 1],
+            "team": ["1", "2", "1"],
+            "total": [10, 20, 99],
+        },
+        scoring.get_rules().columns,
+    )
+
+    store = stdfun.load_score_store(path)
+    assert [match.scores for match in store.matches] == [{"1": 10, "2": 20}]
+    other = stdfun.load_score_store(path, event="2025other")
+    assert [match.scores for match in other.matches] == [{"1": 99}]
+
+
+def write_scores(path, total):
+    columnar.write_columnar(
+        path,
+        {
+            "event": [raw_data.EVENT_KEY],
+            "match_type": ["Qualifications"],
+            "match_number": [1],
+            "team": ["1"],
+            "total": [total],
+        },
+        scoring.get_rules().columns,
+    )
+
+
+def test_unchanged_store_is_reused_and_a_rewrite_is_reloaded(tmp_path):
+    stdfun.clear_cache()
+    path = str(tmp_path / "scores")
+    write_scores(path, 10)
+    store = stdfun.load_score_store(path)
+    assert stdfun.load_score_store(path) is store
+
+    # A second write within the file system's timestamp granularity
+    mtime = columnar.modified_ns(path)
+    write_scores(path, 20)
+    os.utime(os.path.join(path, columnar.CURRENT_FILE), ns=(mtime, mtime))
+    fresh = stdfun.load_score_store(path)
+    assert fresh is not store
+    assert fresh.matches[0].scores == {"1": 20}
+    assert fresh.version > store.version
+    assert stdfun.load_score_store(path) is fresh
+
+
+def test_replaced_json_file_is_reloaded(tmp_path):
+    stdfun.clear_cache()
+    path = str(tmp_path / "match_team_scores.json")
+    with open(path, "w") as f:
+        json.dump({"Qualifications_1": {"1": 10}}, f)
+    store = stdfun.load_score_store(path)
+    assert stdfun.load_score_store(path) is store
+
+    mtime = os.stat(path).st_mtime_ns
+    replacement = str(tmp_path / "replacement.json")
+    with open(replacement, "w") as f:
+        json.dump({"Qualifications_1": {"1": 20}}, f)
+    os.utime(replacement, ns=(mtime, mtime))
+    os.replace(replacement, path)
+    fresh = stdfun.load_score_store(path)
+    assert fresh is not store
+    assert fresh.matches[0].scores == {"1": 20}
+    assert fresh.version > store.version
+
+
+def test_engine_matches_calculate_stats_at_every_cutoff(
+    brute_force_stats, assert_same_stats
+):
+    _, match_scores = synthetic.generate_event(matches=30, scouted=0.8, seed=3)
+    engine = stdfun.ScoreStore.from_match_scores(match_scores).engine()
+    for cutoff in range(0, 33):
+        for include_practice in (True, False):
+            assert_same_stats(
+                engine.team_stats(cutoff, include_practice),
+                brute_force_stats(match_scores, cutoff, include_practice),
+            )
+
+
+def test_engine_with_scores_equals_a_fresh_build(brute_force_stats, assert_same_stats):
+    _, match_scores = synthetic.generate_event(matches=20, seed=4)
+    store = stdfun.ScoreStore.from_match_scores(
+        {match_id: dict(teams) for match_id, teams in match_scores.items()}
+    )
+    store.engine()
+    qualification = sorted(match_scores["Qualifications_5"])
+    practice_team = next(iter(match_scores["Practice_1"]))
+    updates = [
+        ("Qualifications_5", qualification[0], None),  # removed
+        ("Qualifications_5", qualification[1], 77),  # changed
+        ("Qualifications_25", qualification[0], 41),  # new match number at the end
+        ("Qualifications_0", "9999", 12),  # new team before the first match
+        ("Practice_1", practice_team, None),
+        ("Practice_2", "9999", 30),
+    ]
+    for match_id, team, score in updates:
+        if score is None:
+            match_scores[match_id].pop(team)
+        else:
+            match_scores.setdefault(match_id, {})[team] = score
+        store.apply_scores([(match_id, team, score)])
+
+    incremental = store.engine()
+    fresh = stdfun.TeamStatsEngine(store.matches)
+    assert incremental is not fresh
+    for cutoff in range(0, 28):
+        for include_practice in (True, False):
+            expected = brute_force_stats(match_scores, cutoff, include_practice)
+            assert_same_stats(
+                incremental.team_stats(cutoff, include_practice), expected
+            )
+            assert_same_stats(fresh.team_stats(cutoff, include_practice), expected)
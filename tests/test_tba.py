@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import tba
+
+MATCHES = [{"key": "2025test_qm1", "comp_level": "qm", "match_number": 1}]
+LAST_MODIFIED = "Sat, 01 Mar 2025 18:00:00 GMT"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers with the server's scripted responses and records every request."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(dict(self.headers))
+            server.times.append(time.perf_counter())
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        script = server.responses
+        status, headers, body = script.pop(0) if len(script) > 1 else script[0]
+        # Paths with their own body, e.g. per event
+        body = server.bodies.get(self.path, body)
+        if status == 200 and self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            status, body = 304, None
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.requests = []
+    server.times = []
+    server.bodies = {}
+    server.delay = 0
+    server.lock = threading.Lock()
+    server.in_flight = server.max_in_flight = 0
+    server.responses = [
+        (200, {"Last-Modified": LAST_MODIFIED, "ETag": '"v1"'}, MATCHES)
+    ]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, cache_dir, **kwargs):
+    host, port = server.server_address
+    kwargs.setdefault("rate_limit", None)
+    kwargs.setdefault("backoff", 0)
+    return tba.TBAClient(
+        api_key="test", base_url=f"http://{host}:{port}", cache_dir=cache_dir, **kwargs
+    )
+
+
+def test_fresh_response_is_reused_within_ttl(server, tmp_path):
+    client = make_client(server, str(tmp_path), ttl=60)
+    first = client.get("/event/2025test/matches")
+    second = client.get("/event/2025test/matches")
+    assert first == (MATCHES, LAST_MODIFIED, False)
+    assert second == (MATCHES, LAST_MODIFIED, True)
+    assert len(server.requests) == 1
+
+    # A restarted app reads the response from the disk cache
+    restarted = make_client(server, str(tmp_path), ttl=60)
+    assert restarted.get("/event/2025test/matches").from_cache
+    assert len(server.requests) == 1
+
+
+def test_stale_response_is_revalidated(server, tmp_path):
+    client = make_client(server, str(tmp_path), ttl=0)
+    client.get("/event/2025test/matches")
+    response = client.get("/event/2025test/matches")
+    assert response == (MATCHES, LAST_MODIFIED, True)
+    assert len(server.requests) == 2
+    assert server.requests[1]["If-Modified-Since"] == LAST_MODIFIED
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+
+
+def test_max_age_sets_lifetime_without_ttl(server, tmp_path):
+    server.responses = [
+        (200, {"Last-Modified": LAST_MODIFIED, "Cache-Control": "max-age=60"}, MATCHES)
+    ]
+    client = make_client(server, str(tmp_path))
+    client.get("/event/2025test/matches")
+    assert client.get("/event/2025test/matches").from_cache
+    assert len(server.requests) == 1
+
+
+def test_rate_limited_request_is_retried(server, tmp_path):
+    server.responses = [
+        (429, {"Retry-After": "0"}, None),
+        (200, {"Last-Modified": LAST_MODIFIED}, MATCHES),
+    ]
+    client = make_client(server, str(tmp_path), ttl=60, retries=2)
+    assert client.get("/event/2025test/matches") == (MATCHES, LAST_MODIFIED, False)
+    assert len(server.requests) == 2
+
+
+def test_cached_response_is_used_when_tba_fails(server, tmp_path):
+    client = make_client(server, str(tmp_path), ttl=0, retries=1)
+    client.get("/event/2025test/matches")
+
+    server.responses = [(503, {}, None)]
+    assert client.get("/event/2025test/matches") == (MATCHES, LAST_MODIFIED, True)
+    assert len(server.requests) == 3
+
+    server.shutdown()
+    server.server_close()
+    assert client.get("/event/2025test/matches") == (MATCHES, LAST_MODIFIED, True)
+
+
+def test_error_without_cache_raises(server, tmp_path):
+    server.responses = [(404, {}, {"Error": "not found"})]
+    client = make_client(server, str(tmp_path))
+    with pytest.raises(Exception, match="404"):
+        client.get("/event/2025none/matches")
+
+
+def test_events_are_fetched_concurrently_and_keyed_per_event(server, tmp_path):
+    event_keys = ["2025a", "2025b", "2025c", "2025d"]
+    endpoints = ("matches", "teams")
+    server.bodies = {
+        f"/event/{event_key}/{endpoint}": [event_key, endpoint]
+        for event_key in event_keys
+        for endpoint in endpoints
+    }
+    server.delay = 0.2
+    client = make_client(server, str(tmp_path))
+
+    start = time.perf_counter()
+    results = tba.fetch_events(event_keys, endpoints, max_workers=8, client=client)
+    elapsed = time.perf_counter() - start
+    assert results == {
+        event_key: {endpoint: [event_key, endpoint] for endpoint in endpoints}
+        for event_key in event_keys
+    }
+    assert server.max_in_flight > 1
+    # Eight requests of 0.2 s each, overlapped
+    assert elapsed < 8 * server.delay / 2
+
+
+def test_rate_limiter_spaces_requests(server, tmp_path):
+    rate = 20
+    client = make_client(server, str(tmp_path), rate_limit=rate)
+    event_keys = [f"2025e{i}" for i in range(2 * rate)]
+    tba.fetch_events(event_keys, ("matches",), max_workers=8, client=client)
+
+    times = sorted(server.times)
+    assert len(times) == 2 * rate
+    # A full bucket lets the first `rate` requests through at once; the other
+    # `rate` follow at `rate` per second, so about a second later
+    assert times[rate - 1] - times[0] < 0.5
+    assert times[-1] - times[rate - 1] >= 0.9
+
+
+def test_rate_limit_must_be_positive():
+    with pytest.raises(ValueError):
+        tba.RateLimiter(0)
+
+
+def test_alliance_of_the_wrong_size_names_the_match():
+    matches = [
+        {
+            "comp_level": "qm",
+            "match_number": number,
+            "alliances": {
+                "blue": {"team_keys": blue, "score": 50},
+                "red": {"team_keys": ["frc4", "frc5", "frc6"], "score": 40},
+            },
+            "winning_alliance": "blue",
+        }
+        for number, blue in ((1, ["frc1", "frc2", "frc3"]), (2, ["frc1", "frc2"]))
+    ]
+    event = tba.build_event_data("2025test", matches[:1])
+    assert event.blue_teams.shape == (1, tba.ALLIANCE_SIZE)
+    with pytest.raises(ValueError, match="Qualification 2 of 2025test has 2 blue"):
+        tba.build_event_data("2025test", matches)